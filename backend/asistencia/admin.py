@@ -1,6 +1,6 @@
 # asistencia/admin.py
 from django.contrib import admin
-from .models import Checada, Justificacion
+from .models import Checada, Justificacion, ResumenDiario
 
 
 @admin.register(Checada)
@@ -45,3 +45,17 @@ class JustificacionAdmin(admin.ModelAdmin):
     list_select_related = ("empleado",)
     ordering = ("-fecha", "-creado_en")
     list_per_page = 50
+
+
+@admin.register(ResumenDiario)
+class ResumenDiarioAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "empleado", "fecha", "primera_entrada", "ultima_salida",
+        "checadas", "minutos_trabajados", "dentro_geocerca_ratio", "actualizado_en",
+    )
+    list_filter = ("fecha",)
+    date_hierarchy = "fecha"
+    list_select_related = ("empleado",)
+    readonly_fields = [f.name for f in ResumenDiario._meta.fields]
+    ordering = ("-fecha",)
+    list_per_page = 50
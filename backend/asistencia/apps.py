@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AsistenciaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'asistencia'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registra receivers)
@@ -0,0 +1,326 @@
+# backend/asistencia/geocercas.py
+"""
+Motor de geocercas vectorizado con índice espacial de rejilla.
+
+Carga una sola vez todas las Ubicaciones activas (lat, lon, radio_m) en arreglos
+NumPy y las registra en una rejilla uniforme (celdas de TAM_CELDA_GRADOS): cada
+geocerca aparece en las celdas que toca su radio. Una checada solo se compara,
+con un haversine vectorizado, contra las geocercas de su celda.
+
+El motor se cachea por proceso. Cuando cambia una Ubicacion (asistencia.signals)
+se incrementa la versión compartida "geocercas" y se anota el id en una bitácora
+corta; los demás procesos aplican solo esos cambios (una query) y únicamente
+recargan todo si la bitácora tiene huecos.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from core.versiones import version_actual, incrementar_version
+
+from .utils import Number, _to_float
+
+RADIO_TIERRA_M = 6371000.0
+METROS_POR_GRADO_LAT = 111_320.0
+VERSION_KEY = "geocercas"
+BITACORA_KEY = "gv:geocercas:cambios"
+BITACORA_MAX = 500
+
+# ~1.1 km de lado en latitud; las geocercas típicas (100-500 m) caen en 1-4 celdas
+TAM_CELDA_GRADOS = getattr(settings, "ASISTENCIA_GEOCERCA_CELDA_GRADOS", 0.01)
+
+# Tope de celdas (puntos x geocercas) por bloque para acotar memoria en el barrido lineal
+MAX_CELDAS_BLOQUE = 2_000_000
+
+Celda = Tuple[int, int]
+_SIN_CANDIDATOS = np.empty(0, dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class ResultadoGeocerca:
+    ubicacion_id: int
+    distancia_m: int
+    dentro: bool
+
+
+class MotorGeocercas:
+    """
+    Geocercas en arreglos paralelos por "slot" + rejilla celda -> slots.
+    Los slots de geocercas eliminadas/inactivas quedan muertos (vivo=False) y fuera de la rejilla.
+    """
+
+    def __init__(self, ids: Sequence[int], lats: Sequence[float], lons: Sequence[float],
+                 radios: Sequence[float], version: int = 0, tam_celda: float = TAM_CELDA_GRADOS):
+        self.version = version
+        self.tam_celda = float(tam_celda)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.lat_deg = np.asarray(lats, dtype=np.float64)
+        self.lon_deg = np.asarray(lons, dtype=np.float64)
+        self.radio = np.maximum(np.asarray(radios, dtype=np.float64), 0.0)
+        self.vivo = np.ones(len(self.ids), dtype=bool)
+        self._recalcular_trig()
+
+        self._pos: Dict[int, int] = {int(uid): i for i, uid in enumerate(self.ids.tolist())}
+        self._celdas: Dict[Celda, List[int]] = defaultdict(list)
+        self._celdas_de: Dict[int, List[Celda]] = {}
+        self._candidatos_cache: Dict[Celda, np.ndarray] = {}
+        for slot in range(len(self.ids)):
+            celdas = self._celdas_de_slot(slot)
+            self._celdas_de[slot] = celdas
+            for c in celdas:
+                self._celdas[c].append(slot)
+
+    @classmethod
+    def desde_bd(cls, version: int = 0) -> "MotorGeocercas":
+        filas = _filas_activas()
+        if not filas:
+            return cls([], [], [], [], version)
+        ids, lats, lons, radios = zip(*filas)
+        return cls(ids, lats, lons, radios, version)
+
+    def __len__(self) -> int:
+        return int(self.vivo.sum())
+
+    # ----- Rejilla -----
+    def _recalcular_trig(self):
+        self.lat = np.radians(self.lat_deg)
+        self.lon = np.radians(self.lon_deg)
+        self.cos_lat = np.cos(self.lat)
+
+    def celda(self, lat: float, lon: float) -> Celda:
+        return (math.floor(lat / self.tam_celda), math.floor(lon / self.tam_celda))
+
+    def _celdas_de_slot(self, slot: int) -> List[Celda]:
+        lat, lon, r = float(self.lat_deg[slot]), float(self.lon_deg[slot]), float(self.radio[slot])
+        dlat = r / METROS_POR_GRADO_LAT
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        i0, j0 = self.celda(lat - dlat, lon - dlon)
+        i1, j1 = self.celda(lat + dlat, lon + dlon)
+        return [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+
+    def _candidatos(self, celda: Celda) -> np.ndarray:
+        cand = self._candidatos_cache.get(celda)
+        if cand is None:
+            slots = self._celdas.get(celda)
+            if not slots:
+                return _SIN_CANDIDATOS
+            cand = self._candidatos_cache[celda] = np.asarray(slots, dtype=np.int64)
+        return cand
+
+    # ----- Cambios incrementales (copy-on-write: nunca muta un motor publicado) -----
+    def _copia(self, version: int) -> "MotorGeocercas":
+        nuevo = object.__new__(MotorGeocercas)
+        nuevo.version = version
+        nuevo.tam_celda = self.tam_celda
+        for attr in ("ids", "lat_deg", "lon_deg", "radio", "vivo", "lat", "lon", "cos_lat"):
+            setattr(nuevo, attr, getattr(self, attr).copy())
+        nuevo._pos = dict(self._pos)
+        nuevo._celdas = defaultdict(list, self._celdas)
+        nuevo._celdas_de = dict(self._celdas_de)
+        nuevo._candidatos_cache = dict(self._candidatos_cache)
+        return nuevo
+
+    def _desregistrar(self, slot: int):
+        for c in self._celdas_de.pop(slot, ()):
+            self._celdas[c] = [s for s in self._celdas[c] if s != slot]
+            self._candidatos_cache.pop(c, None)
+
+    def _registrar(self, slot: int):
+        celdas = self._celdas_de_slot(slot)
+        self._celdas_de[slot] = celdas
+        for c in celdas:
+            self._celdas[c] = self._celdas.get(c, []) + [slot]
+            self._candidatos_cache.pop(c, None)
+
+    def _upsert(self, uid: int, lat: float, lon: float, radio: float):
+        slot = self._pos.get(uid)
+        if slot is None:
+            slot = len(self.ids)
+            self._pos[uid] = slot
+            self.ids = np.append(self.ids, uid)
+            self.lat_deg = np.append(self.lat_deg, lat)
+            self.lon_deg = np.append(self.lon_deg, lon)
+            self.radio = np.append(self.radio, max(radio, 0.0))
+            self.vivo = np.append(self.vivo, True)
+        else:
+            self._desregistrar(slot)
+            self.lat_deg[slot], self.lon_deg[slot] = lat, lon
+            self.radio[slot], self.vivo[slot] = max(radio, 0.0), True
+        self._recalcular_trig()
+        self._registrar(slot)
+
+    def _quitar(self, uid: int):
+        slot = self._pos.get(uid)
+        if slot is not None:
+            self._desregistrar(slot)
+            self.vivo[slot] = False
+
+    def con_cambios(self, ubicacion_ids: Iterable[int], version: int) -> "MotorGeocercas":
+        """Nuevo motor con las ubicaciones indicadas releídas de BD (una query)."""
+        ubicacion_ids = set(ubicacion_ids)
+        filas = {uid: (lat, lon, r) for uid, lat, lon, r in _filas_activas(ubicacion_ids)}
+        nuevo = self._copia(version)
+        for uid in ubicacion_ids:
+            if uid in filas:
+                nuevo._upsert(uid, *filas[uid])
+            else:
+                nuevo._quitar(uid)
+        return nuevo
+
+    # ----- Evaluación -----
+    def _distancias(self, plat: np.ndarray, plon: np.ndarray, slots: np.ndarray) -> np.ndarray:
+        """Matriz (puntos x slots) de distancias en metros, redondeadas. plat/plon en grados."""
+        plat = np.radians(plat)[:, None]
+        plon = np.radians(plon)[:, None]
+        dlat = self.lat[slots][None, :] - plat
+        dlon = self.lon[slots][None, :] - plon
+        a = np.sin(dlat / 2) ** 2 + np.cos(plat) * self.cos_lat[slots][None, :] * np.sin(dlon / 2) ** 2
+        return np.rint(2 * RADIO_TIERRA_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))))
+
+    def _mejor(self, d: np.ndarray, slots: np.ndarray, idx: np.ndarray, ids, dist, dentro):
+        """Geocerca más cercana que contiene al punto; si ninguna, la más cercana."""
+        contiene = d <= self.radio[slots][None, :]
+        mejor = np.argmin(np.where(contiene, d, d + 1e12), axis=1)
+        filas = np.arange(len(idx))
+        ids[idx] = self.ids[slots[mejor]]
+        dist[idx] = d[filas, mejor].astype(np.int64)
+        dentro[idx] = contiene[filas, mejor]
+
+    @staticmethod
+    def _preparar(lats: Iterable[Number], lons: Iterable[Number]):
+        plat = np.array([_coord(x) for x in lats], dtype=np.float64)
+        plon = np.array([_coord(x) for x in lons], dtype=np.float64)
+        n = len(plat)
+        validos = np.flatnonzero(~(np.isnan(plat) | np.isnan(plon)))
+        salida = (np.full(n, -1, dtype=np.int64), np.full(n, -1, dtype=np.int64), np.zeros(n, dtype=bool))
+        return plat, plon, validos, salida
+
+    def evaluar_lote(self, lats: Iterable[Number], lons: Iterable[Number]):
+        """
+        Evalúa n puntos usando la rejilla: cada punto solo contra las geocercas de su celda.
+        Devuelve (ubicacion_ids, distancias_m, dentro) como arreglos de longitud n; id y
+        distancia = -1 si el punto no tiene coordenadas o no hay geocercas en su celda.
+        """
+        plat, plon, validos, (ids, dist, dentro) = self._preparar(lats, lons)
+        if len(validos) == 0 or not self._celdas:
+            return ids, dist, dentro
+
+        ci = np.floor(plat[validos] / self.tam_celda).astype(np.int64).tolist()
+        cj = np.floor(plon[validos] / self.tam_celda).astype(np.int64).tolist()
+        grupos: Dict[Celda, List[int]] = defaultdict(list)
+        for k, celda in enumerate(zip(ci, cj)):
+            grupos[celda].append(int(validos[k]))
+
+        for celda, puntos in grupos.items():
+            slots = self._candidatos(celda)
+            if len(slots) == 0:
+                continue
+            idx = np.asarray(puntos, dtype=np.int64)
+            self._mejor(self._distancias(plat[idx], plon[idx], slots), slots, idx, ids, dist, dentro)
+        return ids, dist, dentro
+
+    def evaluar_lote_lineal(self, lats: Iterable[Number], lons: Iterable[Number]):
+        """Barrido contra todas las geocercas vivas (referencia / benchmark; sin rejilla)."""
+        plat, plon, validos, (ids, dist, dentro) = self._preparar(lats, lons)
+        slots = np.flatnonzero(self.vivo)
+        if len(validos) == 0 or len(slots) == 0:
+            return ids, dist, dentro
+        bloque = max(1, MAX_CELDAS_BLOQUE // len(slots))
+        for ini in range(0, len(validos), bloque):
+            idx = validos[ini:ini + bloque]
+            self._mejor(self._distancias(plat[idx], plon[idx], slots), slots, idx, ids, dist, dentro)
+        return ids, dist, dentro
+
+    def evaluar(self, lat: Number, lon: Number) -> Optional[ResultadoGeocerca]:
+        ids, dist, dentro = self.evaluar_lote([lat], [lon])
+        if ids[0] < 0:
+            return None
+        return ResultadoGeocerca(int(ids[0]), int(dist[0]), bool(dentro[0]))
+
+
+def _coord(x: Number) -> float:
+    f = _to_float(x)
+    return np.nan if f is None else f
+
+
+def _filas_activas(ids: Optional[Set[int]] = None):
+    from organigrama.models import Ubicacion
+
+    qs = Ubicacion.objects.filter(activo=True)
+    if ids is not None:
+        qs = qs.filter(id__in=ids)
+    return [(uid, float(lat), float(lon), float(r)) for uid, lat, lon, r in qs.values_list("id", "lat", "lon", "radio_m")]
+
+
+# ========= Cache por proceso =========
+_lock = threading.Lock()
+_motor: Optional[MotorGeocercas] = None
+
+
+def _cambios_entre(v_local: int, v_actual: int) -> Optional[Set[int]]:
+    """Ids cambiados en (v_local, v_actual] según la bitácora; None si hay huecos."""
+    if not 0 < v_actual - v_local <= BITACORA_MAX:
+        return None
+    por_version = dict(cache.get(BITACORA_KEY) or [])
+    faltantes = [v for v in range(v_local + 1, v_actual + 1) if v not in por_version]
+    if faltantes:
+        return None
+    return {por_version[v] for v in range(v_local + 1, v_actual + 1)}
+
+
+def motor_geocercas() -> MotorGeocercas:
+    """Motor vigente; aplica cambios incrementales o se reconstruye si cambió la versión."""
+    global _motor
+    version = version_actual(VERSION_KEY)
+    motor = _motor
+    if motor is not None and motor.version == version:
+        return motor
+    with _lock:
+        if _motor is not None and _motor.version != version:
+            cambios = _cambios_entre(_motor.version, version)
+            _motor = _motor.con_cambios(cambios, version) if cambios is not None else None
+        if _motor is None:
+            _motor = MotorGeocercas.desde_bd(version)
+        return _motor
+
+
+def invalidar_geocercas(ubicacion_id: Optional[int] = None) -> None:
+    """
+    Publica un cambio de geocercas para todos los procesos (llamado por señales de Ubicacion).
+    Con `ubicacion_id` los procesos aplican solo ese cambio; sin él, recargan todo.
+    """
+    version = incrementar_version(VERSION_KEY)
+    if ubicacion_id is not None:
+        bitacora = (cache.get(BITACORA_KEY) or [])[-(BITACORA_MAX - 1):]
+        cache.set(BITACORA_KEY, bitacora + [(version, int(ubicacion_id))], timeout=None)
+
+
+def asignar_geocercas(checadas: List) -> None:
+    """
+    Asigna en sitio ubicacion, distancia_m y dentro_geocerca a cada Checada con coordenadas,
+    evaluando el lote completo en una sola pasada. Las checadas sin lat/lon conservan su
+    ubicación pero quedan fuera de geocerca; las que no tienen geocerca cerca quedan sin ubicación.
+    """
+    con_coords = [c for c in checadas if c.lat is not None and c.lon is not None]
+    for c in checadas:
+        if c.lat is None or c.lon is None:
+            c.distancia_m, c.dentro_geocerca = None, False
+    if not con_coords:
+        return
+
+    ids, dist, dentro = motor_geocercas().evaluar_lote(
+        [c.lat for c in con_coords], [c.lon for c in con_coords]
+    )
+    for c, uid, d, ok in zip(con_coords, ids.tolist(), dist.tolist(), dentro.tolist()):
+        if uid < 0:
+            c.ubicacion_id, c.distancia_m, c.dentro_geocerca = None, None, False
+        else:
+            c.ubicacion_id, c.distancia_m, c.dentro_geocerca = uid, d, ok
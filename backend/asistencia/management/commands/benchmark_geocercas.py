@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from asistencia.geocercas import MotorGeocercas
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el índice de rejilla contra el barrido lineal con geocercas sintéticas "
+        "(no toca la BD). Ej: manage.py benchmark_geocercas --geocercas 10 1000 50000"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--geocercas", type=int, nargs="+", default=[10, 1000, 50000],
+                            help="Cantidades de geocercas a probar (default: 10 1000 50000).")
+        parser.add_argument("--puntos", type=int, default=1000, help="Checadas por lote (default 1000).")
+        parser.add_argument("--repeticiones", type=int, default=3, help="Corridas por caso; se reporta la mejor.")
+        parser.add_argument("--semilla", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        rng = np.random.default_rng(opts["semilla"])
+        n_puntos = opts["puntos"]
+        reps = max(1, opts["repeticiones"])
+
+        # Geocercas repartidas en una caja aprox. del tamaño de México (lat 15..32, lon -117..-87)
+        self.stdout.write(f"{'geocercas':>10} {'carga_ms':>10} {'lineal_ms':>10} {'rejilla_ms':>11} {'x':>7} {'coinciden':>10}")
+        for n in opts["geocercas"]:
+            lats = 15 + 17 * rng.random(n)
+            lons = -117 + 30 * rng.random(n)
+            radios = rng.integers(50, 500, n)
+
+            t0 = time.perf_counter()
+            motor = MotorGeocercas(range(1, n + 1), lats, lons, radios)
+            carga = (time.perf_counter() - t0) * 1000
+
+            # La mitad de las checadas cae junto a una geocerca real, la otra mitad al azar
+            elegidas = rng.integers(0, n, n_puntos)
+            cerca = rng.random(n_puntos) < 0.5
+            plat = np.where(cerca, lats[elegidas] + rng.normal(0, 0.001, n_puntos), 15 + 17 * rng.random(n_puntos))
+            plon = np.where(cerca, lons[elegidas] + rng.normal(0, 0.001, n_puntos), -117 + 30 * rng.random(n_puntos))
+
+            lineal, res_l = self._medir(motor.evaluar_lote_lineal, plat, plon, reps)
+            rejilla, res_g = self._medir(motor.evaluar_lote, plat, plon, reps)
+            dentro_l, dentro_g = res_l[2], res_g[2]
+            coinciden = bool((dentro_l == dentro_g).all() and (res_l[0][dentro_l] == res_g[0][dentro_l]).all())
+
+            self.stdout.write(
+                f"{n:>10} {carga:>10.1f} {lineal:>10.1f} {rejilla:>11.1f} "
+                f"{lineal / max(rejilla, 1e-9):>6.1f}x {str(coinciden):>10}"
+            )
+
+    @staticmethod
+    def _medir(fn, plat, plon, reps):
+        mejor, res = float("inf"), None
+        for _ in range(reps):
+            t0 = time.perf_counter()
+            res = fn(plat, plon)
+            mejor = min(mejor, (time.perf_counter() - t0) * 1000)
+        return mejor, res
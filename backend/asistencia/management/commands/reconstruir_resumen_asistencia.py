@@ -0,0 +1,46 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from asistencia.models import Checada, ResumenDiario
+from asistencia.resumen import recalcular_resumenes
+
+
+class Command(BaseCommand):
+    help = "Reconstruye ResumenDiario para un rango de fechas (backfill o reparación)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", required=True, help="YYYY-MM-DD (inclusive).")
+        parser.add_argument("--hasta", help="YYYY-MM-DD (inclusive). Por defecto: igual a --desde.")
+
+    def handle(self, *args, **opts):
+        desde = parse_date(opts["desde"])
+        hasta = parse_date(opts["hasta"]) if opts.get("hasta") else desde
+        if not desde or not hasta or hasta < desde:
+            raise CommandError("Rango de fechas inválido (YYYY-MM-DD).")
+
+        tz = timezone.get_current_timezone()
+        total = 0
+        dia = desde
+        # Un día por transacción: acota memoria y bloqueos en rangos largos
+        while dia <= hasta:
+            empleados = set(
+                Checada.objects
+                .filter(
+                    ts__gte=timezone.make_aware(datetime.combine(dia, time.min), tz),
+                    ts__lt=timezone.make_aware(datetime.combine(dia + timedelta(days=1), time.min), tz),
+                )
+                .order_by()
+                .values_list("empleado_id", flat=True)
+                .distinct()
+            )
+            # Incluye resúmenes existentes sin checadas para que se eliminen
+            empleados |= set(ResumenDiario.objects.filter(fecha=dia).values_list("empleado_id", flat=True))
+            with transaction.atomic():
+                total += recalcular_resumenes({(e, dia) for e in empleados})
+            dia += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes reconstruidos {desde} → {hasta}: {total}"))
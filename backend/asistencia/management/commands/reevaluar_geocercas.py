@@ -0,0 +1,73 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from asistencia.geocercas import asignar_geocercas
+from asistencia.models import Checada
+from asistencia.resumen import claves_de, recalcular_resumenes
+
+CAMPOS = ("ubicacion", "distancia_m", "dentro_geocerca")
+
+
+class Command(BaseCommand):
+    help = "Reevalúa ubicacion/distancia_m/dentro_geocerca de checadas con coordenadas (por lotes vectorizados)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", help="YYYY-MM-DD (inclusive). Por defecto: ayer.")
+        parser.add_argument("--hasta", help="YYYY-MM-DD (inclusive). Por defecto: igual a --desde.")
+        parser.add_argument("--lote", type=int, default=5000, help="Checadas por lote (default 5000).")
+        parser.add_argument("--dry-run", action="store_true", help="Calcula sin guardar cambios.")
+
+    def handle(self, *args, **opts):
+        desde = parse_date(opts["desde"]) if opts.get("desde") else timezone.localdate() - timedelta(days=1)
+        hasta = parse_date(opts["hasta"]) if opts.get("hasta") else desde
+        if not desde or not hasta or hasta < desde:
+            raise CommandError("Rango de fechas inválido (YYYY-MM-DD).")
+        lote = max(1, opts["lote"])
+        dry = bool(opts.get("dry_run"))
+
+        tz = timezone.get_current_timezone()
+        qs = (
+            Checada.objects
+            .filter(
+                ts__gte=timezone.make_aware(datetime.combine(desde, time.min), tz),
+                ts__lte=timezone.make_aware(datetime.combine(hasta, time.max), tz),
+                lat__isnull=False,
+                lon__isnull=False,
+            )
+            .only("id", "empleado_id", "ts", "lat", "lon", *CAMPOS)
+            .order_by("id")
+        )
+
+        self.stdout.write(self.style.NOTICE(f"Reevaluando geocercas {desde} → {hasta}"))
+        total = cambiadas = 0
+        buffer = []
+        for ch in qs.iterator(chunk_size=lote):
+            buffer.append(ch)
+            if len(buffer) >= lote:
+                cambiadas += self._procesar(buffer, dry)
+                total += len(buffer)
+                buffer = []
+        if buffer:
+            cambiadas += self._procesar(buffer, dry)
+            total += len(buffer)
+
+        sufijo = " (dry-run)" if dry else ""
+        self.stdout.write(self.style.SUCCESS(f"Checadas evaluadas: {total}, con cambios: {cambiadas}{sufijo}"))
+
+    def _procesar(self, checadas, dry: bool) -> int:
+        antes = [tuple(getattr(c, f"{f}_id" if f == "ubicacion" else f) for f in CAMPOS) for c in checadas]
+        asignar_geocercas(checadas)
+        cambiadas = [
+            c for c, prev in zip(checadas, antes)
+            if (c.ubicacion_id, c.distancia_m, c.dentro_geocerca) != prev
+        ]
+        if cambiadas and not dry:
+            with transaction.atomic():
+                Checada.objects.bulk_update(cambiadas, CAMPOS, batch_size=1000)
+                # dentro_geocerca alimenta dentro_geocerca_ratio del resumen diario
+                recalcular_resumenes(claves_de(cambiadas))
+        return len(cambiadas)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:25
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0004_alter_justificacion_estado'),
+        ('empleados', '0003_empleado_empleados_e_estatus_4edbd0_idx_and_more'),
+        ('organigrama', '0002_ubicacion_organigrama_nombre_ef2923_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checada',
+            name='clave_idempotencia',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='checada',
+            name='ts',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddConstraint(
+            model_name='checada',
+            constraint=models.UniqueConstraint(fields=('empleado', 'clave_idempotencia'), name='uniq_checada_empleado_clave_idempotencia'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0005_checada_ts_evento_clave_idempotencia'),
+        ('empleados', '0003_empleado_empleados_e_estatus_4edbd0_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('primera_entrada', models.TimeField(blank=True, null=True)),
+                ('ultima_salida', models.TimeField(blank=True, null=True)),
+                ('checadas', models.PositiveIntegerField(default=0)),
+                ('checadas_dentro', models.PositiveIntegerField(default=0)),
+                ('minutos_trabajados', models.PositiveIntegerField(default=0, help_text='Primera entrada → última salida')),
+                ('dentro_geocerca_ratio', models.DecimalField(decimal_places=4, default=0, max_digits=5)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_asistencia', to='empleados.empleado')),
+            ],
+            options={
+                'verbose_name': 'Resumen diario de asistencia',
+                'verbose_name_plural': 'Resúmenes diarios de asistencia',
+                'ordering': ('fecha', 'empleado'),
+                'indexes': [models.Index(fields=['fecha', 'empleado'], name='asistencia__fecha_8ce23f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('empleado', 'fecha'), name='uniq_resumen_diario_empleado_fecha')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0006_resumendiario'),
+        ('empleados', '0004_empleado_busqueda'),
+        ('organigrama', '0002_ubicacion_organigrama_nombre_ef2923_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checada',
+            index=models.Index(fields=['ts', 'id'], name='asistencia__ts_8d2287_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='justificacion',
+            index=models.Index(fields=['fecha', 'id'], name='asistencia__fecha_34ee98_idx'),
+        ),
+    ]
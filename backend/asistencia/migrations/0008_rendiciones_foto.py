@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0007_checada_asistencia__ts_8d2287_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checada',
+            name='foto_media',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='asistencia/checada/foto/'),
+        ),
+        migrations.AddField(
+            model_name='checada',
+            name='foto_mini',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='asistencia/checada/foto/'),
+        ),
+    ]
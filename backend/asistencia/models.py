@@ -2,13 +2,17 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 from empleados.models import Empleado
 from organigrama.models import Ubicacion
 from core.enums import TipoChecada, EstadoSolicitud  # IN/OUT y PEND/APROB/RECH/CANC
+from core.imagenes import procesar_foto
 
 User = get_user_model()
 
+CAMPOS_FOTO = ("foto", "foto_mini", "foto_media")
+
 
 class Checada(models.Model):
     empleado = models.ForeignKey(Empleado, on_delete=models.CASCADE, related_name="checadas")
@@ -16,8 +20,13 @@ class Checada(models.Model):
     # IN / OUT (enum unificado)
     tipo = models.CharField(max_length=4, choices=TipoChecada.choices)
 
-    # Marca de tiempo de la checada (evento), independiente de creación del registro
-    ts = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Marca de tiempo de la checada (evento), independiente de creación del registro.
+    # La envía el cliente (replay offline); si no viene, se usa la hora de recepción.
+    ts = models.DateTimeField(default=timezone.now, db_index=True)
+
+    # Llave de idempotencia generada por el dispositivo: reintentos del mismo evento
+    # actualizan la misma fila en lugar de duplicarla (único por empleado).
+    clave_idempotencia = models.CharField(max_length=64, null=True, blank=True)
 
     # Origen de la checada
     FUENTE_CHOICES = (
@@ -45,6 +54,9 @@ class Checada(models.Model):
 
     # Evidencia opcional
     foto = models.ImageField(upload_to="asistencia/checada/foto/", null=True, blank=True)
+    # Rendiciones generadas al subir la evidencia (core.imagenes)
+    foto_mini = models.ImageField(upload_to="asistencia/checada/foto/", null=True, blank=True, editable=False)
+    foto_media = models.ImageField(upload_to="asistencia/checada/foto/", null=True, blank=True, editable=False)
     nota = models.CharField(max_length=255, blank=True, default="")
 
     # Auditoría
@@ -57,8 +69,99 @@ class Checada(models.Model):
         indexes = [
             models.Index(fields=["empleado", "ts"]),
             models.Index(fields=["dentro_geocerca"]),
+            # paginación por llave (-ts, -id)
+            models.Index(fields=["ts", "id"]),
+        ]
+        constraints = [
+            # Sin condición para que sirva como destino de ON CONFLICT (NULLs no chocan)
+            models.UniqueConstraint(
+                fields=["empleado", "clave_idempotencia"],
+                name="uniq_checada_empleado_clave_idempotencia",
+            ),
         ]
 
+    # Campos que se sobrescriben cuando un reintento choca con la llave de idempotencia
+    CAMPOS_UPSERT = (
+        "tipo", "ts", "fuente", "lat", "lon",
+        "ubicacion", "distancia_m", "dentro_geocerca", "nota", "actualizado_en",
+    )
+
+    @classmethod
+    def upsert(cls, objs):
+        """
+        Inserta checadas en un solo INSERT ... ON CONFLICT (empleado, clave_idempotencia).
+        Las que traen llave repetida dentro del mismo lote se colapsan (gana la última).
+        Devuelve una lista alineada con `objs` (los colapsados apuntan a la misma instancia).
+        """
+        unicos = {}
+        orden = []
+        for obj in objs:
+            key = (obj.empleado_id, obj.clave_idempotencia) if obj.clave_idempotencia else id(obj)
+            unicos[key] = obj
+            orden.append(key)
+        if not unicos:
+            return []
+        # bulk_create no llama a save(): las fotos se procesan aquí, solo para llaves nuevas.
+        # En un reintento la foto no se sobrescribe (no está en CAMPOS_UPSERT): se toma la
+        # guardada para no escribir archivos que ninguna fila referencia.
+        subidas = [o for o in unicos.values() if o.foto and not getattr(o.foto, "_committed", True)]
+        guardadas = cls._fotos_guardadas(subidas)
+        for obj in unicos.values():
+            previas = guardadas.get((obj.empleado_id, obj.clave_idempotencia))
+            if previas is not None:
+                obj._asignar_fotos(previas)
+            else:
+                procesar_foto(obj, "foto")
+        cls.objects.bulk_create(
+            list(unicos.values()),
+            update_conflicts=True,
+            unique_fields=["empleado", "clave_idempotencia"],
+            update_fields=list(cls.CAMPOS_UPSERT),
+        )
+        cls._descartar_fotos_en_conflicto([o for o in subidas if (o.empleado_id, o.clave_idempotencia) not in guardadas])
+        # bulk_create no dispara señales: mantener el resumen diario explícitamente
+        from .resumen import claves_de, recalcular_resumenes
+        recalcular_resumenes(claves_de(unicos.values()))
+        return [unicos[key] for key in orden]
+
+    @classmethod
+    def _fotos_guardadas(cls, objs):
+        """{(empleado_id, clave): (foto, foto_mini, foto_media)} de las llaves de `objs` que ya existen."""
+        con_clave = [o for o in objs if o.clave_idempotencia]
+        if not con_clave:
+            return {}
+        filas = cls.objects.filter(
+            empleado_id__in={o.empleado_id for o in con_clave},
+            clave_idempotencia__in={o.clave_idempotencia for o in con_clave},
+        ).values_list("empleado_id", "clave_idempotencia", *CAMPOS_FOTO)
+        return {(emp_id, clave): tuple(fotos) for emp_id, clave, *fotos in filas}
+
+    @classmethod
+    def _descartar_fotos_en_conflicto(cls, escritas):
+        # Otro reintento pudo insertar la llave entre la consulta y el INSERT: la fila conserva
+        # su foto y los archivos recién escritos no quedan referenciados, así que se borran
+        vigentes = cls._fotos_guardadas(escritas)
+        for obj in escritas:
+            previas = vigentes.get((obj.empleado_id, obj.clave_idempotencia))
+            if previas is None or previas[0] == obj.foto.name:
+                continue
+            for campo in CAMPOS_FOTO:
+                archivo = getattr(obj, campo)
+                if archivo:
+                    archivo.storage.delete(archivo.name)
+            obj._asignar_fotos(previas)
+
+    def _asignar_fotos(self, nombres):
+        for campo, nombre in zip(CAMPOS_FOTO, nombres):
+            setattr(self, campo, nombre or None)
+
+    def save(self, *args, **kwargs):
+        procesar_foto(self, "foto")
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "foto" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "foto_mini", "foto_media"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.empleado} {self.tipo} {self.ts:%Y-%m-%d %H:%M}"
 
@@ -90,7 +193,41 @@ class Justificacion(models.Model):
         indexes = [
             models.Index(fields=["empleado", "fecha"]),
             models.Index(fields=["estado"]),
+            # paginación por llave (-fecha, -id)
+            models.Index(fields=["fecha", "id"]),
         ]
 
     def __str__(self):
         return f"Justificación {self.empleado} {self.fecha} ({self.estado})"
+
+
+class ResumenDiario(models.Model):
+    """
+    Resumen materializado por empleado y día (fecha local), mantenido incrementalmente
+    por asistencia.resumen cada vez que entran/cambian checadas de ese empleado-día.
+    """
+    empleado = models.ForeignKey(Empleado, on_delete=models.CASCADE, related_name="resumenes_asistencia")
+    fecha = models.DateField()
+
+    primera_entrada = models.TimeField(null=True, blank=True)
+    ultima_salida = models.TimeField(null=True, blank=True)
+    checadas = models.PositiveIntegerField(default=0)
+    checadas_dentro = models.PositiveIntegerField(default=0)
+    minutos_trabajados = models.PositiveIntegerField(default=0, help_text="Primera entrada → última salida")
+    dentro_geocerca_ratio = models.DecimalField(max_digits=5, decimal_places=4, default=0)
+
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("fecha", "empleado")
+        verbose_name = "Resumen diario de asistencia"
+        verbose_name_plural = "Resúmenes diarios de asistencia"
+        indexes = [
+            models.Index(fields=["fecha", "empleado"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["empleado", "fecha"], name="uniq_resumen_diario_empleado_fecha"),
+        ]
+
+    def __str__(self):
+        return f"{self.empleado} {self.fecha:%Y-%m-%d} ({self.checadas} checadas)"
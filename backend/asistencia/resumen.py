@@ -0,0 +1,136 @@
+# backend/asistencia/resumen.py
+"""
+Mantenimiento incremental de ResumenDiario.
+
+Cada vez que entran o cambian checadas se recalculan solo los pares
+(empleado, fecha local) afectados: una query agregada sobre Checada para esos
+pares y un upsert en ResumenDiario. Recalcular el par completo (en lugar de
+sumar deltas) lo hace correcto ante reintentos idempotentes, ediciones y bajas.
+
+Dos ingestas concurrentes del mismo par (p. ej. dos kioscos en cambio de turno)
+no ven la checada sin confirmar de la otra: antes de agregar se toma un bloqueo
+consultivo por par (core.bloqueos) que dura hasta el fin de la transacción del
+llamador, así la segunda recalcula después de que la primera confirmó.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.bloqueos import bloquear
+from core.enums import TipoChecada
+
+from .models import Checada, ResumenDiario
+
+Clave = Tuple[int, date]
+
+CAMPOS_RESUMEN = (
+    "primera_entrada", "ultima_salida", "checadas", "checadas_dentro",
+    "minutos_trabajados", "dentro_geocerca_ratio", "actualizado_en",
+)
+
+
+def clave_de(checada) -> Clave:
+    """(empleado_id, fecha local) de una checada."""
+    return (checada.empleado_id, timezone.localdate(checada.ts))
+
+
+def claves_de(checadas: Iterable) -> Set[Clave]:
+    return {clave_de(c) for c in checadas if c.empleado_id and c.ts}
+
+
+def recalcular_resumenes(claves: Iterable[Clave]) -> int:
+    """Recalcula (o elimina si ya no hay checadas) los resúmenes de los pares indicados."""
+    claves = set(claves)
+    if not claves:
+        return 0
+    # Sin savepoint: dentro de la transacción del llamador el bloqueo dura hasta su commit
+    with transaction.atomic(savepoint=False):
+        bloquear("asistencia.resumen", claves)
+        return _recalcular(claves)
+
+
+def _filtro_pares(claves: Set[Clave]) -> Q:
+    """Checadas de los pares exactos: por rango de fechas, los empleados que lo comparten."""
+    tz = timezone.get_current_timezone()
+    por_empleado = defaultdict(list)
+    for emp_id, fecha in claves:
+        por_empleado[emp_id].append(fecha)
+    por_rango = defaultdict(set)
+    for emp_id, fechas in por_empleado.items():
+        por_rango[(min(fechas), max(fechas))].add(emp_id)
+    q = Q()
+    for (desde, hasta), empleados in por_rango.items():
+        q |= Q(
+            empleado_id__in=empleados,
+            ts__gte=timezone.make_aware(datetime.combine(desde, time.min), tz),
+            ts__lt=timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min), tz),
+        )
+    return q
+
+
+def _recalcular(claves: Set[Clave]) -> int:
+    tz = timezone.get_current_timezone()
+    filas = (
+        Checada.objects
+        .filter(_filtro_pares(claves))
+        .annotate(fecha=TruncDate("ts", tzinfo=tz))
+        .order_by()  # sin el ordering por -ts del Meta, que rompería el GROUP BY
+        .values("empleado_id", "fecha")
+        .annotate(
+            primera=Min("ts", filter=Q(tipo=TipoChecada.IN)),
+            ultima=Max("ts", filter=Q(tipo=TipoChecada.OUT)),
+            total=Count("id"),
+            dentro=Count("id", filter=Q(dentro_geocerca=True)),
+        )
+    )
+
+    resumenes = []
+    for f in filas:
+        clave = (f["empleado_id"], f["fecha"])
+        if clave not in claves:
+            continue
+        resumenes.append(_resumen(clave, f))
+
+    vacias = claves - {(r.empleado_id, r.fecha) for r in resumenes}
+    if vacias:
+        q = Q()
+        for emp_id, fecha in vacias:
+            q |= Q(empleado_id=emp_id, fecha=fecha)
+        ResumenDiario.objects.filter(q).delete()
+
+    if resumenes:
+        ResumenDiario.objects.bulk_create(
+            resumenes,
+            update_conflicts=True,
+            unique_fields=["empleado", "fecha"],
+            update_fields=list(CAMPOS_RESUMEN),
+        )
+    return len(resumenes)
+
+
+def _resumen(clave: Clave, f: dict) -> ResumenDiario:
+    primera = timezone.localtime(f["primera"]) if f["primera"] else None
+    ultima = timezone.localtime(f["ultima"]) if f["ultima"] else None
+    minutos = 0
+    if primera and ultima and ultima > primera:
+        minutos = int((ultima - primera).total_seconds() // 60)
+    total = f["total"] or 0
+    ratio = (Decimal(f["dentro"]) / Decimal(total)).quantize(Decimal("0.0001")) if total else Decimal("0")
+    return ResumenDiario(
+        empleado_id=clave[0],
+        fecha=clave[1],
+        primera_entrada=primera.time() if primera else None,
+        ultima_salida=ultima.time() if ultima else None,
+        checadas=total,
+        checadas_dentro=f["dentro"] or 0,
+        minutos_trabajados=minutos,
+        dentro_geocerca_ratio=ratio,
+    )
@@ -1,11 +1,110 @@
 # asistencia/serializers.py
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
+from core.campos import CamposDinamicosMixin
 from core.enums import TipoChecada
+from empleados.models import Empleado
+from empleados.serializers import EmpleadoBreveSerializer
 from .models import Checada, Justificacion
+from .geocercas import asignar_geocercas
+from .resumen import clave_de, recalcular_resumenes
 from organigrama.models import Ubicacion
 
 
-class ChecadaSerializer(serializers.ModelSerializer):
+# Tolerancia de desfase de reloj del dispositivo para la hora del evento
+TOLERANCIA_TS_FUTURO = timedelta(minutes=5)
+
+
+def validar_ts_evento(value):
+    """La hora del evento la manda el cliente; no puede estar en el futuro."""
+    if value and value > timezone.now() + TOLERANCIA_TS_FUTURO:
+        raise serializers.ValidationError("La hora de la checada no puede estar en el futuro.")
+    return value
+
+
+class PrecargadoPKField(serializers.PrimaryKeyRelatedField):
+    """
+    PK relacionado que primero busca en la precarga del contexto
+    (context["precarga"][Modelo] -> {pk: obj}); si no hay precarga, consulta normal.
+    """
+
+    def to_internal_value(self, data):
+        precarga = (self.context.get("precarga") or {}).get(self.get_queryset().model)
+        if precarga is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        obj = precarga.get(pk)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
+
+
+class ChecadaBulkListSerializer(serializers.ListSerializer):
+    """
+    Modo lista de ChecadaCreateSerializer para ingesta masiva (kioscos / móviles offline).
+    - Precarga empleados y ubicaciones referenciados (1 query por modelo).
+    - Un elemento inválido NO aborta el lote: queda en `rechazadas` como (indice, errores)
+      y validated_data solo contiene las válidas (índices en `indices_aceptados`).
+    """
+
+    def _precargar(self, data):
+        emp_ids, ubi_ids = set(), set()
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            for key, dest in (("empleado", emp_ids), ("ubicacion_id", ubi_ids)):
+                try:
+                    dest.add(int(item.get(key)))
+                except (TypeError, ValueError):
+                    pass
+        self._context["precarga"] = {
+            Empleado: Empleado.objects.in_bulk(emp_ids) if emp_ids else {},
+            Ubicacion: Ubicacion.objects.in_bulk(ubi_ids) if ubi_ids else {},
+        }
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError(
+                {"non_field_errors": ["Se esperaba una lista de checadas."]}, code="not_a_list"
+            )
+        if self.max_length is not None and len(data) > self.max_length:
+            raise serializers.ValidationError(
+                {"non_field_errors": [f"Máximo {self.max_length} checadas por lote."]}, code="max_length"
+            )
+
+        self._precargar(data)
+        self.rechazadas = []
+        self.indices_aceptados = []
+        ret = []
+        for index, item in enumerate(data):
+            try:
+                ret.append(self.run_child_validation(item))
+            except serializers.ValidationError as exc:
+                self.rechazadas.append((index, exc.detail))
+            else:
+                self.indices_aceptados.append(index)
+        return ret
+
+    def create(self, validated_data):
+        objs = [Checada(**attrs) for attrs in validated_data]
+        # Geocerca asignada por el servidor para todo el lote en una sola pasada vectorizada
+        asignar_geocercas(objs)
+        # Upsert por (empleado, clave_idempotencia): reintentar el lote no duplica
+        with transaction.atomic():
+            return Checada.upsert(objs)
+
+
+class ChecadaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {"empleado": EmpleadoBreveSerializer}
+
     # Campos “amigables” (solo salida)
     empleado_nombre = serializers.CharField(source="empleado.nombre_completo", read_only=True)
     ubicacion_nombre = serializers.CharField(source="ubicacion.nombre", read_only=True, allow_null=True)
@@ -26,16 +125,42 @@ class ChecadaSerializer(serializers.ModelSerializer):
         fields = "__all__"
         extra_kwargs = {
             "ubicacion": {"write_only": True},
-            "ts": {"read_only": True},
+            # La geocerca la evalúa el servidor (asistencia.geocercas)
+            "distancia_m": {"read_only": True},
+            "dentro_geocerca": {"read_only": True},
             "creado_en": {"read_only": True},
             "actualizado_en": {"read_only": True},
         }
+        # La unicidad (empleado, clave_idempotencia) se resuelve con upsert, no con 400
+        validators = []
+
+    def validate_ts(self, value):
+        return validar_ts_evento(value)
+
+    def create(self, validated_data):
+        obj = Checada(**validated_data)
+        asignar_geocercas([obj])
+        if not obj.clave_idempotencia:
+            obj.save()
+            return obj
+        return Checada.upsert([obj])[0]
+
+    def update(self, instance, validated_data):
+        clave_previa = clave_de(instance)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        asignar_geocercas([instance])
+        instance.save()  # post_save recalcula el resumen del día nuevo
+        if clave_de(instance) != clave_previa:
+            recalcular_resumenes({clave_previa})
+        return instance
 
 
 class ChecadaCreateSerializer(serializers.ModelSerializer):
-    """Serializer de creación (acepta ubicacion_id)."""
+    """Serializer de creación (acepta ubicacion_id). Con many=True valida/inserta en lote."""
+    empleado = PrecargadoPKField(queryset=Empleado.objects.all())
     tipo = serializers.ChoiceField(choices=TipoChecada.choices)
-    ubicacion_id = serializers.PrimaryKeyRelatedField(
+    ubicacion_id = PrecargadoPKField(
         source="ubicacion",
         queryset=Ubicacion.objects.all(),
         required=False,
@@ -44,7 +169,15 @@ class ChecadaCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Checada
-        fields = ("empleado", "tipo", "fuente", "lat", "lon", "ubicacion_id", "nota", "foto")
+        fields = (
+            "empleado", "tipo", "ts", "clave_idempotencia", "fuente",
+            "lat", "lon", "ubicacion_id", "nota", "foto",
+        )
+        list_serializer_class = ChecadaBulkListSerializer
+        validators = []
+
+    def validate_ts(self, value):
+        return validar_ts_evento(value)
 
     def validate(self, attrs):
         lat = attrs.get("lat")
@@ -54,7 +187,9 @@ class ChecadaCreateSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class JustificacionSerializer(serializers.ModelSerializer):
+class JustificacionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {"empleado": EmpleadoBreveSerializer}
+
     empleado_nombre = serializers.CharField(source="empleado.nombre_completo", read_only=True)
     # Etiqueta legible del estado sin pisar el campo real
     estado_display = serializers.CharField(source="get_estado_display", read_only=True)
@@ -72,7 +207,11 @@ class JustificacionSerializer(serializers.ModelSerializer):
 # --- Para /asistencia/resumen/ (solo salida) ---
 class ResumenAsistenciaDiaSerializer(serializers.Serializer):
     empleado = serializers.CharField(read_only=True)
+    empleado_id = serializers.IntegerField(read_only=True)
+    numero_empleado = serializers.CharField(read_only=True)
     fecha = serializers.DateField(read_only=True)
     primera_entrada = serializers.TimeField(allow_null=True, read_only=True)
     ultima_salida = serializers.TimeField(allow_null=True, read_only=True)
     checadas = serializers.IntegerField(read_only=True)
+    minutos_trabajados = serializers.IntegerField(read_only=True)
+    dentro_geocerca_ratio = serializers.DecimalField(max_digits=5, decimal_places=4, read_only=True)
@@ -0,0 +1,22 @@
+# asistencia/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from organigrama.models import Ubicacion
+from .geocercas import invalidar_geocercas
+from .models import Checada
+from .resumen import clave_de, recalcular_resumenes
+
+
+@receiver([post_save, post_delete], sender=Ubicacion, dispatch_uid="asistencia_invalidar_geocercas")
+def _ubicacion_cambio(sender, instance, **kwargs):
+    # Inmediato para este proceso y de nuevo al confirmar, para que otros no lean datos viejos
+    invalidar_geocercas(instance.pk)
+    transaction.on_commit(lambda: invalidar_geocercas(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Checada, dispatch_uid="asistencia_resumen_diario")
+def _checada_cambio(sender, instance, **kwargs):
+    # Altas/ediciones individuales; los lotes (bulk_create/bulk_update) recalculan explícitamente
+    recalcular_resumenes({clave_de(instance)})
@@ -2,12 +2,20 @@ import factory
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from empleados.models import Empleado
-from organigrama.models import Ubicacion
+from organigrama.models import Sucursal, Ubicacion
 from asistencia.models import Checada
 
 User = get_user_model()
 
 
+def _con_grupo(nombre):
+    """Post-generation para Traits: agrega el grupo indicado (lo crea si no existe)."""
+    def _add(obj, create, extracted, **kwargs):
+        if create:
+            obj.groups.add(Group.objects.get_or_create(name=nombre)[0])
+    return factory.PostGeneration(_add)
+
+
 # =======================
 # Users
 # =======================
@@ -21,12 +29,10 @@ class UserFactory(factory.django.DjangoModelFactory):
     is_staff = False
     is_superuser = False
 
-    # Password hasheado por defecto (para login JWT)
-    raw_password = "pass123"
-
+    # Password hasheado por defecto (para login JWT): UserFactory(set_password="otro")
     @factory.post_generation
     def set_password(obj, create, extracted, **kwargs):
-        pwd = extracted or getattr(obj, "raw_password", "pass123")
+        pwd = extracted or "pass123"
         obj.set_password(pwd)
         if create:
             obj.save(update_fields=["password"])
@@ -41,16 +47,16 @@ class UserFactory(factory.django.DjangoModelFactory):
 
     class Params:
         rrhh = factory.Trait(
-            groups=factory.LazyFunction(lambda: [Group.objects.get_or_create(name="RRHH")[0]])
+            groups=_con_grupo("RRHH")
         )
         admin = factory.Trait(
-            groups=factory.LazyFunction(lambda: [Group.objects.get_or_create(name="Admin")[0]])
+            groups=_con_grupo("Admin")
         )
         supervisor = factory.Trait(
-            groups=factory.LazyFunction(lambda: [Group.objects.get_or_create(name="Supervisor")[0]])
+            groups=_con_grupo("Supervisor")
         )
         gerente = factory.Trait(
-            groups=factory.LazyFunction(lambda: [Group.objects.get_or_create(name="Gerente")[0]])
+            groups=_con_grupo("Gerente")
         )
         superadmin = factory.Trait(
             is_superuser=True,
@@ -87,11 +93,20 @@ class EmpleadoFactory(factory.django.DjangoModelFactory):
 # =======================
 # Organigrama
 # =======================
+class SucursalFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Sucursal
+
+    clave = factory.Sequence(lambda n: f"SUC{n:03d}")
+    nombre = factory.Sequence(lambda n: f"Sucursal {n}")
+
+
 class UbicacionFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Ubicacion
 
     nombre = factory.Sequence(lambda n: f"Ubicación {n}")
+    sucursal = factory.SubFactory(SucursalFactory)
     lat = 20.666000
     lon = -103.350000
     radio_m = 150
@@ -10,7 +10,7 @@ from asistencia.tests.factories import (
 
 def jwt_login(client: APIClient, username: str, password: str) -> str:
     resp = client.post(
-        "/api/auth/token/",
+        "/api/v1/cuentas/auth/token/",
         {"username": username, "password": password},
         format="json",
     )
@@ -29,15 +29,15 @@ def test_schema_ok(client):
 @pytest.mark.django_db
 def test_list_checadas_requires_auth():
     c = APIClient()
-    resp = c.get("/api/v1/asistencia/checadas/")
+    resp = c.get("/api/v1/asistencia/checks/")
     # según permisos configurados, puede ser 401 (no auth) o 403 (auth sin permiso)
     assert resp.status_code in (401, 403)
 
 
 @pytest.mark.django_db
 def test_create_checada_as_rrhh():
-    # Arrange: usuario con rol RRHH
-    user = UserFactory()
+    # Arrange: usuario con rol RRHH (las escrituras de checadas son de staff: IsStaffOrReadOnly)
+    user = UserFactory(is_staff=True)
     rrhh, _ = Group.objects.get_or_create(name="RRHH")
     user.groups.add(rrhh)
     user.set_password("pass123")
@@ -60,7 +60,7 @@ def test_create_checada_as_rrhh():
 
     # Act
     resp = c.post(
-        "/api/v1/asistencia/checadas/",
+        "/api/v1/asistencia/checks/",
         data=json.dumps(payload),
         content_type="application/json",
     )
@@ -87,10 +87,29 @@ def test_normal_user_cannot_create_checada():
 
     # Act
     resp = c.post(
-        "/api/v1/asistencia/checadas/",
+        "/api/v1/asistencia/checks/",
         {"empleado": emp.id, "tipo": "IN", "fuente": "WEB"},
         format="json",
     )
 
     # Assert
     assert resp.status_code in (403, 401), resp.content
+
+
+@pytest.mark.django_db
+def test_justificaciones_solo_del_alcance():
+    from datetime import date
+
+    from asistencia.models import Justificacion
+
+    user = UserFactory()
+    propio = EmpleadoFactory(usuario=user)
+    mia = Justificacion.objects.create(empleado=propio, fecha=date(2025, 3, 3), motivo="Cita médica")
+    ajena = Justificacion.objects.create(empleado=EmpleadoFactory(), fecha=date(2025, 3, 3), motivo="Trámite")
+
+    c = APIClient()
+    c.force_authenticate(user=user)
+    r = c.get("/api/v1/asistencia/justificaciones/")
+    assert r.status_code == 200
+    assert [j["id"] for j in r.json()["results"]] == [mia.id]
+    assert c.get(f"/api/v1/asistencia/justificaciones/{ajena.id}/").status_code == 404
@@ -0,0 +1,136 @@
+import pytest
+from rest_framework.test import APIClient
+
+from asistencia.models import Checada
+from .factories import ChecadaFactory, UserFactory, EmpleadoFactory, UbicacionFactory
+
+URL = "/api/v1/asistencia/checks/bulk/"
+
+
+def _staff_client():
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    return c
+
+
+@pytest.mark.django_db
+def test_bulk_requires_staff():
+    c = APIClient()
+    c.force_authenticate(user=UserFactory())
+    emp = EmpleadoFactory()
+    resp = c.post(URL, [{"empleado": emp.id, "tipo": "IN"}], format="json")
+    assert resp.status_code == 403
+
+
+@pytest.mark.django_db
+def test_bulk_reporta_aceptadas_y_rechazadas():
+    c = _staff_client()
+    emp = EmpleadoFactory()
+    ubi = UbicacionFactory()
+    payload = [
+        {"empleado": emp.id, "tipo": "IN", "fuente": "KIOSK", "ubicacion_id": ubi.id,
+         "lat": "20.666000", "lon": "-103.350000"},
+        {"empleado": 999999, "tipo": "IN"},
+        {"empleado": emp.id, "tipo": "OUT", "lat": "20.6"},
+    ]
+
+    resp = c.post(URL, {"items": payload}, format="json")
+
+    assert resp.status_code == 201, resp.content
+    data = resp.json()
+    assert (data["total"], data["aceptadas"], data["rechazadas"]) == (3, 1, 2)
+    assert [it["estado"] for it in data["items"]] == ["ACEPTADA", "RECHAZADA", "RECHAZADA"]
+
+    ch = Checada.objects.get(pk=data["items"][0]["id"])
+    assert ch.ubicacion_id == ubi.id
+    assert ch.dentro_geocerca is True and ch.distancia_m == 0
+
+
+@pytest.mark.django_db
+def test_bulk_todo_invalido_no_inserta():
+    c = _staff_client()
+    resp = c.post(URL, [{"empleado": 999999, "tipo": "IN"}], format="json")
+    assert resp.status_code == 400
+    assert Checada.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_bulk_reintento_con_clave_idempotencia_no_duplica():
+    c = _staff_client()
+    emp = EmpleadoFactory()
+    payload = [
+        {"empleado": emp.id, "tipo": "IN", "ts": "2025-03-03T09:00:00-06:00", "clave_idempotencia": "dev1-001"},
+        {"empleado": emp.id, "tipo": "OUT", "ts": "2025-03-03T18:00:00-06:00", "clave_idempotencia": "dev1-002"},
+    ]
+
+    r1 = c.post(URL, payload, format="json")
+    r2 = c.post(URL, payload, format="json")
+
+    assert r1.status_code == r2.status_code == 201
+    assert [it["id"] for it in r1.json()["items"]] == [it["id"] for it in r2.json()["items"]]
+    assert Checada.objects.filter(empleado=emp).count() == 2
+    ch = Checada.objects.get(empleado=emp, clave_idempotencia="dev1-001")
+    assert ch.ts.isoformat().startswith("2025-03-03T15:00:00")  # hora del evento (UTC), no de carga
+
+
+@pytest.mark.django_db
+def test_create_individual_con_clave_es_upsert():
+    c = _staff_client()
+    emp = EmpleadoFactory()
+    body = {"empleado": emp.id, "tipo": "IN", "clave_idempotencia": "k-1"}
+
+    r1 = c.post("/api/v1/asistencia/checks/", body, format="json")
+    r2 = c.post("/api/v1/asistencia/checks/", {**body, "nota": "reintento"}, format="json")
+
+    assert r1.status_code == r2.status_code == 201, r2.content
+    assert r1.json()["id"] == r2.json()["id"]
+    assert Checada.objects.get(pk=r1.json()["id"]).nota == "reintento"
+
+
+@pytest.mark.django_db
+def test_bulk_rechaza_ts_futuro():
+    c = _staff_client()
+    emp = EmpleadoFactory()
+    resp = c.post(URL, [{"empleado": emp.id, "tipo": "IN", "ts": "2999-01-01T00:00:00Z"}], format="json")
+    assert resp.status_code == 400
+    assert "ts" in resp.json()["items"][0]["errores"]
+
+
+@pytest.mark.django_db
+def test_export_checadas_solo_del_alcance():
+    user = UserFactory()
+    propio = EmpleadoFactory(usuario=user)
+    ChecadaFactory(empleado=propio)
+    ChecadaFactory(empleado=EmpleadoFactory())
+
+    c = APIClient()
+    c.force_authenticate(user=user)
+    r = c.get("/api/v1/asistencia/checks/", {"export": "csv"})
+    assert r.status_code == 200
+    lineas = b"".join(r.streaming_content).decode().splitlines()
+    assert len(lineas) == 2 and lineas[1].split(",")[1] == propio.numero_empleado
+
+
+@pytest.mark.django_db
+def test_reintento_con_foto_no_escribe_archivos_huerfanos(tmp_path, settings):
+    import io
+
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    settings.MEDIA_ROOT = tmp_path
+    emp = EmpleadoFactory()
+
+    def checada():
+        buf = io.BytesIO()
+        Image.new("RGB", (64, 48), "red").save(buf, "JPEG")
+        foto = SimpleUploadedFile("selfie.jpg", buf.getvalue(), content_type="image/jpeg")
+        return Checada(empleado=emp, tipo="IN", clave_idempotencia="k-foto", foto=foto)
+
+    primera = Checada.upsert([checada()])[0]
+    archivos = sorted(p.name for p in tmp_path.rglob("*") if p.is_file())
+    assert len(archivos) == 3  # original + mini + media
+
+    reintento = Checada.upsert([checada()])[0]
+    assert sorted(p.name for p in tmp_path.rglob("*") if p.is_file()) == archivos
+    assert reintento.pk == primera.pk and reintento.foto.name == primera.foto.name
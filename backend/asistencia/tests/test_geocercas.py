@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from asistencia.geocercas import MotorGeocercas, motor_geocercas
+from asistencia.utils import haversine_m
+from .factories import UbicacionFactory
+
+
+def test_motor_elige_la_geocerca_que_contiene_al_punto():
+    # A: radio chico a ~111 m; B: radio amplio a ~222 m (contiene al punto)
+    motor = MotorGeocercas([1, 2], [20.001, 20.002], [-103.0, -103.0], [50, 300])
+    r = motor.evaluar(20.0, -103.0)
+    assert r.ubicacion_id == 2 and r.dentro is True
+    assert r.distancia_m == haversine_m(20.0, -103.0, 20.002, -103.0)
+
+
+def test_motor_lote_sin_coordenadas_y_fuera():
+    motor = MotorGeocercas([7], [20.0], [-103.0], [100])
+    ids, dist, dentro = motor.evaluar_lote([20.0, None, 21.0], [-103.0, None, -103.0])
+    assert ids.tolist() == [7, -1, -1]  # el punto lejano no comparte celda con la geocerca
+    assert dentro.tolist() == [True, False, False]
+    # El barrido lineal sí reporta la más cercana aunque esté lejos
+    ids_l, dist_l, _ = motor.evaluar_lote_lineal([21.0], [-103.0])
+    assert ids_l.tolist() == [7] and dist_l[0] > 100_000
+
+
+def test_rejilla_coincide_con_barrido_lineal_en_puntos_dentro():
+    rng = np.random.default_rng(0)
+    n = 2000
+    motor = MotorGeocercas(
+        range(1, n + 1), 19 + rng.random(n), -99 - rng.random(n), rng.integers(50, 800, n)
+    )
+    lats, lons = 19 + rng.random(5000), -99 - rng.random(5000)
+    ids_g, dist_g, dentro_g = motor.evaluar_lote(lats, lons)
+    ids_l, dist_l, dentro_l = motor.evaluar_lote_lineal(lats, lons)
+    assert (dentro_g == dentro_l).all()
+    assert (ids_g[dentro_l] == ids_l[dentro_l]).all()
+    assert (dist_g[dentro_l] == dist_l[dentro_l]).all()
+
+
+def test_motor_con_cambios_no_muta_el_original():
+    motor = MotorGeocercas([1], [20.0], [-103.0], [100], version=1)
+    nuevo = motor._copia(2)
+    nuevo._upsert(2, 20.5, -103.5, 100)
+    nuevo._quitar(1)
+    assert motor.evaluar(20.0, -103.0).ubicacion_id == 1
+    assert nuevo.evaluar(20.0, -103.0) is None
+    assert nuevo.evaluar(20.5, -103.5).ubicacion_id == 2
+
+
+def test_motor_vacio():
+    assert MotorGeocercas([], [], [], []).evaluar(20.0, -103.0) is None
+
+
+@pytest.mark.django_db
+def test_motor_se_invalida_al_guardar_ubicacion():
+    ubi = UbicacionFactory(lat=19.4326, lon=-99.1332, radio_m=200)
+    assert motor_geocercas().evaluar(19.4326, -99.1332).ubicacion_id == ubi.id
+
+    ubi.activo = False
+    ubi.save()
+    assert motor_geocercas().evaluar(19.4326, -99.1332) is None
+
+
+@pytest.mark.django_db
+def test_utils_expone_evaluacion_global():
+    from asistencia.utils import evaluar_geocerca_global, evaluar_geocercas_lote
+
+    ubi = UbicacionFactory(lat=25.6866, lon=-100.3161, radio_m=100)
+    assert evaluar_geocerca_global(25.6866, -100.3161) == (ubi.id, 0, True)
+    assert evaluar_geocercas_lote([(25.6866, -100.3161), (None, None)]) == [(ubi.id, 0, True), (None, None, False)]
@@ -10,14 +10,15 @@ def test_resumen_requires_auth():
 
 @pytest.mark.django_db
 def test_resumen_ok_jwt():
-    # Usuario normal autenticado
+    # Usuario normal autenticado, ligado a su expediente (sin staff solo ve su alcance)
     user = UserFactory()
     user.set_password("pass123")
     user.save()
+    emp = EmpleadoFactory(usuario=user)
 
     c = APIClient()
     token_resp = c.post(
-        "/api/auth/token/",
+        "/api/v1/cuentas/auth/token/",
         {"username": user.username, "password": "pass123"},
         format="json",
     )
@@ -27,7 +28,6 @@ def test_resumen_ok_jwt():
     c.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
 
     # Datos: dos checadas mismo día (IN / OUT)
-    emp = EmpleadoFactory()
     ch_in = ChecadaFactory(empleado=emp, tipo="IN")
     ch_out = ChecadaFactory(empleado=emp, tipo="OUT")
     fd = ch_in.ts.date().isoformat()
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from asistencia.models import Checada, ResumenDiario
+from .factories import UserFactory, EmpleadoFactory, ChecadaFactory
+
+URL = "/api/v1/asistencia/resumen/"
+
+
+def _ts(h, m=0):
+    return timezone.make_aware(datetime(2025, 3, 10, h, m))
+
+
+@pytest.mark.django_db
+def test_resumen_se_mantiene_con_cada_checada():
+    emp = EmpleadoFactory()
+    ChecadaFactory(empleado=emp, tipo="IN", ts=_ts(9), dentro_geocerca=True)
+    salida = ChecadaFactory(empleado=emp, tipo="OUT", ts=_ts(17, 30))
+
+    r = ResumenDiario.objects.get(empleado=emp)
+    assert r.primera_entrada.hour == 9 and r.ultima_salida.hour == 17
+    assert r.checadas == 2 and r.checadas_dentro == 1
+    assert r.minutos_trabajados == 8 * 60 + 30
+
+    salida.delete()
+    r.refresh_from_db()
+    assert r.ultima_salida is None and r.minutos_trabajados == 0
+
+    Checada.objects.filter(empleado=emp).first().delete()
+    assert not ResumenDiario.objects.filter(empleado=emp).exists()
+
+
+@pytest.mark.django_db
+def test_resumen_endpoint_lee_tabla_materializada():
+    emp = EmpleadoFactory()
+    ChecadaFactory(empleado=emp, tipo="IN", ts=_ts(8))
+    ChecadaFactory(empleado=emp, tipo="OUT", ts=_ts(16))
+
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    resp = c.get(f"{URL}?fecha_desde=2025-03-01&fecha_hasta=2025-03-31&empleado={emp.id}")
+
+    assert resp.status_code == 200, resp.content
+    data = resp.json()
+    assert len(data) == 1
+    assert data[0]["fecha"] == "2025-03-10"
+    assert data[0]["primera_entrada"] == "08:00:00"
+    assert data[0]["minutos_trabajados"] == 480
+
+
+@pytest.mark.django_db
+def test_resumen_rango_invalido():
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    assert c.get(f"{URL}?fecha_desde=2025-03-10&fecha_hasta=2025-03-01").status_code == 400
+
+
+@pytest.mark.django_db
+def test_reconstruir_resumen_repara_tabla():
+    emp = EmpleadoFactory()
+    ChecadaFactory(empleado=emp, tipo="IN", ts=_ts(9))
+    ResumenDiario.objects.all().delete()
+
+    call_command("reconstruir_resumen_asistencia", desde="2025-03-10")
+
+    assert ResumenDiario.objects.filter(empleado=emp, fecha="2025-03-10").exists()
+
+
+@pytest.mark.django_db
+def test_recalcular_solo_lee_los_pares_pedidos(django_assert_num_queries):
+    from datetime import timedelta
+
+    from asistencia.resumen import _filtro_pares, recalcular_resumenes
+
+    a, b = EmpleadoFactory(), EmpleadoFactory()
+    for emp, dias in ((a, (0, 2)), (b, (0, 1, 2))):
+        for d in dias:
+            ChecadaFactory(empleado=emp, tipo="IN", ts=_ts(9) + timedelta(days=d))
+    ResumenDiario.objects.all().delete()
+
+    dia = _ts(9).date()
+    pares = {(a.id, dia), (b.id, dia + timedelta(days=2))}
+    # Un rango por empleado, no el producto empleados × min..max
+    assert Checada.objects.filter(_filtro_pares(pares)).count() == 2
+    with django_assert_num_queries(2):  # agregado + upsert (sin pares vacíos)
+        assert recalcular_resumenes(pares) == 2
+    assert set(ResumenDiario.objects.values_list("empleado_id", "fecha")) == pares
@@ -1,7 +1,7 @@
 # backend/asistencia/utils.py
 from __future__ import annotations
 
-from typing import Optional, Tuple, Union, TYPE_CHECKING
+from typing import Iterable, List, Optional, Tuple, Union, TYPE_CHECKING
 from decimal import Decimal
 from math import radians, sin, cos, asin, sqrt
 
@@ -65,3 +65,31 @@ def evaluar_geocerca(
         radio = 0
 
     return (dist, dist <= max(radio, 0))
+
+
+def evaluar_geocerca_global(lat: Number, lon: Number) -> Tuple[Optional[int], Optional[int], bool]:
+    """
+    Calcula (ubicacion_id, distancia_m, dentro_geocerca) contra TODAS las geocercas activas,
+    usando el índice de rejilla de asistencia.geocercas (solo las geocercas de la celda del punto).
+    Sin coordenadas o sin geocercas cercanas -> (None, None, False).
+    """
+    from .geocercas import motor_geocercas  # import diferido: geocercas depende de este módulo
+
+    res = motor_geocercas().evaluar(lat, lon)
+    if res is None:
+        return (None, None, False)
+    return (res.ubicacion_id, res.distancia_m, res.dentro)
+
+
+def evaluar_geocercas_lote(
+    puntos: Iterable[Tuple[Number, Number]],
+) -> List[Tuple[Optional[int], Optional[int], bool]]:
+    """Versión por lote de evaluar_geocerca_global: [(lat, lon), ...] -> [(ubicacion_id, distancia_m, dentro), ...]."""
+    from .geocercas import motor_geocercas
+
+    puntos = list(puntos)
+    ids, dist, dentro = motor_geocercas().evaluar_lote([p[0] for p in puntos], [p[1] for p in puntos])
+    return [
+        (None, None, False) if uid < 0 else (uid, d, ok)
+        for uid, d, ok in zip(ids.tolist(), dist.tolist(), dentro.tolist())
+    ]
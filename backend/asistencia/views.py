@@ -1,4 +1,5 @@
-﻿from django.utils import timezone
+﻿from django.conf import settings
+from django.utils import timezone
 from django.utils.dateparse import parse_date
 
 from rest_framework import viewsets, permissions, status
@@ -6,13 +7,21 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.throttling import ScopedRateThrottle
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 
+from core.campos import CamposDinamicosViewMixin
+from core.exportacion import ExportacionMixin, PARAMETRO_EXPORT
+from core.pagination import KeysetPagination
 from core.views import HealthBaseView
-from .models import Checada, Justificacion
-from .serializers import ChecadaSerializer, JustificacionSerializer
+from empleados.alcance import filtrar_por_alcance
+from .geocercas import asignar_geocercas
+from .models import Checada, Justificacion, ResumenDiario
+from .serializers import (
+    ChecadaSerializer, ChecadaCreateSerializer, JustificacionSerializer, ResumenAsistenciaDiaSerializer,
+)
 
 
 # ========= Helpers =========
@@ -20,6 +29,10 @@ def _has_field(model, name: str) -> bool:
     return any(getattr(f, "name", None) == name for f in model._meta.get_fields())
 
 
+# Tope de checadas por lote en /checks/bulk/ (configurable en settings)
+BULK_MAX_CHECADAS = getattr(settings, "ASISTENCIA_BULK_MAX_CHECADAS", 1000)
+
+
 # ========= Health =========
 @extend_schema(tags=["health"])
 class HealthView(HealthBaseView):
@@ -37,7 +50,8 @@ class IsStaffOrReadOnly(permissions.BasePermission):
 # ========= Checadas =========
 @extend_schema(tags=["asistencia"])
 @extend_schema(tags=["asistencia"])
-class ChecadaViewSet(viewsets.ModelViewSet):
+@extend_schema_view(list=extend_schema(parameters=[PARAMETRO_EXPORT]))
+class ChecadaViewSet(ExportacionMixin, CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     CRUD de checadas con bÃºsqueda, filtros y ordenamiento.
     """
@@ -50,8 +64,34 @@ class ChecadaViewSet(viewsets.ModelViewSet):
         "empleado__apellido_paterno",
         "empleado__numero_empleado",
     ]
-    ordering_fields = ["fecha", "hora", "id"]
-    ordering = ["-fecha", "-id"]
+    ordering_fields = ["ts", "id"]
+    ordering = ["-ts", "-id"]
+    # ?cursor= activa la paginación por llave (sin COUNT/OFFSET); ?page= sigue disponible
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-ts", "-id")
+    export_nombre = "checadas"
+    export_columnas = (
+        ("ID", "id"),
+        ("No. empleado", "empleado__numero_empleado"),
+        ("Apellido paterno", "empleado__apellido_paterno"),
+        ("Nombre", "empleado__primer_nombre"),
+        ("Fecha y hora", "ts"),
+        ("Tipo", "tipo"),
+        ("Fuente", "fuente"),
+        ("Ubicación", "ubicacion__nombre"),
+        ("Dentro de geocerca", "dentro_geocerca"),
+        ("Distancia (m)", "distancia_m"),
+        ("Lat", "lat"),
+        ("Lon", "lon"),
+        ("Nota", "nota"),
+    )
+    # Solo aplica a acciones que declaran ScopedRateThrottle (bulk)
+    throttle_scope = "checadas_bulk"
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        # No staff: sus checadas o, con rol Supervisor/Gerente, las de su línea de reporte
+        return filtrar_por_alcance(qs, self.request.user)
 
     # âš ï¸ Definimos los filters dinÃ¡micamente como property para que DRF y Spectacular los tomen.
     @property
@@ -70,6 +110,64 @@ class ChecadaViewSet(viewsets.ModelViewSet):
                 fields["fecha_fin"] = ["exact", "gte", "lte"]
         return fields
 
+    @extend_schema(
+        request=ChecadaCreateSerializer(many=True),
+        responses={201: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        examples=[OpenApiExample("Resultado", value={
+            "total": 2, "aceptadas": 1, "rechazadas": 1,
+            "items": [
+                {"indice": 0, "estado": "ACEPTADA", "id": 101},
+                {"indice": 1, "estado": "RECHAZADA", "errores": {"empleado": ["Clave primaria inválida."]}},
+            ],
+        })],
+        description="Ingesta masiva: lista de checadas (o {\"items\": [...]}) insertadas en una sola transacción.",
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        throttle_classes=[ScopedRateThrottle],
+    )
+    def bulk(self, request):
+        """
+        Valida cada elemento con ChecadaCreateSerializer (modo lista) e inserta las válidas
+        con un solo bulk_create. Las inválidas se reportan sin abortar el lote.
+        """
+        data = request.data
+        if isinstance(data, dict):
+            data = data.get("items")
+        if not isinstance(data, list) or not data:
+            return Response(
+                {"detail": "Se esperaba una lista no vacía de checadas."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = ChecadaCreateSerializer(
+            data=data, many=True, max_length=BULK_MAX_CHECADAS, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        creadas = serializer.save(creado_por=request.user)
+
+        items = [
+            {"indice": idx, "estado": "ACEPTADA", "id": obj.pk}
+            for idx, obj in zip(serializer.indices_aceptados, creadas)
+        ]
+        items += [
+            {"indice": idx, "estado": "RECHAZADA", "errores": errores}
+            for idx, errores in serializer.rechazadas
+        ]
+        items.sort(key=lambda it: it["indice"])
+
+        return Response(
+            {
+                "total": len(data),
+                "aceptadas": len(creadas),
+                "rechazadas": len(serializer.rechazadas),
+                "items": items,
+            },
+            status=status.HTTP_201_CREATED if creadas else status.HTTP_400_BAD_REQUEST,
+        )
+
     @extend_schema(
         request=None,
         responses={200: OpenApiTypes.OBJECT},
@@ -79,17 +177,23 @@ class ChecadaViewSet(viewsets.ModelViewSet):
     def recalcular(self, request, pk=None):
         """
         AcciÃ³n administrativa para recalcular una checada (ej. reglas, redondeos, etc.).
-        Implementa aquÃ­ tu lÃ³gica real si aplica.
+        Reevalúa la geocerca contra todas las ubicaciones activas.
         """
-        _ = self.get_object()
-        # TODO: lÃ³gica real de recÃ¡lculo
-        return Response({"detail": "Recalculado"}, status=status.HTTP_200_OK)
+        checada = self.get_object()
+        asignar_geocercas([checada])
+        checada.save(update_fields=["ubicacion", "distancia_m", "dentro_geocerca", "actualizado_en"])
+        return Response({
+            "detail": "Recalculado",
+            "ubicacion": checada.ubicacion_id,
+            "distancia_m": checada.distancia_m,
+            "dentro_geocerca": checada.dentro_geocerca,
+        }, status=status.HTTP_200_OK)
 
 
 # ========= Justificaciones =========
 @extend_schema(tags=["asistencia"])
 @extend_schema(tags=["asistencia"])
-class JustificacionViewSet(viewsets.ModelViewSet):
+class JustificacionViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     Justificaciones de asistencia con flujo de resoluciÃ³n.
     """
@@ -100,6 +204,13 @@ class JustificacionViewSet(viewsets.ModelViewSet):
     search_fields = ["empleado__primer_nombre", "empleado__apellido_paterno", "motivo"]
     ordering_fields = ["fecha", "creado_en", "id"]
     ordering = ["-fecha", "-id"]
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-fecha", "-id")
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        # No staff: sus justificaciones o, con rol Supervisor/Gerente, las de su línea de reporte
+        return filtrar_por_alcance(qs, self.request.user)
 
     @property
     def filterset_fields(self):
@@ -143,52 +254,70 @@ class JustificacionViewSet(viewsets.ModelViewSet):
 
 
 # ========= Resumen por dÃ­a =========
+# Tope de rango para /resumen/ (la tabla materializada permite rangos largos)
+RESUMEN_MAX_DIAS = 366
+
+
 @extend_schema(
     tags=["asistencia"],
     parameters=[
-        OpenApiParameter("fecha", str, description="YYYY-MM-DD (requerido)"),
+        OpenApiParameter("fecha_desde", str, description="YYYY-MM-DD (requerido, salvo que se use 'fecha')"),
+        OpenApiParameter("fecha_hasta", str, description="YYYY-MM-DD (default: fecha_desde)"),
+        OpenApiParameter("fecha", str, description="YYYY-MM-DD (compat: un solo día)"),
         OpenApiParameter("empleado", int, description="ID empleado (opcional)"),
     ],
-    examples=[OpenApiExample("Ejemplo", value={"fecha": "2025-01-31", "items": []})],
-    responses={200: OpenApiTypes.OBJECT},  # documenta la respuesta y evita el warning
+    responses={200: ResumenAsistenciaDiaSerializer(many=True)},
+    description="Primera entrada / Ãºltima salida por empleado y dÃ­a, leÃ­do de la tabla ResumenDiario.",
 )
-@extend_schema(tags=["asistencia"])
 class ResumenAsistenciaView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        s_fecha = request.query_params.get("fecha")
-        if not s_fecha:
-            return Response({"detail": "fecha es requerida (YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST)
-        d = parse_date(s_fecha)
-        if not d:
+        params = request.query_params
+        s_desde = params.get("fecha_desde") or params.get("fecha")
+        s_hasta = params.get("fecha_hasta") or s_desde
+        if not s_desde:
+            return Response(
+                {"detail": "fecha_desde es requerida (YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        d1, d2 = parse_date(s_desde), parse_date(s_hasta)
+        if not d1 or not d2 or d2 < d1:
             return Response({"detail": "Formato de fecha invÃ¡lido."}, status=status.HTTP_400_BAD_REQUEST)
+        if (d2 - d1).days >= RESUMEN_MAX_DIAS:
+            return Response(
+                {"detail": f"Rango demasiado amplio. MÃ¡ximo {RESUMEN_MAX_DIAS} dÃ­as."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        emp_id = request.query_params.get("empleado")
-        qs = Checada.objects.select_related("empleado").filter(fecha=d)
+        qs = ResumenDiario.objects.filter(fecha__gte=d1, fecha__lte=d2)
 
-        u = request.user
-        if not u.is_staff:
-            if hasattr(u, "empleado"):
-                qs = qs.filter(empleado=u.empleado)
-            else:
-                qs = qs.none()
+        qs = filtrar_por_alcance(qs, request.user)
 
+        emp_id = params.get("empleado")
         if emp_id:
             qs = qs.filter(empleado_id=emp_id)
 
+        filas = qs.order_by("fecha", "empleado_id").values(
+            "empleado_id", "fecha", "primera_entrada", "ultima_salida",
+            "checadas", "minutos_trabajados", "dentro_geocerca_ratio",
+            "empleado__numero_empleado", "empleado__primer_nombre", "empleado__segundo_nombre",
+            "empleado__apellido_paterno", "empleado__apellido_materno",
+        )
+
         data = []
-        for c in qs:
+        for f in filas:
+            numero = f.pop("empleado__numero_empleado")
+            nombre = " ".join(filter(None, (
+                f.pop("empleado__primer_nombre"), f.pop("empleado__segundo_nombre"),
+                f.pop("empleado__apellido_paterno"), f.pop("empleado__apellido_materno"),
+            )))
             data.append({
-                "empleado": {
-                    "id": c.empleado_id,
-                    "numero_empleado": getattr(c.empleado, "numero_empleado", None),
-                    "nombre": getattr(c.empleado, "nombre_completo", None),
-                },
-                "fecha": f"{c.fecha:%Y-%m-%d}",
-                "tipo": getattr(c, "tipo", None),
-                "fuente": getattr(c, "fuente", None),
-                "hora": getattr(c, "hora", None),
+                **f,
+                "empleado": f"{numero} - {nombre}",
+                "numero_empleado": numero,
+                "fecha": f"{f['fecha']:%Y-%m-%d}",
+                "primera_entrada": f"{f['primera_entrada']:%H:%M:%S}" if f["primera_entrada"] else None,
+                "ultima_salida": f"{f['ultima_salida']:%H:%M:%S}" if f["ultima_salida"] else None,
+                "dentro_geocerca_ratio": str(f["dentro_geocerca_ratio"]),
             })
-        return Response({"fecha": f"{d:%Y-%m-%d}", "items": data})
-
+        return Response(data)
@@ -149,7 +149,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # Usuario armado desde los claims del token, sin leer auth_user (ver cuentas.autenticacion)
+        "cuentas.autenticacion.JWTClaimsAuthentication",
     ),
     # por seguridad, todas las vistas requieren auth salvo que la vista declare algo distinto
     "DEFAULT_PERMISSION_CLASSES": (
@@ -170,9 +171,47 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {
         "user": "2000/hour",
         "anon": "100/hour",
+        # Ingesta masiva de checadas (kioscos): cada lote cuenta como una sola petición
+        "checadas_bulk": env("THROTTLE_CHECADAS_BULK", default="600/hour"),
     },
 }
 
+# =========================
+# Cache
+# =========================
+# Debe ser compartido entre workers (Redis/memcached): ahí viven los contadores de
+# core.versiones que invalidan roles, alcance por supervisor, calendario, geocercas...
+# Con LocMem (el default) cada proceso tiene los suyos y un cambio no llega a los demás;
+# fuera de DEBUG el check core.E001 lo impide. Ej.: CACHE_URL=redis://127.0.0.1:6379/1
+CACHES = {"default": env.cache_url("CACHE_URL", default="locmemcache://")}
+
+# Vigencia (s) de los roles (grupos) cacheados por usuario (core.permissions.roles_usuario)
+CORE_ROLES_TTL = env.int("CORE_ROLES_TTL", default=3600)
+
+# =========================
+# Asistencia
+# =========================
+ASISTENCIA_BULK_MAX_CHECADAS = env.int("ASISTENCIA_BULK_MAX_CHECADAS", default=1000)
+# Lado de celda (grados) del índice de rejilla de geocercas (~1.1 km)
+ASISTENCIA_GEOCERCA_CELDA_GRADOS = env.float("ASISTENCIA_GEOCERCA_CELDA_GRADOS", default=0.01)
+
+# =========================
+# Empleados
+# =========================
+# "completo": instantánea completa por edición; "delta": solo campos cambiados (EmpleadoCambio)
+EMPLEADOS_HISTORIAL_MODO = env("EMPLEADOS_HISTORIAL_MODO", default="completo")
+# Antigüedad (días) a partir de la cual podar_historial_empleados elimina/archiva
+EMPLEADOS_HISTORIAL_RETENCION_DIAS = env.int("EMPLEADOS_HISTORIAL_RETENCION_DIAS", default=730)
+# Vigencia (s) del conjunto de empleados visibles por supervisor (empleados.alcance)
+EMPLEADOS_ALCANCE_TTL = env.int("EMPLEADOS_ALCANCE_TTL", default=3600)
+
+# =========================
+# Calendario de ausencias
+# =========================
+# Alias de CACHES donde se guardan las teselas mensuales por unidad (sucursal/área/departamento)
+CALENDARIO_CACHE_ALIAS = env("CALENDARIO_CACHE_ALIAS", default="default")
+CALENDARIO_TESELA_TTL = env.int("CALENDARIO_TESELA_TTL", default=7 * 24 * 3600)
+
 # =========================
 # OpenAPI / Swagger (drf-spectacular)
 # =========================
@@ -224,6 +263,9 @@ SPECTACULAR_SETTINGS = {
 # =========================
 # JWT
 # =========================
+# El access token lleva claims del usuario (cuentas.autenticacion). Un cambio del empleado
+# ligado se ve en el siguiente refresh (<= ACCESS_TOKEN_LIFETIME); desactivar, borrar o
+# cambiar is_staff/is_superuser revoca los claims al instante (requiere el cache compartido).
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=env.int("ACCESS_TOKEN_LIFETIME_MIN", 60)),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=env.int("REFRESH_TOKEN_LIFETIME_DAYS", 7)),
@@ -0,0 +1,261 @@
+# backend/calendario/motor.py
+"""
+Motor de intervalos para el calendario de ausencias.
+
+Cada empleado tiene una lista ordenada de tramos [inicio, fin] sin traslapes,
+ya recortados al rango pedido. Las solicitudes se "pintan" sobre esa lista (un
+permiso encima de vacaciones gana, igual que antes), así que el costo depende
+del número de solicitudes y no de empleados × días. Las celdas por día solo se
+generan al final, y el modo compacto no las genera: devuelve los tramos tal cual
+(inicio + longitud), que es una codificación run-length del renglón.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db.models import Count, Max
+
+from core.enums import EstadoSolicitud, TipoAusencia
+from core.versiones import version_actual
+from core.workdays_sources import catalogo_feriados
+from permisos.models import Permiso
+from vacaciones.models import SolicitudVacaciones
+
+UN_DIA = timedelta(days=1)
+
+# Versión (core.versiones) de los nombres de TipoPermiso, que el calendario muestra como subtipo
+VERSION_TIPOS_PERMISO = "calendario:tipos_permiso"
+# Versión que incrementa cualquier alta, cambio o baja de vacaciones/permisos (calendario.signals):
+# la firma no depende de que cada save() actualice actualizado_en
+VERSION_SOLICITUDES = "calendario:solicitudes"
+
+# Campos del empleado que muestra el calendario (lectura con .values(), sin instanciar modelos)
+CAMPOS_EMPLEADO = (
+    "id", "numero_empleado", "primer_nombre", "segundo_nombre", "apellido_paterno", "apellido_materno",
+    "sucursal__nombre", "area__nombre", "departamento__nombre", "puesto__nombre",
+)
+
+
+@dataclass(frozen=True)
+class Tramo:
+    inicio: date
+    fin: date
+    tipo_ausencia: str
+    subtipo: str
+    estado_solicitud: str
+    id_solicitud: int
+
+    @property
+    def dias(self) -> int:
+        return (self.fin - self.inicio).days + 1
+
+    def ausencia(self) -> Dict:
+        return {
+            "tipo_ausencia": self.tipo_ausencia,
+            "subtipo": self.subtipo,
+            "estado_solicitud": self.estado_solicitud,
+            "id_solicitud": self.id_solicitud,
+        }
+
+
+def estados_desde_params(params) -> List[str]:
+    """Estados de solicitud a incluir según ?estado= o los flags incluir_*."""
+    estado = params.get("estado")
+    if estado:
+        return [estado]
+    estados = []
+    if params.get("incluir_pendientes", "true").lower() != "false":
+        estados.append(EstadoSolicitud.PEND)
+    estados.append(EstadoSolicitud.APROB)
+    if params.get("incluir_rechazadas", "false").lower() == "true":
+        estados.append(EstadoSolicitud.RECH)
+    if params.get("incluir_canceladas", "false").lower() == "true":
+        estados.append(EstadoSolicitud.CANC)
+    return [str(e) for e in estados]
+
+
+def pintar(tramos: List[Tramo], nuevo: Tramo) -> List[Tramo]:
+    """Sobrepone `nuevo` a una lista ordenada y sin traslapes; recorta lo que tape."""
+    res = []
+    for t in tramos:
+        if t.fin < nuevo.inicio or t.inicio > nuevo.fin:
+            res.append(t)
+            continue
+        if t.inicio < nuevo.inicio:
+            res.append(replace(t, fin=nuevo.inicio - UN_DIA))
+        if t.fin > nuevo.fin:
+            res.append(replace(t, inicio=nuevo.fin + UN_DIA))
+    res.append(nuevo)
+    res.sort(key=lambda t: t.inicio)
+    return res
+
+
+def _filtro_solicitudes(empleados, d1: date, d2: date, estados: Iterable[str]) -> Dict:
+    if hasattr(empleados, "values"):
+        empleados = empleados.values("id")
+    return dict(empleado_id__in=empleados, estado__in=list(estados), fecha_inicio__lte=d2, fecha_fin__gte=d1)
+
+
+def _consultas(empleados, d1: date, d2: date, estados: Iterable[str]):
+    """Vacaciones y permisos traslapados con [d1, d2], ordenados por empleado y fecha."""
+    filtro = _filtro_solicitudes(empleados, d1, d2, estados)
+    orden = ("empleado_id", "fecha_inicio", "id")
+    vacaciones = (
+        SolicitudVacaciones.objects.filter(**filtro).order_by(*orden)
+        .values_list("id", "empleado_id", "fecha_inicio", "fecha_fin", "estado")
+    )
+    permisos = (
+        Permiso.objects.filter(**filtro).order_by(*orden)
+        .values_list("id", "empleado_id", "fecha_inicio", "fecha_fin", "estado", "tipo__nombre")
+    )
+    return vacaciones, permisos
+
+
+def _firma_agregada(qs) -> Tuple[str, Optional[datetime]]:
+    agg = qs.order_by().aggregate(n=Count("id"), ultimo=Max("actualizado_en"))
+    return f"{agg['n']}@{agg['ultimo'].isoformat() if agg['ultimo'] else '-'}", agg["ultimo"]
+
+
+def firma_catalogos() -> str:
+    """Versiones de los catálogos que se pintan en el calendario (feriados y nombres de tipo de permiso)."""
+    return f"feriados:{catalogo_feriados().version}|tipos:{version_actual(VERSION_TIPOS_PERMISO)}"
+
+
+def version_datos(empleados_qs, d1: date, d2: date, estados: Iterable[str]) -> Tuple[str, Optional[datetime]]:
+    """
+    Firma barata de los datos que alimentan el calendario: (conteo, máx. actualizado_en) de
+    empleados, vacaciones y permisos que coinciden, más la versión de solicitudes y las de
+    catálogos. Tres agregados indexados en lugar de construir la rejilla; el conteo detecta
+    bajas. Devuelve (firma, última modificación).
+    """
+    filtro = _filtro_solicitudes(empleados_qs, d1, d2, estados)
+    partes, ultimos = [], []
+    for qs in (
+        empleados_qs,
+        SolicitudVacaciones.objects.filter(**filtro),
+        Permiso.objects.filter(**filtro),
+    ):
+        parte, ultimo = _firma_agregada(qs)
+        partes.append(parte)
+        if ultimo:
+            ultimos.append(ultimo)
+    partes.append(f"solicitudes:{version_actual(VERSION_SOLICITUDES)}")
+    partes.append(firma_catalogos())
+    return "|".join(partes), max(ultimos, default=None)
+
+
+def firma_empleados(empleados_qs) -> str:
+    """Solo la parte de empleados de version_datos (las ausencias las versionan las teselas)."""
+    return _firma_agregada(empleados_qs)[0]
+
+
+def _tramo_vacaciones(fila, d1: date, d2: date) -> Tramo:
+    sid, _, fi, ff, estado = fila
+    return Tramo(max(d1, fi), min(d2, ff), TipoAusencia.VAC.value, "Vacaciones", estado, sid)
+
+
+def _tramo_permiso(fila, d1: date, d2: date) -> Tramo:
+    pid, _, fi, ff, estado, tipo = fila
+    return Tramo(max(d1, fi), min(d2, ff), TipoAusencia.PERM.value, tipo or "Permiso", estado, pid)
+
+
+def ausencias_por_empleado(empleados, d1: date, d2: date, estados: Iterable[str]) -> Dict[int, List[Tramo]]:
+    """
+    Tramos de ausencia por empleado dentro de [d1, d2].
+    `empleados` puede ser una lista de IDs o un queryset de Empleado (se usa como subquery).
+    """
+    vacaciones, permisos = _consultas(empleados, d1, d2, estados)
+    por_empleado: Dict[int, List[Tramo]] = {}
+    # Primero vacaciones y luego permisos: el permiso tiene prioridad donde se traslapan
+    for fila in vacaciones:
+        por_empleado[fila[1]] = pintar(por_empleado.get(fila[1], []), _tramo_vacaciones(fila, d1, d2))
+    for fila in permisos:
+        por_empleado[fila[1]] = pintar(por_empleado.get(fila[1], []), _tramo_permiso(fila, d1, d2))
+    return por_empleado
+
+
+class _Grupos:
+    """Cursor sobre un iterador ordenado por empleado_id que entrega las filas de un empleado."""
+
+    def __init__(self, filas):
+        self._grupos = groupby(filas, key=itemgetter(1))
+        self._actual = next(self._grupos, None)
+
+    def tomar(self, empleado_id: int):
+        # Salta empleados menores (no deberían existir: el filtro usa el mismo queryset)
+        while self._actual is not None and self._actual[0] < empleado_id:
+            self._actual = next(self._grupos, None)
+        if self._actual is None or self._actual[0] != empleado_id:
+            return ()
+        filas = list(self._actual[1])
+        self._actual = next(self._grupos, None)
+        return filas
+
+
+def recorrer_calendario(empleados_qs, d1: date, d2: date, estados: Iterable[str],
+                        chunk_size: int = 2000) -> Iterator[Tuple[Dict, List[Tramo]]]:
+    """
+    Genera (fila_empleado, tramos) en orden de empleado_id con memoria constante:
+    tres cursores (empleados, vacaciones, permisos) ordenados por empleado y unidos
+    en un merge, sin cargar el resultado completo.
+    """
+    vacaciones, permisos = _consultas(empleados_qs, d1, d2, estados)
+    vac = _Grupos(vacaciones.iterator(chunk_size=chunk_size))
+    per = _Grupos(permisos.iterator(chunk_size=chunk_size))
+    for emp in empleados_qs.order_by("id").values(*CAMPOS_EMPLEADO).iterator(chunk_size=chunk_size):
+        tramos: List[Tramo] = []
+        for fila in vac.tomar(emp["id"]):
+            tramos = pintar(tramos, _tramo_vacaciones(fila, d1, d2))
+        for fila in per.tomar(emp["id"]):
+            tramos = pintar(tramos, _tramo_permiso(fila, d1, d2))
+        yield emp, tramos
+
+
+def info_empleado(fila: Dict) -> Dict:
+    """Bloque 'empleado' de la respuesta a partir de una fila .values(*CAMPOS_EMPLEADO)."""
+    nombre = " ".join(filter(None, (
+        fila["primer_nombre"], fila["segundo_nombre"], fila["apellido_paterno"], fila["apellido_materno"],
+    )))
+    return {
+        "id": fila["id"],
+        "numero_empleado": fila["numero_empleado"],
+        "nombre": nombre,
+        "sucursal": fila["sucursal__nombre"],
+        "area": fila["area__nombre"],
+        "departamento": fila["departamento__nombre"],
+        "puesto": fila["puesto__nombre"],
+    }
+
+
+def celdas(tramos: List[Tramo], d1: date, d2: date, fechas: Optional[List[str]] = None) -> List[Dict]:
+    """Vector de días del renglón (una celda por fecha, ausencia=None si no hay)."""
+    fechas = fechas or [f"{d1 + timedelta(days=i):%Y-%m-%d}" for i in range((d2 - d1).days + 1)]
+    ausencias: List[Optional[Dict]] = [None] * len(fechas)
+    for t in tramos:
+        info = t.ausencia()
+        for i in range((t.inicio - d1).days, (t.fin - d1).days + 1):
+            ausencias[i] = info
+    return [{"fecha": f, "ausencia": a} for f, a in zip(fechas, ausencias)]
+
+
+def compactos(tramos: List[Tramo]) -> List[Dict]:
+    """Tramos run-length: fecha de inicio + número de días, sin celdas vacías."""
+    return [{"desde": f"{t.inicio:%Y-%m-%d}", "dias": t.dias, **t.ausencia()} for t in tramos]
+
+
+def codigo_dia(tramo: Optional[Tramo]) -> str:
+    """Celda de la exportación CSV: 'TIPO:ESTADO' o vacío."""
+    return f"{tramo.tipo_ausencia}:{tramo.estado_solicitud}" if tramo else ""
+
+
+def codigos_por_dia(tramos: List[Tramo], d1: date, d2: date) -> List[str]:
+    codigos = [""] * ((d2 - d1).days + 1)
+    for t in tramos:
+        codigo = codigo_dia(t)
+        for i in range((t.inicio - d1).days, (t.fin - d1).days + 1):
+            codigos[i] = codigo
+    return codigos
@@ -60,3 +60,32 @@ class CalendarioResponseSerializer(serializers.Serializer):
 
     class Meta:
         ref_name = "CalendarioResponse"
+
+
+class CalendarioTramoSerializer(AusenciaSerializer):
+    """Tramo continuo de ausencia (modo compacto): fecha de inicio + número de días."""
+    desde = serializers.DateField(read_only=True)
+    dias = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        ref_name = "CalendarioTramo"
+
+
+class CalendarioEmpleadoCompactoSerializer(serializers.Serializer):
+    """Fila compacta: un empleado y solo sus tramos de ausencia."""
+    empleado = CalendarioEmpleadoInfoSerializer(read_only=True)
+    ausencias = CalendarioTramoSerializer(many=True, read_only=True)
+
+    class Meta:
+        ref_name = "CalendarioEmpleadoCompacto"
+
+
+class CalendarioCompactoResponseSerializer(serializers.Serializer):
+    """Respuesta del calendario con ?modo=compacto."""
+    desde = serializers.DateField(read_only=True)
+    hasta = serializers.DateField(read_only=True)
+    estados_solicitud_incluidos = serializers.ListField(child=serializers.CharField(), read_only=True)
+    items = CalendarioEmpleadoCompactoSerializer(many=True, read_only=True)
+
+    class Meta:
+        ref_name = "CalendarioCompactoResponse"
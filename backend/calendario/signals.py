@@ -0,0 +1,75 @@
+# calendario/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from empleados.models import Empleado
+from empleados.signals import empleados_importados
+from permisos.models import Permiso, TipoPermiso
+from vacaciones.models import SolicitudVacaciones
+from .teselas import UNIDADES, invalidar_meses, invalidar_solicitudes, invalidar_tipos_permiso, invalidar_unidades
+
+CAMPOS_SOLICITUD = ("empleado_id", "fecha_inicio", "fecha_fin")
+CAMPOS_UNIDAD = tuple(f"{t}_id" for t in UNIDADES)
+
+
+def _previo(sender, instance, campos):
+    if not instance.pk:
+        return None
+    return sender.objects.filter(pk=instance.pk).values_list(*campos).first()
+
+
+@receiver(pre_save, sender=SolicitudVacaciones, dispatch_uid="calendario_previo_vacaciones")
+@receiver(pre_save, sender=Permiso, dispatch_uid="calendario_previo_permiso")
+def _solicitud_previa(sender, instance, **kwargs):
+    # Fechas/empleado anteriores: si se mueve la solicitud, también cambian las teselas de origen
+    instance._calendario_previo = _previo(sender, instance, CAMPOS_SOLICITUD)
+
+
+@receiver([post_save, post_delete], sender=SolicitudVacaciones, dispatch_uid="calendario_teselas_vacaciones")
+@receiver([post_save, post_delete], sender=Permiso, dispatch_uid="calendario_teselas_permiso")
+def _solicitud_cambio(sender, instance, **kwargs):
+    por_empleado = {instance.empleado_id: [(instance.fecha_inicio, instance.fecha_fin)]}
+    previo = getattr(instance, "_calendario_previo", None)
+    if previo:
+        emp_id, fi, ff = previo
+        por_empleado.setdefault(emp_id, []).append((fi, ff))
+    for emp_id, rangos in por_empleado.items():
+        invalidar_meses(emp_id, rangos)
+    invalidar_solicitudes()
+
+
+@receiver([post_save, post_delete], sender=TipoPermiso, dispatch_uid="calendario_teselas_tipo_permiso")
+def _tipo_permiso_cambio(sender, instance, created=False, **kwargs):
+    if not created:  # un tipo nuevo aún no tiene permisos; renombrarlo sí cambia el subtipo mostrado
+        invalidar_tipos_permiso()
+
+
+@receiver(pre_save, sender=Empleado, dispatch_uid="calendario_previo_empleado")
+def _empleado_previo(sender, instance, **kwargs):
+    instance._calendario_unidades = _previo(sender, instance, CAMPOS_UNIDAD)
+
+
+@receiver(post_save, sender=Empleado, dispatch_uid="calendario_teselas_empleado")
+def _empleado_cambio(sender, instance, created, **kwargs):
+    actuales = tuple(getattr(instance, c) for c in CAMPOS_UNIDAD)
+    previas = getattr(instance, "_calendario_unidades", None)
+    if not created and previas == actuales:
+        return
+    cambios = [(t, u) for t, u in zip(UNIDADES, actuales)]
+    if previas:
+        cambios += [(t, u) for t, u in zip(UNIDADES, previas)]
+    invalidar_unidades(cambios)
+
+
+@receiver(empleados_importados, dispatch_uid="calendario_teselas_importacion")
+def _empleados_importados(sender, actualizados, previos, **kwargs):
+    # Las altas no tienen ausencias; solo importan los cambios de unidad
+    cambios = set()
+    for emp in actualizados:
+        previas = tuple(previos.get(emp.pk, {}).get(c, getattr(emp, c)) for c in CAMPOS_UNIDAD)
+        actuales = tuple(getattr(emp, c) for c in CAMPOS_UNIDAD)
+        if previas != actuales:
+            cambios.update(zip(UNIDADES, actuales))
+            cambios.update(zip(UNIDADES, previas))
+    if cambios:
+        invalidar_unidades(cambios)
@@ -0,0 +1,169 @@
+# backend/calendario/teselas.py
+"""
+Teselas mensuales del calendario de ausencias por unidad organizacional.
+
+Una tesela guarda, para una (unidad, mes, estados), los tramos de ausencia de
+todos los empleados de la unidad en forma compacta:
+    {empleado_id: [(dia_inicio, dias, tipo, subtipo, estado, id_solicitud), ...]}
+y vive en el cache configurado en CALENDARIO_CACHE_ALIAS. La vista "cose" las
+teselas de los meses pedidos en lugar de consultar solicitudes.
+
+Invalidación precisa por versión (core.versiones): cada (unidad, mes) tiene su
+contador, que se incrementa cuando una solicitud de vacaciones o permiso de un
+empleado de esa unidad que toca ese mes se guarda o se borra; cada unidad tiene
+además una "generación" que cambia cuando un empleado entra o sale de ella.
+La clave de la tesela incluye ambas versiones (y la de los nombres de tipo de
+permiso, motor.VERSION_TIPOS_PERMISO), así que las viejas simplemente dejan de
+leerse y expiran por TTL. Las mismas versiones forman el ETag de la vista
+(firma_teselas): revalidar no consulta solicitudes ni permisos.
+"""
+from __future__ import annotations
+
+import calendar
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from core.versiones import incrementar_version, versiones_actuales
+from empleados.models import Empleado
+
+from .motor import VERSION_SOLICITUDES, VERSION_TIPOS_PERMISO, Tramo, ausencias_por_empleado
+
+# De la más específica a la más general: se usa la primera que venga en los filtros
+UNIDADES = ("departamento", "area", "sucursal")
+
+Mes = Tuple[int, int]
+
+
+def _cache():
+    return caches[getattr(settings, "CALENDARIO_CACHE_ALIAS", "default")]
+
+
+def unidad_de_params(params) -> Optional[Tuple[str, int]]:
+    for tipo in UNIDADES:
+        v = params.get(tipo)
+        if v and str(v).isdigit():
+            return tipo, int(v)
+    return None
+
+
+def meses_en(d1: date, d2: date) -> List[Mes]:
+    meses, (a, m) = [], (d1.year, d1.month)
+    while (a, m) <= (d2.year, d2.month):
+        meses.append((a, m))
+        a, m = (a + 1, 1) if m == 12 else (a, m + 1)
+    return meses
+
+
+def _version_mes(tipo: str, uid: int, mes: Mes) -> str:
+    return f"cal:{tipo}:{uid}:{mes[0]:04d}{mes[1]:02d}"
+
+
+def _generacion(tipo: str, uid: int) -> str:
+    return f"cal:{tipo}:{uid}"
+
+
+def _construir(tipo: str, uid: int, mes: Mes, estados: List[str]) -> Dict[int, List[tuple]]:
+    inicio = date(mes[0], mes[1], 1)
+    fin = date(mes[0], mes[1], calendar.monthrange(*mes)[1])
+    empleados = Empleado.objects.filter(**{f"{tipo}_id": uid})
+    return {
+        emp_id: [(t.inicio.day, t.dias, t.tipo_ausencia, t.subtipo, t.estado_solicitud, t.id_solicitud)
+                 for t in tramos]
+        for emp_id, tramos in ausencias_por_empleado(empleados, inicio, fin, estados).items()
+    }
+
+
+def ausencias_por_teselas(tipo: str, uid: int, d1: date, d2: date,
+                          estados: Iterable[str]) -> Dict[int, List[Tramo]]:
+    """Mismo resultado que motor.ausencias_por_empleado() para la unidad, pero desde teselas."""
+    estados = sorted(estados)
+    meses = meses_en(d1, d2)
+    gen = _generacion(tipo, uid)
+    versiones = versiones_actuales([gen, VERSION_TIPOS_PERMISO] + [_version_mes(tipo, uid, m) for m in meses])
+    claves = {
+        m: f"gv:cal:tesela:{tipo}:{uid}:{m[0]:04d}{m[1]:02d}:{','.join(estados)}"
+           f":g{versiones[gen]}:t{versiones[VERSION_TIPOS_PERMISO]}:v{versiones[_version_mes(tipo, uid, m)]}"
+        for m in meses
+    }
+    cache = _cache()
+    encontradas = cache.get_many(list(claves.values()))
+
+    nuevas = {}
+    por_empleado: Dict[int, List[Tramo]] = {}
+    for mes in meses:
+        tesela = encontradas.get(claves[mes])
+        if tesela is None:
+            tesela = nuevas[claves[mes]] = _construir(tipo, uid, mes, estados)
+        for emp_id, tramos in tesela.items():
+            lista = por_empleado.setdefault(emp_id, [])
+            for dia, dias, tipo_aus, subtipo, estado, sid in tramos:
+                inicio = max(d1, date(mes[0], mes[1], dia))
+                fin = min(d2, date(mes[0], mes[1], dia) + timedelta(days=dias - 1))
+                if fin < inicio:
+                    continue
+                ultimo = lista[-1] if lista else None
+                # Une la continuación de una misma solicitud que cruza de mes
+                if (ultimo and ultimo.id_solicitud == sid and ultimo.tipo_ausencia == tipo_aus
+                        and ultimo.fin + timedelta(days=1) == inicio):
+                    lista[-1] = Tramo(ultimo.inicio, fin, tipo_aus, subtipo, estado, sid)
+                else:
+                    lista.append(Tramo(inicio, fin, tipo_aus, subtipo, estado, sid))
+
+    if nuevas:
+        cache.set_many(nuevas, timeout=getattr(settings, "CALENDARIO_TESELA_TTL", 7 * 24 * 3600))
+    return {k: v for k, v in por_empleado.items() if v}
+
+
+def firma_teselas(tipo: str, uid: int, d1: date, d2: date) -> str:
+    """Versiones de las teselas que cubren [d1, d2]: cambian con cualquier ausencia de la unidad."""
+    nombres = [_generacion(tipo, uid)] + [_version_mes(tipo, uid, m) for m in meses_en(d1, d2)]
+    versiones = versiones_actuales(nombres)
+    return f"{tipo}:{uid}:" + ",".join(str(versiones[n]) for n in nombres)
+
+
+def _publicar(nombres: Iterable[str]) -> None:
+    # Inmediato para este proceso y de nuevo al confirmar, para que otros no guarden teselas viejas
+    nombres = set(nombres)
+
+    def _incrementar():
+        for n in nombres:
+            incrementar_version(n)
+
+    _incrementar()
+    transaction.on_commit(_incrementar)
+
+
+def invalidar_meses(empleado_id: int, rangos: Iterable[Tuple[date, date]]) -> None:
+    """Invalida las teselas de las unidades del empleado en los meses que tocan los rangos."""
+    unidades = (
+        Empleado.objects.filter(pk=empleado_id)
+        .values_list(*(f"{t}_id" for t in UNIDADES))
+        .first()
+    )
+    if not unidades:
+        return
+    meses = {m for d1, d2 in rangos for m in meses_en(d1, d2)}
+    _publicar(
+        _version_mes(tipo, uid, m)
+        for tipo, uid in zip(UNIDADES, unidades) if uid
+        for m in meses
+    )
+
+
+def invalidar_unidades(unidades: Iterable[Tuple[str, Optional[int]]]) -> None:
+    """Invalida todas las teselas de las unidades (un empleado entró o salió)."""
+    _publicar(_generacion(tipo, uid) for tipo, uid in unidades if uid)
+
+
+def invalidar_tipos_permiso() -> None:
+    """Invalida todas las teselas (y ETags): cambió el nombre de un tipo de permiso."""
+    _publicar([VERSION_TIPOS_PERMISO])
+
+
+def invalidar_solicitudes() -> None:
+    """Invalida la firma del calendario sin filtro de unidad (motor.version_datos)."""
+    _publicar([VERSION_SOLICITUDES])
@@ -1,3 +1,226 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import date
 
-# Create your tests here.
+import pytest
+from rest_framework.test import APIClient
+
+from asistencia.tests.factories import UserFactory, EmpleadoFactory, SucursalFactory
+from calendario.motor import Tramo, pintar
+from empleados.models import Empleado
+from permisos.models import Permiso, TipoPermiso
+from vacaciones.models import SolicitudVacaciones
+
+URL = "/api/v1/calendario/ausencias/"
+
+
+def _staff_client():
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    return c
+
+
+@pytest.fixture
+def ausencias():
+    emp = EmpleadoFactory()
+    otro = EmpleadoFactory()
+    vac = SolicitudVacaciones.objects.create(
+        empleado=emp, fecha_inicio=date(2025, 3, 3), fecha_fin=date(2025, 3, 7), dias_habiles=5, estado="APROB"
+    )
+    tipo = TipoPermiso.objects.create(nombre="Médico")
+    per = Permiso.objects.create(
+        empleado=emp, tipo=tipo, fecha_inicio=date(2025, 3, 5), fecha_fin=date(2025, 3, 5), estado="PEND"
+    )
+    SolicitudVacaciones.objects.create(
+        empleado=otro, fecha_inicio=date(2025, 3, 1), fecha_fin=date(2025, 3, 2), dias_habiles=0, estado="RECH"
+    )
+    return emp, otro, vac, per
+
+
+def test_pintar_recorta_lo_que_tapa():
+    base = [Tramo(date(2025, 1, 1), date(2025, 1, 10), "VAC", "Vacaciones", "APROB", 1)]
+    res = pintar(base, Tramo(date(2025, 1, 4), date(2025, 1, 5), "PERM", "X", "APROB", 2))
+    assert [(t.inicio.day, t.fin.day, t.id_solicitud) for t in res] == [(1, 3, 1), (4, 5, 2), (6, 10, 1)]
+
+
+@pytest.mark.django_db
+def test_calendario_por_dia_con_prioridad_de_permiso(ausencias):
+    emp, otro, vac, per = ausencias
+    resp = _staff_client().get(URL, {"desde": "2025-03-01", "hasta": "2025-03-10"})
+
+    assert resp.status_code == 200, resp.content
+    data = resp.json()
+    assert len(data["dias"]) == 10
+    filas = {r["empleado"]["id"]: r["dias"] for r in data["items"]}
+    dias = {c["fecha"]: c["ausencia"] for c in filas[emp.id]}
+    assert dias["2025-03-02"] is None
+    assert dias["2025-03-04"]["id_solicitud"] == vac.id
+    assert dias["2025-03-05"] == {"tipo_ausencia": "PERM", "subtipo": "Médico",
+                                  "estado_solicitud": "PEND", "id_solicitud": per.id}
+    assert all(c["ausencia"] is None for c in filas[otro.id])  # RECH excluida por defecto
+
+
+@pytest.mark.django_db
+def test_calendario_compacto_devuelve_tramos(ausencias):
+    emp, otro, vac, per = ausencias
+    resp = _staff_client().get(URL, {"desde": "2025-01-01", "hasta": "2025-12-31", "modo": "compacto"})
+
+    assert resp.status_code == 200, resp.content
+    filas = {r["empleado"]["id"]: r["ausencias"] for r in resp.json()["items"]}
+    assert [(t["desde"], t["dias"], t["tipo_ausencia"]) for t in filas[emp.id]] == [
+        ("2025-03-03", 2, "VAC"), ("2025-03-05", 1, "PERM"), ("2025-03-06", 2, "VAC"),
+    ]
+    assert filas[otro.id] == []
+
+
+@pytest.mark.django_db
+def test_calendario_limites_de_rango():
+    c = _staff_client()
+    assert c.get(URL, {"desde": "2025-01-01", "hasta": "2025-06-30"}).status_code == 400
+    assert c.get(URL, {"desde": "2025-01-01", "hasta": "2026-06-30", "modo": "compacto"}).status_code == 400
+    assert c.get(URL, {"desde": "2025-01-01", "hasta": "2025-01-31", "modo": "otro"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_calendario_no_staff_sin_empleado_no_ve_nada(ausencias):
+    c = APIClient()
+    c.force_authenticate(user=UserFactory())
+    data = c.get(URL, {"desde": "2025-03-01", "hasta": "2025-03-10"}).json()
+    assert data["items"] == [] and data["dias"] == []
+
+
+@pytest.mark.django_db
+def test_calendario_streaming_ndjson_y_csv(ausencias):
+    emp, otro, vac, per = ausencias
+    c = _staff_client()
+
+    resp = c.get(URL, {"desde": "2025-01-01", "hasta": "2025-12-31", "modo": "compacto", "format": "ndjson"})
+    assert resp.status_code == 200
+    assert resp["Content-Type"].startswith("application/x-ndjson")
+    lineas = [json.loads(x) for x in b"".join(resp.streaming_content).decode().splitlines()]
+    assert [x["empleado"]["id"] for x in lineas] == sorted([emp.id, otro.id])
+    tramos = next(x["ausencias"] for x in lineas if x["empleado"]["id"] == emp.id)
+    assert [t["tipo_ausencia"] for t in tramos] == ["VAC", "PERM", "VAC"]
+
+    resp = c.get(URL, {"desde": "2025-03-04", "hasta": "2025-03-06", "format": "csv"})
+    assert resp.status_code == 200
+    filas = list(csv.reader(io.StringIO(b"".join(resp.streaming_content).decode())))
+    assert filas[0][-3:] == ["2025-03-04", "2025-03-05", "2025-03-06"]
+    fila_emp = next(f for f in filas[1:] if f[0] == str(emp.id))
+    assert fila_emp[-3:] == ["VAC:APROB", "PERM:PEND", "VAC:APROB"]
+
+    assert c.get(URL, {"desde": "2025-03-04", "format": "csv"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_calendario_get_condicional(ausencias):
+    emp, otro, vac, per = ausencias
+    c = _staff_client()
+    params = {"desde": "2025-03-01", "hasta": "2025-03-10"}
+
+    r1 = c.get(URL, params)
+    assert r1.status_code == 200 and r1["ETag"] and r1["Last-Modified"]
+
+    r2 = c.get(URL, params, HTTP_IF_NONE_MATCH=r1["ETag"])
+    assert r2.status_code == 304 and r2["ETag"] == r1["ETag"]
+
+    assert c.get(URL, {**params, "modo": "compacto"}, HTTP_IF_NONE_MATCH=r1["ETag"]).status_code == 200
+
+    per.estado = "APROB"
+    per.save()
+    r3 = c.get(URL, params, HTTP_IF_NONE_MATCH=r1["ETag"])
+    assert r3.status_code == 200 and r3["ETag"] != r1["ETag"]
+
+    vac.delete()
+    assert c.get(URL, params, HTTP_IF_NONE_MATCH=r3["ETag"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_calendario_revalida_tras_transiciones_por_api(ausencias):
+    emp, otro, vac, per = ausencias
+    c = _staff_client()
+    params = {"desde": "2025-03-01", "hasta": "2025-03-10"}
+
+    def estado_permiso(r):
+        fila = next(i for i in r.json()["items"] if i["empleado"]["id"] == emp.id)
+        return next(d["ausencia"]["estado_solicitud"] for d in fila["dias"] if d["fecha"] == "2025-03-05")
+
+    r1 = c.get(URL, params)
+    assert estado_permiso(r1) == "PEND"
+    assert c.post(f"/api/v1/permisos/{per.id}/aprobar/", {}, format="json").status_code == 200
+    r2 = c.get(URL, params, HTTP_IF_NONE_MATCH=r1["ETag"], HTTP_IF_MODIFIED_SINCE=r1["Last-Modified"])
+    assert r2.status_code == 200 and estado_permiso(r2) == "APROB"
+
+    assert c.post(f"/api/v1/permisos/{per.id}/cancelar/", {}, format="json").status_code == 200
+    assert c.get(URL, params, HTTP_IF_NONE_MATCH=r2["ETag"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_calendario_no_staff_ve_solo_su_renglon(ausencias):
+    emp, otro, vac, per = ausencias
+    user = UserFactory()
+    emp.usuario = user
+    emp.save()
+    c = APIClient()
+    c.force_authenticate(user=user)
+
+    data = c.get(URL, {"desde": "2025-03-01", "hasta": "2025-03-10"}).json()
+    assert [r["empleado"]["id"] for r in data["items"]] == [emp.id]
+
+
+@pytest.mark.django_db
+def test_teselas_por_sucursal_coinciden_y_se_invalidan(ausencias, django_assert_max_num_queries):
+    emp, otro, vac, per = ausencias
+    suc = SucursalFactory()
+    Empleado.objects.filter(pk=emp.pk).update(sucursal=suc)  # sin señales: la tesela aún no existe
+    c = _staff_client()
+    params = {"desde": "2025-02-20", "hasta": "2025-04-10", "modo": "compacto", "sucursal": suc.id}
+
+    def tramos():
+        filas = c.get(URL, params).json()["items"]
+        return [(t["desde"], t["dias"], t["tipo_ausencia"]) for f in filas for t in f["ausencias"]]
+
+    esperado = [("2025-03-03", 2, "VAC"), ("2025-03-05", 1, "PERM"), ("2025-03-06", 2, "VAC")]
+    assert tramos() == esperado
+    with django_assert_max_num_queries(2):  # firma de empleados + empleados; ETag y teselas salen del cache
+        r = c.get(URL, params)
+    assert r["ETag"] and "Last-Modified" not in r
+    assert c.get(URL, params, HTTP_IF_NONE_MATCH=r["ETag"]).status_code == 304
+
+    # Renombrar el tipo de permiso invalida teselas y ETag
+    per.tipo.nombre = "Consulta"
+    per.tipo.save()
+    r2 = c.get(URL, params, HTTP_IF_NONE_MATCH=r["ETag"])
+    assert r2.status_code == 200
+    assert [t["subtipo"] for f in r2.json()["items"] for t in f["ausencias"] if t["tipo_ausencia"] == "PERM"] == ["Consulta"]
+    assert tramos() == esperado
+
+    # Una solicitud que cruza de mes invalida ambos meses y se cose en un solo tramo
+    SolicitudVacaciones.objects.create(
+        empleado=emp, fecha_inicio=date(2025, 3, 28), fecha_fin=date(2025, 4, 2), dias_habiles=4, estado="APROB"
+    )
+    assert tramos()[-1] == ("2025-03-28", 6, "VAC")
+
+    # Un empleado que entra a la sucursal (con ausencias ya cacheadas fuera de ella) invalida la unidad
+    SolicitudVacaciones.objects.create(
+        empleado=otro, fecha_inicio=date(2025, 4, 7), fecha_fin=date(2025, 4, 8), dias_habiles=2, estado="APROB"
+    )
+    assert ("2025-04-07", 2, "VAC") not in tramos()
+    otro.sucursal = suc
+    otro.save()
+    assert ("2025-04-07", 2, "VAC") in tramos()
+
+
+@pytest.mark.django_db
+def test_calendario_bajo_supervisor():
+    jefe = EmpleadoFactory()
+    directo = EmpleadoFactory(supervisor=jefe)
+    indirecto = EmpleadoFactory(supervisor=directo)
+    EmpleadoFactory()
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+
+    r = c.get(URL, {"desde": "2025-01-01", "hasta": "2025-01-07", "bajo_supervisor": jefe.id})
+    assert r.status_code == 200
+    assert {i["empleado"]["id"] for i in r.data["items"]} == {directo.id, indirecto.id}
@@ -1,30 +1,39 @@
-﻿from datetime import date, timedelta
-from typing import Dict, List, Tuple
+﻿import hashlib
+from datetime import timedelta
 
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.utils.dateparse import parse_date
 from rest_framework import status
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.utils import extend_schema, OpenApiParameter, PolymorphicProxySerializer
 
+from core.renderers import CSVRenderer, NDJSONRenderer, lineas_csv, lineas_ndjson
+from empleados.alcance import etiqueta_alcance, filtrar_por_alcance
+from empleados.jerarquia import filtrar_por_jerarquia
 from empleados.models import Empleado
-from vacaciones.models import SolicitudVacaciones
-from permisos.models import Permiso
-from .serializers import CalendarioResponseSerializer  # respuesta documentada
-
+from .motor import (
+    CAMPOS_EMPLEADO, ausencias_por_empleado, celdas, codigos_por_dia, compactos,
+    estados_desde_params, firma_catalogos, firma_empleados, info_empleado, recorrer_calendario,
+    version_datos,
+)
+from .teselas import ausencias_por_teselas, firma_teselas, unidad_de_params
+from .serializers import CalendarioResponseSerializer, CalendarioCompactoResponseSerializer  # respuesta documentada
 
-def _daterange(d1: date, d2: date):
-    cur = d1
-    while cur <= d2:
-        yield cur
-        cur += timedelta(days=1)
+# Tope de rango por modo: el detalle genera una celda por dÃ­a, el compacto solo tramos
+MAX_DIAS_DETALLE = 62
+MAX_DIAS_COMPACTO = 366
+MODOS = ("dias", "compacto")
+FORMATOS_STREAMING = ("ndjson", "csv")
+STREAMING_CHUNK = 2000
 
 
 def _empleados_filtrados(params, user):
-    qs = Empleado.objects.select_related(
-        "unidad_negocio", "sucursal", "area", "departamento", "puesto", "usuario"
-    )
+    qs = Empleado.objects.all()
     # Filtros organizacionales
     mapping = {
         "unidad_negocio": "unidad_negocio_id",
@@ -39,14 +48,11 @@ def _empleados_filtrados(params, user):
         v = params.get(k)
         if v:
             qs = qs.filter(**{field: v})
+    # Subárbol de área o línea de supervisión (tablas de cierre)
+    qs = filtrar_por_jerarquia(qs, params)
 
-    # Seguridad: usuario no staff solo ve su propio registro
-    if user.is_authenticated and not user.is_staff:
-        if hasattr(user, "empleado"):
-            qs = qs.filter(id=user.empleado_id)
-        else:
-            qs = qs.none()
-    return qs
+    # Seguridad: no staff ve su propio registro o, con rol Supervisor/Gerente, su línea de reporte
+    return filtrar_por_alcance(qs, user, campo="id")
 
 
 @extend_schema(
@@ -60,22 +66,53 @@ def _empleados_filtrados(params, user):
         OpenApiParameter("area", int, description="ID Ã¡rea (opcional)", required=False),
         OpenApiParameter("departamento", int, description="ID departamento (opcional)", required=False),
         OpenApiParameter("puesto", int, description="ID puesto (opcional)", required=False),
+        OpenApiParameter("bajo_area", int, description="ID área: incluye todas sus subáreas (opcional)", required=False),
+        OpenApiParameter("bajo_supervisor", int, description="ID supervisor: toda su línea de reporte (opcional)",
+                         required=False),
+        OpenApiParameter("profundidad", int, description="Con bajo_supervisor: niveles a incluir (opcional)",
+                         required=False),
         OpenApiParameter("estado", str, description="Filtra estado: PEND/APROB/RECH/CANC (opcional)", required=False),
         OpenApiParameter("incluir_pendientes", bool, description="true/false (default true)", required=False),
         OpenApiParameter("incluir_rechazadas", bool, description="true/false (default false)", required=False),
         OpenApiParameter("incluir_canceladas", bool, description="true/false (default false)", required=False),
+        OpenApiParameter(
+            "format", str, enum=FORMATOS_STREAMING, required=False,
+            description=f"ExportaciÃ³n en streaming (mÃ¡x. {MAX_DIAS_COMPACTO} dÃ­as): ndjson = un empleado por "
+                        "lÃ­nea (respeta 'modo'); csv = un empleado por fila y una columna por dÃ­a (TIPO:ESTADO)",
+        ),
+        OpenApiParameter(
+            "modo", str, enum=MODOS, required=False,
+            description=f"dias (default, mÃ¡x. {MAX_DIAS_DETALLE} dÃ­as): una celda por dÃ­a; "
+                        f"compacto (mÃ¡x. {MAX_DIAS_COMPACTO} dÃ­as): tramos de ausencia por empleado",
+        ),
     ],
     description=(
         "Devuelve un calendario por empleado y dÃ­a con ausencias de **vacaciones** y **permisos**. "
-        "Respeta filtros organizacionales y de estado. Usuario no staff solo ve su propio calendario."
+        "Respeta filtros organizacionales y de estado. Usuario no staff solo ve su propio calendario (Supervisor/Gerente: el de su línea de reporte). "
+        "Soporta GET condicional (ETag / Last-Modified): responde 304 si los datos no cambiaron."
+    ),
+    responses=PolymorphicProxySerializer(
+        component_name="CalendarioAusencias",
+        serializers=[CalendarioResponseSerializer, CalendarioCompactoResponseSerializer],
+        resource_type_field_name=None,
     ),
-    responses=CalendarioResponseSerializer,
 )
 @extend_schema(tags=["calendario"])
 class CalendarioAusenciasView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer, CSVRenderer]
 
     def get(self, request):
+        modo = request.query_params.get("modo", "dias")
+        if modo not in MODOS:
+            return Response(
+                {"detail": f"modo invÃ¡lido. Opciones: {', '.join(MODOS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        formato = request.accepted_renderer.format
+        streaming = formato in FORMATOS_STREAMING
+        max_dias = MAX_DIAS_COMPACTO if modo == "compacto" or streaming else MAX_DIAS_DETALLE
+
         # --- ValidaciÃ³n de rango ---
         s_desde = request.query_params.get("desde")
         s_hasta = request.query_params.get("hasta")
@@ -89,128 +126,117 @@ class CalendarioAusenciasView(APIView):
             d2 = parse_date(s_hasta)
             if not d1 or not d2 or d2 < d1:
                 raise ValueError
-            if (d2 - d1).days > 62:
-                # ProtecciÃ³n: mÃ¡ximo 2 meses para evitar respuestas gigantes
-                return Response(
-                    {"detail": "Rango demasiado amplio. MÃ¡ximo 62 dÃ­as."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
         except Exception:
             return Response(
                 {"detail": "Formato de fecha invÃ¡lido."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        if (d2 - d1).days > max_dias:
+            # ProtecciÃ³n contra respuestas gigantes (el modo compacto admite rangos anuales)
+            return Response(
+                {"detail": f"Rango demasiado amplio. MÃ¡ximo {max_dias} dÃ­as."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        # Flags de estados
-        incluir_pend = request.query_params.get("incluir_pendientes", "true").lower() != "false"
-        incluir_rech = request.query_params.get("incluir_rechazadas", "false").lower() == "true"
-        incluir_canc = request.query_params.get("incluir_canceladas", "false").lower() == "true"
-        estado_single = request.query_params.get("estado")
+        estados = estados_desde_params(request.query_params)
 
-        estados: List[str] = []
-        if estado_single:
-            estados = [estado_single]
-        else:
-            if incluir_pend:
-                estados.append("PEND")
-            estados.append("APROB")
-            if incluir_rech:
-                estados.append("RECH")
-            if incluir_canc:
-                estados.append("CANC")
-
-        # --- Empleados objetivos ---
-        empleados = list(_empleados_filtrados(request.query_params, request.user))
-
-        # Si no hay empleados que ver, corta rÃ¡pido
+        # --- Empleados objetivos (filas planas, sin instanciar modelos) ---
+        empleados_qs = _empleados_filtrados(request.query_params, request.user)
+
+        # Con filtro de sucursal/área/departamento se cosen teselas mensuales cacheadas
+        unidad = None if streaming else unidad_de_params(request.query_params)
+
+        # --- GET condicional: 304 sin construir la rejilla si los datos no cambiaron ---
+        etag, ultima = self._validadores(request, formato, empleados_qs, d1, d2, estados, unidad)
+        # get_conditional_response devuelve la misma respuesta base si no aplica 304/412
+        base = self._con_validadores(HttpResponse(), etag, ultima)
+        condicional = get_conditional_response(request._request, etag=etag, last_modified=ultima, response=base)
+        if condicional is not base:
+            return condicional
+
+        if streaming:
+            return self._con_validadores(self._streaming(formato, modo, empleados_qs, d1, d2, estados), etag, ultima)
+
+        empleados = list(empleados_qs.values(*CAMPOS_EMPLEADO))
+
+        # --- Tramos de vacaciones y permisos traslapados con el rango ---
         if not empleados:
-            return Response({
+            tramos = {}
+        elif unidad:
+            tramos = ausencias_por_teselas(*unidad, d1, d2, estados)
+        else:
+            tramos = ausencias_por_empleado(empleados_qs, d1, d2, estados)
+
+        if modo == "compacto":
+            items = [
+                {"empleado": info_empleado(e), "ausencias": compactos(tramos.get(e["id"], []))}
+                for e in empleados
+            ]
+            return self._con_validadores(Response({
                 "desde": f"{d1:%Y-%m-%d}",
                 "hasta": f"{d2:%Y-%m-%d}",
-                "dias": [],
-                "items": [],
+                "items": items,
                 "estados_solicitud_incluidos": estados,
-            })
-
-        emp_ids = [e.id for e in empleados]
-
-        # --- Traer vacaciones y permisos traslapados con el rango ---
-        vac_qs = (
-            SolicitudVacaciones.objects
-            .select_related("empleado")
-            .filter(
-                empleado_id__in=emp_ids,
-                estado__in=estados,
-                fecha_inicio__lte=d2,
-                fecha_fin__gte=d1,
-            )
-        )
-        per_qs = (
-            Permiso.objects
-            .select_related("empleado", "tipo")
-            .filter(
-                empleado_id__in=emp_ids,
-                estado__in=estados,
-                fecha_inicio__lte=d2,
-                fecha_fin__gte=d1,
-            )
-        )
-
-        # --- Armar mapa por (empleado_id, fecha) -> ausencia ---
-        cells: Dict[Tuple[int, date], Dict] = {}
-
-        for s in vac_qs:
-            cur_i = max(d1, s.fecha_inicio)
-            cur_f = min(d2, s.fecha_fin)
-            for d in _daterange(cur_i, cur_f):
-                cells[(s.empleado_id, d)] = {
-                    "tipo_ausencia": "VAC",
-                    "subtipo": "Vacaciones",
-                    "estado_solicitud": s.estado,
-                    "id_solicitud": s.id,
-                }
-
-        for p in per_qs:
-            cur_i = max(d1, p.fecha_inicio)
-            cur_f = min(d2, p.fecha_fin)
-            for d in _daterange(cur_i, cur_f):
-                # prioridad a permiso sobre vacaciones
-                cells[(p.empleado_id, d)] = {
-                    "tipo_ausencia": "PERM",
-                    "subtipo": getattr(p.tipo, "nombre", "Permiso"),
-                    "estado_solicitud": p.estado,
-                    "id_solicitud": p.id,
-                }
-
-        # --- ConstrucciÃ³n de respuesta: items por empleado con vector de dÃ­as ---
-        dias = [f"{d:%Y-%m-%d}" for d in _daterange(d1, d2)]
-        items = []
-        for e in empleados:
-            row = {
-                "empleado": {
-                    "id": e.id,
-                    "numero_empleado": e.numero_empleado,
-                    "nombre": e.nombre_completo,
-                    "sucursal": getattr(e.sucursal, "nombre", None),
-                    "area": getattr(e.area, "nombre", None),
-                    "departamento": getattr(e.departamento, "nombre", None),
-                    "puesto": getattr(e.puesto, "nombre", None),
-                },
-                "dias": [],
-            }
-            for d in _daterange(d1, d2):
-                info = cells.get((e.id, d))
-                row["dias"].append({
-                    "fecha": f"{d:%Y-%m-%d}",
-                    "ausencia": info,  # puede ser None si no hay ausencia
-                })
-            items.append(row)
-
-        return Response({
+            }), etag, ultima)
+
+        # --- Detalle: items por empleado con vector de dÃ­as ---
+        dias = [f"{d1 + timedelta(days=i):%Y-%m-%d}" for i in range((d2 - d1).days + 1)]
+        items = [
+            {"empleado": info_empleado(e), "dias": celdas(tramos.get(e["id"], []), d1, d2, dias)}
+            for e in empleados
+        ]
+        return self._con_validadores(Response({
             "desde": f"{d1:%Y-%m-%d}",
             "hasta": f"{d2:%Y-%m-%d}",
-            "dias": dias,   # Ãºtil para armar headers en el front
+            "dias": dias if empleados else [],   # Ãºtil para armar headers en el front
             "items": items,
             "estados_solicitud_incluidos": estados,
-        })
-
+        }), etag, ultima)
+
+    @staticmethod
+    def _validadores(request, formato, empleados_qs, d1, d2, estados, unidad=None):
+        """ETag (parÃ¡metros + alcance del usuario + firma de datos) y Last-Modified (timestamp)."""
+        if unidad:
+            # Las versiones de las teselas ya cubren vacaciones y permisos: sin consultarlos.
+            # Sin Last-Modified: no hay una fecha de última modificación que lo respalde.
+            firma = "|".join((firma_empleados(empleados_qs), firma_teselas(*unidad, d1, d2), firma_catalogos()))
+            ultima = None
+        else:
+            firma, ultima = version_datos(empleados_qs, d1, d2, estados)
+        base = f"{request.get_full_path()}|{formato}|{etiqueta_alcance(request.user)}|{firma}"
+        etag = quote_etag(hashlib.sha1(base.encode()).hexdigest())
+        return etag, int(ultima.timestamp()) if ultima else None
+
+    @staticmethod
+    def _con_validadores(resp, etag, ultima):
+        resp["ETag"] = etag
+        if ultima is not None:
+            resp["Last-Modified"] = http_date(ultima)
+        # El navegador puede guardar la respuesta pero debe revalidar siempre
+        patch_cache_control(resp, private=True, no_cache=True)
+        return resp
+
+    def _streaming(self, formato, modo, empleados_qs, d1, d2, estados):
+        """Exporta un empleado a la vez (memoria constante) en NDJSON o CSV."""
+        filas = recorrer_calendario(empleados_qs, d1, d2, estados, chunk_size=STREAMING_CHUNK)
+
+        if formato == "ndjson":
+            if modo == "compacto":
+                lineas = ({"empleado": info_empleado(e), "ausencias": compactos(t)} for e, t in filas)
+            else:
+                dias = [f"{d1 + timedelta(days=i):%Y-%m-%d}" for i in range((d2 - d1).days + 1)]
+                lineas = ({"empleado": info_empleado(e), "dias": celdas(t, d1, d2, dias)} for e, t in filas)
+            resp = StreamingHttpResponse(lineas_ndjson(lineas), content_type=NDJSONRenderer.media_type)
+        else:
+            columnas = ["id", "numero_empleado", "nombre", "sucursal", "area", "departamento", "puesto"]
+            encabezado = columnas + [f"{d1 + timedelta(days=i):%Y-%m-%d}" for i in range((d2 - d1).days + 1)]
+
+            def renglones():
+                yield encabezado
+                for e, t in filas:
+                    info = info_empleado(e)
+                    yield [info[c] for c in columnas] + codigos_por_dia(t, d1, d2)
+
+            resp = StreamingHttpResponse(lineas_csv(renglones()), content_type=f"{CSVRenderer.media_type}; charset=utf-8")
+            resp["Content-Disposition"] = f'attachment; filename="calendario_{d1:%Y%m%d}_{d2:%Y%m%d}.csv"'
+        return resp
@@ -0,0 +1,127 @@
+# core/campos.py
+"""
+Campos dispersos (?fields=) y relaciones expandibles (?expand=) para los ViewSets.
+
+- CamposDinamicosMixin (serializer): recorta la salida a ?fields=a,b,c y, para
+  los nombres de ?expand= que declare `expandibles`, sustituye el PK de la FK
+  por un objeto anidado breve. Solo en lecturas (GET/HEAD): en escrituras el
+  serializer queda completo para no alterar la validación.
+- CamposDinamicosViewMixin (viewset): deriva select_related() y only() de los
+  campos que quedaron en el serializer, para no unir ni hidratar columnas que
+  no se van a devolver. Si algún campo no se puede mapear a columnas (p. ej.
+  source="*" o un método del modelo principal) se deja el queryset original.
+"""
+from typing import Optional, Set, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+METODOS_LECTURA = ("GET", "HEAD")
+
+
+def _lista_param(request, nombre: str) -> Optional[Set[str]]:
+    valor = request.query_params.get(nombre) if request is not None else None
+    if not valor:
+        return None
+    return {v.strip() for v in valor.split(",") if v.strip()}
+
+
+def campos_solicitados(request) -> Tuple[Optional[Set[str]], Set[str]]:
+    """(fields o None si no se pidió, expand) de la petición; vacío fuera de lecturas."""
+    if request is None or request.method not in METODOS_LECTURA:
+        return None, set()
+    return _lista_param(request, "fields"), _lista_param(request, "expand") or set()
+
+
+class CamposDinamicosMixin:
+    """Mixin para ModelSerializer. `expandibles` = {campo: clase de serializer anidado}."""
+
+    expandibles: dict = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campos, expand = campos_solicitados(self.context.get("request"))
+        expand &= set(self.expandibles)
+
+        for nombre in expand:
+            self.fields[nombre] = self.expandibles[nombre](read_only=True)
+        if campos is not None:
+            for nombre in set(self.fields) - campos - expand:
+                self.fields.pop(nombre)
+
+
+def _ruta_columnas(model, partes, prefijo=""):
+    """
+    Resuelve un source con puntos ("sucursal.nombre") a (joins, columnas) para
+    select_related()/only(). None si no corresponde a columnas concretas.
+    """
+    joins, columnas = set(), set()
+    for i, parte in enumerate(partes):
+        try:
+            campo = model._meta.get_field(parte)
+        except FieldDoesNotExist:
+            if not prefijo:
+                return None
+            # Propiedad/método de un modelo relacionado: se cargan sus columnas
+            columnas.update(f"{prefijo}__{f.attname}" for f in model._meta.concrete_fields)
+            return joins, columnas
+        if campo.many_to_many or campo.one_to_many or (campo.is_relation and not campo.concrete):
+            return None
+        ruta = f"{prefijo}__{parte}" if prefijo else parte
+        if campo.is_relation and i < len(partes) - 1:
+            joins.add(ruta)
+            model, prefijo = campo.related_model, ruta
+            continue
+        columnas.add(ruta)
+        return joins, columnas
+    return joins, columnas
+
+
+def plan_consulta(serializer) -> Optional[Tuple[Set[str], Set[str]]]:
+    """(select_related, only) que cubren los campos del serializer, o None."""
+    model = serializer.Meta.model
+    joins, columnas = set(), {model._meta.pk.attname}
+    for campo in serializer.fields.values():
+        if campo.write_only:
+            continue
+        if campo.source == "*":
+            return None
+        partes = campo.source.split(".")
+        if isinstance(campo, serializers.BaseSerializer):
+            # Relación expandida: sus subcampos cuelgan de la FK
+            rel = _ruta_columnas(model, partes)
+            if rel is None:
+                return None
+            joins |= rel[0] | {"__".join(partes)}
+            for sub in campo.fields.values():
+                r = _ruta_columnas(model, partes + sub.source.split("."))
+                if r is None:
+                    return None
+                joins |= r[0]
+                columnas |= r[1]
+            continue
+        r = _ruta_columnas(model, partes)
+        if r is None:
+            return None
+        joins |= r[0]
+        columnas |= r[1]
+    # Cada join necesita su FK en only()
+    columnas |= joins
+    return joins, columnas
+
+
+class CamposDinamicosViewMixin:
+    """Mixin para ViewSets cuyo serializer usa CamposDinamicosMixin."""
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        campos, expand = campos_solicitados(getattr(self, "request", None))
+        if campos is None and not expand:
+            return qs
+        plan = plan_consulta(self.get_serializer())
+        if plan is None:
+            return qs
+        joins, columnas = plan
+        # La paginación por llave lee sus columnas de cada fila
+        columnas |= {c.lstrip("-") for c in getattr(self, "keyset_ordering", ())}
+        return qs.select_related(None).select_related(*joins).only(*columnas)
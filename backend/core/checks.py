@@ -0,0 +1,25 @@
+# core/checks.py
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends con memoria por proceso: los contadores de core.versiones no se comparten
+CACHES_LOCALES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def cache_compartido(app_configs, **kwargs):
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if settings.DEBUG or backend not in CACHES_LOCALES:
+        return []
+    return [
+        Error(
+            "El cache 'default' es local al proceso; las versiones de core.versiones "
+            "(roles, alcance, calendario...) no se invalidan entre workers.",
+            hint="Configura CACHE_URL con Redis o memcached (p. ej. redis://127.0.0.1:6379/1).",
+            obj="CACHES",
+            id="core.E001",
+        )
+    ]
@@ -0,0 +1,97 @@
+# core/exportacion.py
+"""
+Exportación de listados completos: ?export=xlsx | ?export=csv en el list() de un ViewSet.
+
+La vista declara `export_columnas = [(encabezado, ruta ORM), ...]` y `export_nombre`.
+Se exporta el mismo queryset del listado (alcance del usuario, filtros, búsqueda y
+orden) sin paginar, leyendo tuplas con .values_list().iterator() — sin instanciar
+modelos ni serializers — así que la memoria no crece con el número de filas:
+- CSV: StreamingHttpResponse, una línea a la vez.
+- XLSX: openpyxl en modo write-only (escribe las filas a disco) a un archivo
+  temporal que se entrega con FileResponse en bloques.
+"""
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.renderers import lineas_csv
+
+FORMATOS = ("xlsx", "csv")
+CHUNK = 2000
+
+PARAMETRO_EXPORT = OpenApiParameter(
+    name="export", required=False, type=str, enum=list(FORMATOS),
+    description="Descarga el listado completo (filtros y orden aplicados, sin paginar) como archivo.",
+)
+
+
+def _celda_xlsx(valor):
+    # Excel no admite zona horaria: se exporta la hora local
+    if isinstance(valor, datetime) and timezone.is_aware(valor):
+        return timezone.localtime(valor).replace(tzinfo=None)
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def respuesta_xlsx(encabezados, filas, nombre: str, hoja: str = "Datos"):
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    ws = libro.create_sheet(title=hoja[:31])
+    ws.append(list(encabezados))
+    for fila in filas:
+        ws.append([_celda_xlsx(v) for v in fila])
+    archivo = tempfile.TemporaryFile()
+    libro.save(archivo)
+    archivo.seek(0)
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=f"{nombre}.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+
+def respuesta_csv(encabezados, filas, nombre: str):
+    def _lineas():
+        yield [*encabezados]
+        yield from filas
+
+    resp = StreamingHttpResponse(lineas_csv(_lineas()), content_type="text/csv; charset=utf-8")
+    resp["Content-Disposition"] = f'attachment; filename="{nombre}.csv"'
+    return resp
+
+
+class ExportacionMixin:
+    """Mixin para ViewSets: ?export=xlsx|csv en list() devuelve el listado completo como archivo."""
+
+    export_param = "export"
+    export_columnas = ()
+    export_nombre = "export"
+
+    def list(self, request, *args, **kwargs):
+        formato = request.query_params.get(self.export_param)
+        if not formato:
+            return super().list(request, *args, **kwargs)
+        if formato not in FORMATOS:
+            return Response(
+                {self.export_param: [f"Formato no soportado; use {' o '.join(FORMATOS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        encabezados = [c[0] for c in self.export_columnas]
+        filas = (
+            self.filter_queryset(self.get_queryset())
+            .values_list(*(c[1] for c in self.export_columnas))
+            .iterator(chunk_size=CHUNK)
+        )
+        nombre = f"{self.export_nombre}_{timezone.localdate():%Y%m%d}"
+        if formato == "csv":
+            return respuesta_csv(encabezados, filas, nombre)
+        return respuesta_xlsx(encabezados, filas, nombre, hoja=self.export_nombre)
@@ -0,0 +1,104 @@
+# core/imagenes.py
+"""
+Rendiciones de fotos (empleados, evidencia de checadas).
+
+Al subir una foto nueva el original se re-codifica: se aplica la orientación
+EXIF y se descartan los metadatos (GPS, cámara), se limita a ORIGINAL_MAX px y
+se guarda como JPEG. Además se generan rendiciones fijas en WebP (JPEG si
+Pillow no trae WebP), guardadas en los campos <campo>_mini y <campo>_media:
+- mini: recorte cuadrado para avatares/listados;
+- media: caja máxima para vistas de detalle.
+Los modelos llaman a procesar_foto() desde save(); las fotos ya existentes se
+completan con `manage.py generar_rendiciones_fotos`.
+"""
+import io
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+ORIGINAL_MAX = (2048, 2048)
+CALIDAD_ORIGINAL = 85
+CALIDAD_RENDICION = 80
+
+# nombre -> (tamaño, recortar al cuadro exacto)
+RENDICIONES = {
+    "mini": ((96, 96), True),
+    "media": ((480, 480), False),
+}
+
+
+def _formato_rendicion():
+    return ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+
+
+def _abrir(archivo) -> Image.Image:
+    archivo.seek(0)
+    img = Image.open(archivo)
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        fondo = Image.new("RGB", img.size, "white")
+        fondo.paste(img, mask=img.getchannel("A"))
+        return fondo
+    return img.convert("RGB")
+
+
+def _codificar(img: Image.Image, formato: str, calidad: int) -> ContentFile:
+    buf = io.BytesIO()
+    # Sin exif=...: la imagen se escribe sin metadatos
+    img.save(buf, format=formato, quality=calidad, optimize=formato == "JPEG")
+    return ContentFile(buf.getvalue())
+
+
+def _rendicion(img: Image.Image, tamano, recortar: bool) -> Image.Image:
+    if recortar:
+        return ImageOps.fit(img, tamano, method=Image.Resampling.LANCZOS)
+    copia = img.copy()
+    copia.thumbnail(tamano, Image.Resampling.LANCZOS)
+    return copia
+
+
+def _base(nombre: str) -> str:
+    return PurePosixPath(nombre).stem
+
+
+def generar_rendiciones(instance, campo: str = "foto", img: Image.Image = None) -> bool:
+    """Genera <campo>_mini y <campo>_media a partir de la foto actual (sin guardar la instancia)."""
+    archivo = getattr(instance, campo)
+    if not archivo:
+        return False
+    if img is None:
+        try:
+            with archivo.open("rb"):
+                img = _abrir(archivo)
+        except (UnidentifiedImageError, OSError):
+            return False
+    formato, ext = _formato_rendicion()
+    base = _base(archivo.name)
+    for nombre, (tamano, recortar) in RENDICIONES.items():
+        contenido = _codificar(_rendicion(img, tamano, recortar), formato, CALIDAD_RENDICION)
+        getattr(instance, f"{campo}_{nombre}").save(f"{base}_{nombre}.{ext}", contenido, save=False)
+    return True
+
+
+def procesar_foto(instance, campo: str = "foto") -> None:
+    """
+    Para llamar antes de guardar: si `campo` trae un archivo recién subido lo
+    normaliza (orientación, sin EXIF, tamaño máximo) y genera las rendiciones;
+    si la foto se quitó, limpia las rendiciones. Una foto ya guardada no se toca.
+    """
+    archivo = getattr(instance, campo)
+    if not archivo:
+        for nombre in RENDICIONES:
+            setattr(instance, f"{campo}_{nombre}", None)
+        return
+    if getattr(archivo, "_committed", True):
+        return
+    try:
+        img = _abrir(archivo)
+    except (UnidentifiedImageError, OSError):
+        return  # no es imagen: la validación del campo lo reporta
+    img.thumbnail(ORIGINAL_MAX, Image.Resampling.LANCZOS)
+    archivo.save(f"{_base(archivo.name)}.jpg", _codificar(img, "JPEG", CALIDAD_ORIGINAL), save=False)
+    generar_rendiciones(instance, campo, img=img)
@@ -0,0 +1,150 @@
+# core/jerarquia.py
+"""
+Tablas de cierre (closure tables) para jerarquías padre/hijo.
+
+Por cada par (ancestro, descendiente) del árbol hay una fila con su profundidad,
+incluido (nodo, nodo, 0). "Todo lo que cuelga de X" es entonces un solo filtro
+indexado por ancestro, sin recorrer el árbol en Python ni una consulta por nivel:
+
+    Empleado.objects.filter(area__in=ids_descendientes(AreaCierre, area_id))
+
+El modelo de cierre debe tener FKs `ancestro` y `descendiente` y `profundidad`.
+Las altas y movimientos se mantienen desde signals de cada app (enlazar/mover);
+`reconstruir` regenera la tabla completa desde la lista de adyacencia.
+
+Cada cambio incrementa la versión compartida `version_cierre(cierre)`
+(core.versiones): los caches derivados del árbol la incluyen en su llave.
+
+Altas y movimientos leen el cierre y lo reescriben: se serializan por árbol con
+un bloqueo consultivo (core.bloqueos) que dura hasta el fin de la transacción,
+para que dos movimientos concurrentes no escriban filas a partir del árbol viejo.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import transaction
+
+from core.bloqueos import bloquear
+from core.versiones import incrementar_version
+
+LOTE = 5000
+
+
+def version_cierre(cierre) -> str:
+    """Nombre de la versión (core.versiones) que cambia con cada movimiento del árbol."""
+    return f"jerarquia:{cierre._meta.label_lower}"
+
+
+def publicar_cambio(cierre) -> None:
+    # Inmediato para este proceso y de nuevo al confirmar, para que otros no cacheen el árbol viejo
+    nombre = version_cierre(cierre)
+    incrementar_version(nombre)
+    transaction.on_commit(lambda: incrementar_version(nombre))
+
+
+def _bloquear_arbol(cierre) -> None:
+    bloquear("jerarquia", [cierre._meta.label_lower])
+
+
+def ids_descendientes(cierre, nodo_id, profundidad: Optional[int] = None, incluir_propio: bool = True):
+    """Subconsulta con los IDs del subárbol de nodo_id (hasta `profundidad` niveles)."""
+    qs = cierre.objects.filter(ancestro_id=nodo_id)
+    if not incluir_propio:
+        qs = qs.filter(profundidad__gte=1)
+    if profundidad is not None:
+        qs = qs.filter(profundidad__lte=profundidad)
+    return qs.values("descendiente_id")
+
+
+def es_descendiente(cierre, nodo_id, ancestro_id) -> bool:
+    return cierre.objects.filter(ancestro_id=ancestro_id, descendiente_id=nodo_id).exists()
+
+
+def enlazar(cierre, nodo_id, padre_id) -> None:
+    """Alta de un nodo (hoja) bajo padre_id."""
+    with transaction.atomic(savepoint=False):
+        _bloquear_arbol(cierre)
+        filas = [cierre(ancestro_id=nodo_id, descendiente_id=nodo_id, profundidad=0)]
+        if padre_id:
+            filas += [
+                cierre(ancestro_id=a, descendiente_id=nodo_id, profundidad=p + 1)
+                for a, p in cierre.objects.filter(descendiente_id=padre_id).values_list("ancestro_id", "profundidad")
+            ]
+        cierre.objects.bulk_create(filas, batch_size=LOTE)
+        publicar_cambio(cierre)
+
+
+def mover(cierre, nodo_id, padre_id) -> None:
+    """
+    Cuelga el subárbol de nodo_id de padre_id (None = raíz). El llamador descarta ciclos;
+    con el árbol ya bloqueado se vuelve a comprobar por si otro movimiento concurrente
+    dejó a padre_id dentro del subárbol (ValueError).
+    """
+    with transaction.atomic(savepoint=False):
+        _bloquear_arbol(cierre)
+        subarbol = list(cierre.objects.filter(ancestro_id=nodo_id).values_list("descendiente_id", "profundidad"))
+        if not subarbol:
+            enlazar(cierre, nodo_id, padre_id)
+            return
+        if padre_id and padre_id in {d for d, _ in subarbol}:
+            raise ValueError(f"{nodo_id} no puede colgar de {padre_id}: es parte de su subárbol.")
+        ids = cierre.objects.filter(ancestro_id=nodo_id).values("descendiente_id")
+        # Enlaces de los ancestros anteriores hacia el subárbol (los internos se conservan)
+        cierre.objects.filter(descendiente_id__in=ids).exclude(ancestro_id__in=ids).delete()
+        if padre_id:
+            ancestros = list(cierre.objects.filter(descendiente_id=padre_id).values_list("ancestro_id", "profundidad"))
+            cierre.objects.bulk_create(
+                [
+                    cierre(ancestro_id=a, descendiente_id=d, profundidad=pa + pd + 1)
+                    for a, pa in ancestros
+                    for d, pd in subarbol
+                ],
+                batch_size=LOTE,
+            )
+        publicar_cambio(cierre)
+
+
+def enlazar_varios(cierre, pares: Iterable[Tuple[int, Optional[int]]]) -> None:
+    """
+    Alta de varios nodos nuevos (nodo, padre), que pueden colgar unos de otros.
+    Cada nodo se enlaza hasta que su padre ya tiene sus filas; un ciclo entre los
+    nodos nuevos nunca se resuelve y es un error (ValueError).
+    """
+    pendientes = dict(pares)
+    with transaction.atomic(savepoint=False):
+        while pendientes:
+            listos = [n for n, p in pendientes.items() if p not in pendientes]
+            if not listos:
+                raise ValueError(f"Ciclo entre nodos nuevos: {sorted(pendientes)}")
+            for n in listos:
+                enlazar(cierre, n, pendientes.pop(n))
+
+
+def reconstruir(cierre, adyacencia: Dict[int, Optional[int]]) -> int:
+    """
+    Regenera la tabla completa desde {nodo: padre}. Un ciclo en los datos se corta
+    donde se detecta. No publica el cambio (se usa también desde migraciones).
+    """
+    cierre.objects.all().delete()
+    ancestros = {}  # nodo -> [(ancestro, profundidad)]
+
+    def _ancestros(nodo):
+        camino = []
+        while nodo in adyacencia and nodo not in ancestros and nodo not in camino:
+            camino.append(nodo)
+            nodo = adyacencia.get(nodo)
+        base = ancestros.get(nodo, [])
+        for n in reversed(camino):
+            base = [(n, 0)] + [(a, p + 1) for a, p in base]
+            ancestros[n] = base
+        return ancestros[camino[0]] if camino else base
+
+    total, filas = 0, []
+    for nodo in adyacencia:
+        for a, p in _ancestros(nodo):
+            filas.append(cierre(ancestro_id=a, descendiente_id=nodo, profundidad=p))
+        if len(filas) >= LOTE:
+            total += len(cierre.objects.bulk_create(filas))
+            filas = []
+    if filas:
+        total += len(cierre.objects.bulk_create(filas))
+    return total
@@ -1,5 +1,13 @@
 # core/pagination.py
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+
 
 class DefaultPageNumberPagination(PageNumberPagination):
     """Paginación estándar: ?page=1&page_size=25 (máx 200)."""
@@ -7,3 +15,142 @@ class DefaultPageNumberPagination(PageNumberPagination):
     page_size = 25
     page_size_query_param = "page_size"
     max_page_size = 200
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por llave (keyset) sobre `view.keyset_ordering`, p. ej. ("-ts", "-id").
+
+    Se activa con ?cursor= (vacío = primera página); sin él se usa la paginación
+    por número de página de siempre, así que los clientes actuales no cambian.
+    En modo cursor no hay COUNT ni OFFSET: cada página filtra "después de la
+    última fila vista" (comparación lexicográfica sobre la tupla de orden), lo
+    que con un índice sobre esas columnas cuesta O(page_size) a cualquier
+    profundidad. ?ordering= no aplica en este modo: el orden es la llave.
+    La última columna de la llave debe ser única (id).
+
+    Respuesta: {"next": url|null, "previous": url|null, "results": [...]}
+    """
+    cursor_query_param = "cursor"
+    page_size = DefaultPageNumberPagination.page_size
+    page_size_query_param = DefaultPageNumberPagination.page_size_query_param
+    max_page_size = DefaultPageNumberPagination.max_page_size
+    respaldo_class = DefaultPageNumberPagination
+
+    def __init__(self):
+        self._respaldo = None
+
+    # ----- selección de modo -----
+    def _modo_cursor(self, request) -> bool:
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self._modo_cursor(request):
+            self._respaldo = self.respaldo_class()
+            return self._respaldo.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.orden = tuple(view.keyset_ordering)
+        self.campos = [o.lstrip("-") for o in self.orden]
+        self.modelo = queryset.model
+        self.limite = self._page_size(request)
+        posicion, atras = self._decodificar(request.query_params.get(self.cursor_query_param))
+
+        orden = self.orden
+        if atras:
+            orden = tuple(o[1:] if o.startswith("-") else f"-{o}" for o in orden)
+        qs = queryset.order_by(*orden)
+        if posicion is not None:
+            qs = qs.filter(self._despues_de(orden, posicion))
+
+        filas = list(qs[: self.limite + 1])
+        hay_mas = len(filas) > self.limite
+        filas = filas[: self.limite]
+        if atras:
+            filas.reverse()
+
+        primera = self._llave(filas[0]) if filas else None
+        ultima = self._llave(filas[-1]) if filas else None
+        # Si se llegó con cursor existe la página de la que se vino; hay_mas indica la otra
+        hay_siguiente, hay_anterior = (posicion is not None, hay_mas) if atras else (hay_mas, posicion is not None)
+        self.siguiente = ultima if hay_siguiente else None
+        self.anterior = primera if hay_anterior else None
+        return filas
+
+    def get_paginated_response(self, data):
+        if self._respaldo is not None:
+            return self._respaldo.get_paginated_response(data)
+        return Response({
+            "next": self._url(self.siguiente, atras=False),
+            "previous": self._url(self.anterior, atras=True),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "description": "Solo en modo ?page="},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return self.respaldo_class().get_schema_operation_parameters(view) + [{
+            "name": self.cursor_query_param,
+            "required": False,
+            "in": "query",
+            "description": "Paginación por llave: vacío para la primera página, luego el valor de next/previous.",
+            "schema": {"type": "string"},
+        }]
+
+    # ----- llave -----
+    def _page_size(self, request) -> int:
+        try:
+            n = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            n = self.page_size
+        return max(1, min(n, self.max_page_size))
+
+    def _llave(self, obj):
+        return [getattr(obj, c) for c in self.campos]
+
+    def _despues_de(self, orden, posicion) -> Q:
+        # (a, b) > (x, y)  ==  a > x  OR  (a = x AND b > y), con el sentido de cada columna
+        filtro = Q()
+        iguales = {}
+        for campo, valor in zip(orden, posicion):
+            nombre = campo.lstrip("-")
+            lookup = "lt" if campo.startswith("-") else "gt"
+            filtro |= Q(**iguales, **{f"{nombre}__{lookup}": valor})
+            iguales[nombre] = valor
+        # Cota redundante sobre la primera columna: deja al planner un rango del índice
+        primero = orden[0]
+        return filtro & Q(**{f"{primero.lstrip('-')}__{'lte' if primero.startswith('-') else 'gte'}": posicion[0]})
+
+    def _decodificar(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            valores = datos["v"]
+            if len(valores) != len(self.campos):
+                raise ValueError
+            posicion = [self.modelo._meta.get_field(c).to_python(v) for c, v in zip(self.campos, valores)]
+            return posicion, bool(datos.get("a"))
+        except (ValueError, KeyError, TypeError, DjangoValidationError):
+            raise NotFound("Cursor inválido.")
+
+    def _url(self, llave, atras: bool):
+        if llave is None:
+            return None
+        datos = {"v": [v.isoformat() if hasattr(v, "isoformat") else v for v in llave]}
+        if atras:
+            datos["a"] = 1
+        cursor = base64.urlsafe_b64encode(json.dumps(datos).encode()).decode()
+        params = self.request.query_params.copy()
+        params[self.cursor_query_param] = cursor
+        return self.request.build_absolute_uri(f"{self.request.path}?{params.urlencode()}")
@@ -1,7 +1,40 @@
 # core/permissions.py
-from typing import Iterable
+from typing import FrozenSet, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from core.versiones import incrementar_version, version_actual
+
+# Versión compartida de la pertenencia a grupos (ver core.signals); entra en la llave de cache
+VERSION_ROLES = "roles"
+
+
+def roles_usuario(user) -> FrozenSet[str]:
+    """
+    Nombres de grupo del usuario en mayúsculas. Se consultan una vez por petición
+    (memorizados en el objeto usuario) y se comparten entre procesos en el cache,
+    con llave por usuario y VERSION_ROLES, que cambia con cualquier alta/baja de grupo.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+    try:
+        return user._roles_cache
+    except AttributeError:
+        pass
+    llave = f"gv:roles:{user.pk}:{version_actual(VERSION_ROLES)}"
+    roles = cache.get(llave)
+    if roles is None:
+        roles = frozenset(name.upper() for name in user.groups.values_list("name", flat=True))
+        cache.set(llave, roles, timeout=getattr(settings, "CORE_ROLES_TTL", 3600))
+    user._roles_cache = roles
+    return roles
+
+
+def invalidar_roles() -> None:
+    incrementar_version(VERSION_ROLES)
+
 
 def user_has_role(user, roles: Iterable[str]) -> bool:
     """
@@ -21,10 +54,7 @@ def user_has_role(user, roles: Iterable[str]) -> bool:
     if user.is_staff and ("ADMIN" in normalized):
         return True
 
-    group_names = set(
-        name.upper() for name in user.groups.values_list("name", flat=True)
-    )
-    return bool(normalized & group_names)
+    return bool(normalized & roles_usuario(user))
 
 
 class IsAuthenticatedReadOnlyOrRRHH(BasePermission):
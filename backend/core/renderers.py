@@ -0,0 +1,58 @@
+# core/renderers.py
+"""
+Renderers para salidas de exportación (?format=ndjson / ?format=csv).
+
+Las vistas que exportan devuelven un StreamingHttpResponse y no pasan por
+render(); los renderers existen para que la negociación de contenido de DRF
+acepte el formato y para dar una salida legible a respuestas de error (400/403).
+"""
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class Echo:
+    """Pseudo-buffer para csv.writer: devuelve la línea en lugar de escribirla."""
+
+    def write(self, value):
+        return value
+
+
+def lineas_ndjson(filas):
+    """Serializa un iterable de dicts como NDJSON (una línea por fila)."""
+    for fila in filas:
+        yield json.dumps(fila, ensure_ascii=False, default=str) + "\n"
+
+
+def lineas_csv(filas):
+    """Serializa un iterable de listas como CSV, una línea a la vez."""
+    writer = csv.writer(Echo())
+    for fila in filas:
+        yield writer.writerow(fila)
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        filas = data if isinstance(data, list) else [data]
+        return "".join(lineas_ndjson(filas)).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, dict):
+            # Errores: una fila de encabezados y una de valores
+            data = [list(data.keys()), list(data.values())]
+        return "".join(lineas_csv(data)).encode(self.charset)
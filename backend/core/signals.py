@@ -0,0 +1,45 @@
+# core/signals.py
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+from catalogos.models import Horario
+from vacaciones.models import Feriado
+from .permissions import invalidar_roles
+from .workdays import invalidar_calendario
+from .workdays_sources import invalidar_feriados
+
+
+def _invalidar(invalidar):
+    # Inmediato para este proceso y de nuevo al confirmar, para que otros no lean datos viejos
+    invalidar()
+    transaction.on_commit(invalidar)
+
+
+@receiver([post_save, post_delete], dispatch_uid="core_workdays_feriado")
+def _feriado_cambio(sender, **kwargs):
+    # Sin sender fijo: calendario.Feriado es proxy y sus señales llegan con ese sender
+    if issubclass(sender, Feriado):
+        _invalidar(invalidar_feriados)  # el calendario laboral depende de esta versión
+
+
+@receiver([post_save, post_delete], sender=Horario, dispatch_uid="core_workdays_horario")
+def _horario_cambio(sender, **kwargs):
+    _invalidar(invalidar_calendario)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through, dispatch_uid="core_roles_grupos_usuario")
+def _grupos_usuario_cambio(sender, instance, action, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    # El usuario modificado en este proceso no debe seguir con sus roles memorizados
+    instance.__dict__.pop("_roles_cache", None)
+    _invalidar(invalidar_roles)
+
+
+@receiver([post_save, post_delete], sender=Group, dispatch_uid="core_roles_grupo")
+def _grupo_cambio(sender, created=False, **kwargs):
+    if not created:  # un grupo nuevo no tiene miembros; renombrar o borrar sí cambia roles
+        _invalidar(invalidar_roles)
@@ -1,3 +1,161 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+import pytest
+
+from asistencia.tests.factories import EmpleadoFactory
+from calendario.models import Feriado as FeriadoCalendario
+from catalogos.models import Horario
+from core.workdays import CalendarioLaboral, MASK_LV, _contar_lineal, dias_habiles, dias_habiles_empleado
+from core.workdays_sources import catalogo_feriados, feriados_en
+from vacaciones.models import Feriado
+
+
+def test_prefijos_coinciden_con_conteo_lineal():
+    feriados = [date(2025, 1, 1), date(2025, 2, 3), date(2025, 12, 25)]
+    cal = CalendarioLaboral(date(2024, 1, 1), date(2026, 12, 31), feriados)
+    for mask in (MASK_LV, 0b1111110, 0b1000001, 0b1111111):
+        for desde, dias in ((date(2024, 12, 20), 20), (date(2025, 1, 1), 400), (date(2025, 6, 7), 0)):
+            hasta = desde + timedelta(days=dias)
+            assert cal.contar(desde, hasta, mask) == _contar_lineal(mask, desde, hasta, feriados)
+    assert cal.contar(date(2025, 3, 2), date(2025, 3, 1)) == 0
+
+
+@pytest.mark.django_db
+def test_calendario_se_invalida_con_feriados_y_horarios():
+    hoy = date.today()
+    lunes = hoy - timedelta(days=hoy.weekday())
+    viernes = lunes + timedelta(days=4)
+    assert dias_habiles(lunes, viernes) == 5
+
+    f = Feriado.objects.create(fecha=lunes, nombre="Prueba")
+    assert dias_habiles(lunes, viernes) == 4
+    f.delete()
+    FeriadoCalendario.objects.create(fecha=viernes, nombre="Proxy")  # también vía el proxy de calendario
+    assert dias_habiles(lunes, viernes) == 4
+
+    horario = Horario.objects.create(clave="LS", nombre="Lun-Sáb", etiqueta="L-S")
+    emp = EmpleadoFactory(horario=horario)
+    assert dias_habiles_empleado(emp, lunes, lunes + timedelta(days=6)) == 4
+    horario.dias_laborables_mask = 0b1111110
+    horario.save()
+    assert dias_habiles_empleado(emp, lunes, lunes + timedelta(days=6)) == 5
+
+
+@pytest.mark.django_db
+def test_fuente_de_feriados_cacheada_y_versionada(django_assert_num_queries):
+    Feriado.objects.create(fecha=date(2025, 9, 16), nombre="Independencia")
+    Feriado.objects.create(fecha=date(2025, 11, 17), nombre="Revolución")
+
+    assert feriados_en(date(2025, 9, 1), date(2025, 11, 17)) == [date(2025, 9, 16), date(2025, 11, 17)]
+    with django_assert_num_queries(0):
+        assert feriados_en(date(2025, 10, 1), date(2025, 10, 31)) == []
+        assert catalogo_feriados().es_feriado(date(2025, 9, 16))
+
+    FeriadoCalendario.objects.filter(fecha=date(2025, 11, 17)).first().delete()
+    assert feriados_en(date(2025, 1, 1), date(2025, 12, 31)) == [date(2025, 9, 16)]
+
+
+@pytest.mark.django_db
+def test_plan_consulta_de_campos_dinamicos():
+    from rest_framework.test import APIRequestFactory
+    from rest_framework.request import Request
+
+    from core.campos import plan_consulta
+    from permisos.serializers import PermisoSerializer
+
+    def plan(**params):
+        req = Request(APIRequestFactory().get("/", params))
+        return plan_consulta(PermisoSerializer(context={"request": req}))
+
+    joins, columnas = plan(fields="id,tipo_nombre,estado")
+    assert joins == {"tipo"}
+    assert columnas == {"id", "tipo", "tipo__nombre", "estado"}
+
+    # Propiedad del modelo relacionado (nombre_completo): se cargan las columnas del empleado
+    joins, columnas = plan(fields="id", expand="empleado")
+    assert joins == {"empleado"}
+    assert {"empleado__primer_nombre", "empleado__numero_empleado"} <= columnas
+
+    # En escrituras el serializer no se recorta
+    req = Request(APIRequestFactory().post("/?fields=id"))
+    assert len(PermisoSerializer(context={"request": req}).fields) > 5
+
+
+@pytest.mark.django_db
+def test_keyset_pagination_recorre_sin_huecos_ni_repetidos(django_assert_num_queries):
+    from rest_framework.test import APIClient
+
+    from asistencia.tests.factories import UserFactory
+    from permisos.models import Permiso, TipoPermiso
+
+    tipo = TipoPermiso.objects.create(nombre="Personal")
+    emp = EmpleadoFactory()
+    base = date(2025, 3, 1)
+    # Fechas repetidas para forzar el desempate por id
+    for i in range(7):
+        Permiso.objects.create(empleado=emp, tipo=tipo, fecha_inicio=base + timedelta(days=i // 2),
+                               fecha_fin=base + timedelta(days=i // 2))
+    esperado = list(Permiso.objects.order_by("-fecha_inicio", "-id").values_list("id", flat=True))
+
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    vistos, paginas, url = [], [], "/api/v1/permisos/?cursor=&page_size=3"
+    while url:
+        with django_assert_num_queries(1):  # sin COUNT
+            r = c.get(url)
+        assert r.status_code == 200 and "count" not in r.data
+        paginas.append(r.data)
+        vistos += [p["id"] for p in r.data["results"]]
+        url = r.data["next"]
+    assert vistos == esperado
+    assert paginas[0]["previous"] is None and len(paginas) == 3
+
+    # Hacia atrás desde la última página
+    r = c.get(paginas[-1]["previous"])
+    assert [p["id"] for p in r.data["results"]] == esperado[3:6]
+    assert r.data["next"] and r.data["previous"]
+
+    # Sin ?cursor= sigue la paginación por número de página
+    r = c.get("/api/v1/permisos/", {"page": 2, "page_size": 3})
+    assert r.data["count"] == 7 and [p["id"] for p in r.data["results"]] == esperado[3:6]
+
+    assert c.get("/api/v1/permisos/", {"cursor": "basura"}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_roles_por_peticion_y_cache_invalidado_por_grupos(django_assert_num_queries):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import Group
+
+    from asistencia.tests.factories import UserFactory
+    from core.permissions import user_has_role
+
+    User = get_user_model()
+    user = UserFactory(rrhh=True)
+    assert user_has_role(user, ["rrhh"])
+    with django_assert_num_queries(0):  # memorizado en el usuario
+        assert user_has_role(user, ["RRHH", "Admin"]) and not user_has_role(user, ["Gerente"])
+
+    otro = User.objects.get(pk=user.pk)  # otra petición: sale del cache compartido
+    with django_assert_num_queries(0):
+        assert user_has_role(otro, ["RRHH"])
+
+    gerente = Group.objects.create(name="Gerente")
+    user.groups.add(gerente)
+    assert user_has_role(user, ["Gerente"])
+    assert user_has_role(User.objects.get(pk=user.pk), ["Gerente"])
+
+    gerente.user_set.remove(user)  # desde el lado del grupo
+    assert not user_has_role(User.objects.get(pk=user.pk), ["Gerente"])
+
+
+def test_check_cache_compartido_fuera_de_debug(settings):
+    from core.checks import cache_compartido
+
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    settings.DEBUG = True
+    assert cache_compartido(None) == []
+    settings.DEBUG = False
+    assert [e.id for e in cache_compartido(None)] == ["core.E001"]
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+    assert cache_compartido(None) == []
@@ -0,0 +1,51 @@
+# core/versiones.py
+"""
+Contadores de versión compartidos (vía el cache de Django) para invalidar
+caches locales de proceso: cada worker compara su versión con la compartida
+y recarga solo cuando cambió.
+
+Solo son compartidos si el cache "default" lo es (Redis/memcached, ver CACHE_URL
+en settings): con LocMemCache cada worker tiene sus propios contadores y la
+invalidación no sale del proceso que hizo el cambio. El check core.E001
+(core/checks.py) lo detecta fuera de DEBUG.
+"""
+import time
+
+from django.core.cache import cache
+
+_PREFIJO = "gv:version:"
+
+
+def _key(nombre: str) -> str:
+    return f"{_PREFIJO}{nombre}"
+
+
+def version_actual(nombre: str) -> int:
+    """Versión vigente del recurso `nombre` (1 si nunca se ha invalidado)."""
+    v = cache.get(_key(nombre))
+    if v is None:
+        cache.add(_key(nombre), 1, timeout=None)
+        v = cache.get(_key(nombre), 1)
+    return int(v)
+
+
+def versiones_actuales(nombres) -> dict:
+    """Versión vigente de varios recursos con una sola lectura al cache."""
+    nombres = list(nombres)
+    encontrados = cache.get_many([_key(n) for n in nombres])
+    res = {}
+    for n in nombres:
+        v = encontrados.get(_key(n))
+        res[n] = int(v) if v is not None else version_actual(n)
+    return res
+
+
+def incrementar_version(nombre: str) -> int:
+    """Invalida el recurso `nombre` en todos los procesos; devuelve la nueva versión."""
+    try:
+        return cache.incr(_key(nombre))
+    except ValueError:
+        # La llave no existía (o fue desalojada): usa un valor que no choque con versiones previas
+        nueva = int(time.time() * 1000)
+        cache.set(_key(nombre), nueva, timeout=None)
+        return nueva
@@ -1,28 +1,156 @@
 # core/workdays.py
+"""
+Conteo de días hábiles.
+
+CalendarioLaboral precalcula, para una ventana de varios años, sumas prefijas de
+días laborables por cada dias_laborables_mask (feriados excluidos). Contar un
+rango es entonces restar dos posiciones del arreglo, sin recorrer día por día
+ni consultar Feriado. El calendario se cachea por proceso y se reconstruye cuando
+cambia el contador "workdays" (Horario) o el de la fuente de feriados.
+"""
+import threading
 from datetime import date, timedelta
-from typing import Iterable
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from core.versiones import incrementar_version, version_actual
+from core.workdays_sources import catalogo_feriados, feriados_en
+
+VERSION_KEY = "workdays"
+MASK_LV = 0b0111110  # lun-vie (bit 0 = domingo)
+
+# Ventana precalculada alrededor del año en curso; fuera de ella se cuenta día por día
+ANIOS_ATRAS = 5
+ANIOS_ADELANTE = 3
+
 
 def _dow_bit_index(d: date) -> int:
     # domingo=0 … sábado=6
     return (d.weekday() + 1) % 7
 
+
 def fechas_en_rango(desde: date, hasta: date):
     cur = desde
     while cur <= hasta:
         yield cur
         cur = cur + timedelta(days=1)
 
-def dias_habiles_empleado(empleado, desde: date, hasta: date, feriados: Iterable[date] = ()):
-    """
-    Cuenta días hábiles en [desde, hasta] según el horario del empleado y excluye feriados.
-    """
-    mask = getattr(getattr(empleado, "horario", None), "dias_laborables_mask", 0b0111110)
+
+def _contar_lineal(mask: int, desde: date, hasta: date, feriados: Iterable[date]) -> int:
     feriados_set = set(feriados)
     total = 0
     for f in fechas_en_rango(desde, hasta):
         if f in feriados_set:
             continue
-        dow = _dow_bit_index(f)
-        if mask & (1 << dow):
+        if mask & (1 << _dow_bit_index(f)):
             total += 1
     return total
+
+
+class CalendarioLaboral:
+    """Sumas prefijas de días hábiles por máscara sobre [inicio, fin]."""
+
+    def __init__(self, inicio: date, fin: date, feriados: Iterable[date],
+                 mascaras_horario: Optional[Dict[int, int]] = None, version=0):
+        self.inicio = inicio
+        self.fin = fin
+        self.version = version
+        self.mascaras_horario = dict(mascaras_horario or {})
+
+        n = (fin - inicio).days + 1
+        self._dow = (np.arange(n) + _dow_bit_index(inicio)) % 7
+        self._habil = np.ones(n, dtype=bool)
+        for f in feriados:
+            if inicio <= f <= fin:
+                self._habil[(f - inicio).days] = False
+        self._prefijos: Dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_bd(cls, version=0, hoy: Optional[date] = None) -> "CalendarioLaboral":
+        from catalogos.models import Horario
+
+        hoy = hoy or date.today()
+        inicio = date(hoy.year - ANIOS_ATRAS, 1, 1)
+        fin = date(hoy.year + ANIOS_ADELANTE, 12, 31)
+        mascaras = dict(Horario.objects.values_list("id", "dias_laborables_mask"))
+        return cls(inicio, fin, feriados_en(inicio, fin), mascaras, version)
+
+    def _prefijo(self, mask: int) -> np.ndarray:
+        pref = self._prefijos.get(mask)
+        if pref is None:
+            with self._lock:
+                pref = self._prefijos.get(mask)
+                if pref is None:
+                    bits = np.array([(mask >> i) & 1 for i in range(7)], dtype=bool)
+                    laborable = bits[self._dow] & self._habil
+                    pref = np.concatenate(([0], np.cumsum(laborable, dtype=np.int32)))
+                    self._prefijos[mask] = pref
+        return pref
+
+    def cubre(self, desde: date, hasta: date) -> bool:
+        return self.inicio <= desde and hasta <= self.fin
+
+    def contar(self, desde: date, hasta: date, mask: int = MASK_LV) -> int:
+        """Días hábiles en [desde, hasta] (inclusive) para la máscara dada."""
+        if not desde or not hasta or hasta < desde:
+            return 0
+        if not self.cubre(desde, hasta):
+            return _contar_lineal(mask, desde, hasta, feriados_en(desde, hasta))
+        pref = self._prefijo(mask)
+        return int(pref[(hasta - self.inicio).days + 1] - pref[(desde - self.inicio).days])
+
+    def mask_de(self, empleado) -> int:
+        """Máscara del horario del empleado sin tocar la BD (usa horario_id)."""
+        horario_id = getattr(empleado, "horario_id", None)
+        if horario_id is None:
+            return MASK_LV
+        mask = self.mascaras_horario.get(horario_id)
+        if mask is None:
+            # Horario creado después de construir el calendario
+            mask = getattr(getattr(empleado, "horario", None), "dias_laborables_mask", MASK_LV)
+        return mask
+
+
+_calendario: Optional[CalendarioLaboral] = None
+_calendario_lock = threading.Lock()
+
+
+def _vigente(cal: Optional[CalendarioLaboral], version) -> bool:
+    # La ventana se recorre al cambiar de año
+    return cal is not None and cal.version == version and cal.inicio.year + ANIOS_ATRAS == date.today().year
+
+
+def calendario_laboral() -> CalendarioLaboral:
+    """Calendario vigente del proceso; se reconstruye si cambió alguna versión compartida."""
+    global _calendario
+    version = (version_actual(VERSION_KEY), catalogo_feriados().version)
+    if _vigente(_calendario, version):
+        return _calendario
+    with _calendario_lock:
+        if not _vigente(_calendario, version):
+            _calendario = CalendarioLaboral.desde_bd(version)
+        return _calendario
+
+
+def invalidar_calendario() -> None:
+    """Publica un cambio de Horario para todos los procesos."""
+    incrementar_version(VERSION_KEY)
+
+
+def dias_habiles(desde: date, hasta: date, mask: int = MASK_LV) -> int:
+    """Días hábiles en [desde, hasta] para una máscara (por defecto lun-vie), sin feriados."""
+    return calendario_laboral().contar(desde, hasta, mask)
+
+
+def dias_habiles_empleado(empleado, desde: date, hasta: date, feriados: Optional[Iterable[date]] = None):
+    """
+    Cuenta días hábiles en [desde, hasta] según el horario del empleado y excluye feriados.
+    Sin `feriados` usa el calendario precalculado; con una lista explícita cuenta día por día.
+    """
+    if feriados is not None:
+        mask = getattr(getattr(empleado, "horario", None), "dias_laborables_mask", MASK_LV)
+        return _contar_lineal(mask, desde, hasta, feriados)
+    cal = calendario_laboral()
+    return cal.contar(desde, hasta, cal.mask_de(empleado))
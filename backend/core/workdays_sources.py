@@ -1,5 +1,58 @@
 # core/workdays_sources.py
-from calendario.models import Feriado
+"""
+Fuente única de feriados para los cálculos de días hábiles.
+
+La tabla es pequeña (decenas de fechas por año), así que cada proceso la carga
+completa una vez: un arreglo ordenado (para rangos con bisect) y un set (para
+pertenencia). Se recarga cuando cambia el contador de versión "feriados", que
+incrementan las señales de Feriado (core/signals.py).
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import List, Optional
+
+from core.versiones import incrementar_version, version_actual
+
+VERSION_KEY = "feriados"
+
+
+class CatalogoFeriados:
+    def __init__(self, fechas, version: int = 0):
+        self.fechas: List[date] = sorted(set(fechas))
+        self.conjunto = frozenset(self.fechas)
+        self.version = version
+
+    def en_rango(self, desde: date, hasta: date) -> List[date]:
+        """Feriados en [desde, hasta] (inclusive), ordenados."""
+        return self.fechas[bisect_left(self.fechas, desde):bisect_right(self.fechas, hasta)]
+
+    def es_feriado(self, d: date) -> bool:
+        return d in self.conjunto
+
+
+_catalogo: Optional[CatalogoFeriados] = None
+_lock = threading.Lock()
+
+
+def catalogo_feriados() -> CatalogoFeriados:
+    """Catálogo vigente del proceso; se recarga si cambió la versión compartida."""
+    global _catalogo
+    version = version_actual(VERSION_KEY)
+    if _catalogo is not None and _catalogo.version == version:
+        return _catalogo
+    with _lock:
+        if _catalogo is None or _catalogo.version != version:
+            from vacaciones.models import Feriado  # calendario.Feriado es proxy de esta tabla
+
+            _catalogo = CatalogoFeriados(Feriado.objects.values_list("fecha", flat=True), version)
+        return _catalogo
+
+
+def invalidar_feriados() -> None:
+    """Publica un cambio de Feriado para todos los procesos."""
+    incrementar_version(VERSION_KEY)
+
 
 def feriados_en(desde, hasta):
-    return list(Feriado.objects.filter(fecha__gte=desde, fecha__lte=hasta).values_list("fecha", flat=True))
+    return catalogo_feriados().en_rango(desde, hasta)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class CuentasConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "cuentas"
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registra receivers)
@@ -0,0 +1,150 @@
+# cuentas/autenticacion.py
+"""
+JWT sin consulta a auth_user por petición.
+
+Los tokens que emite JWTObtainPairView (y cada refresh) llevan los claims
+username, is_staff, is_superuser, groups, empleado_id y rv (versión de roles,
+core.permissions.VERSION_ROLES). JWTClaimsAuthentication arma con ellos una
+instancia real de User con el resto de columnas diferidas: sirve para asignar
+FKs (creado_por=request.user), filtrar (usuario=u) y para hasattr(u, "empleado")
+sin tocar la BD; si una vista lee otra columna (email, first_name...), Django la
+carga en ese momento. usuario_completo() trae la fila entera cuando se necesita.
+
+Los claims valen lo que dura el access token (ACCESS_TOKEN_LIFETIME): un cambio
+del empleado ligado se refleja en el siguiente refresh. Los grupos del claim solo
+se usan mientras la versión de roles no haya cambiado; si cambió, se resuelven
+con core.permissions.roles_usuario (cache compartido).
+Desactivar, borrar o cambiar is_staff/is_superuser de un usuario lo revoca
+(revocar_claims, desde cuentas.signals): sus tokens emitidos antes se autentican
+contra la BD, que rechaza al inactivo o inexistente, así que no queda ventana
+mientras el cache compartido conserve la marca (dura ACCESS_TOKEN_LIFETIME).
+Los tokens sin estos claims (emitidos antes) se autentican como siempre, con la BD.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from drf_spectacular.contrib.rest_framework_simplejwt import (
+    SimpleJWTScheme,
+    TokenObtainPairSerializerExtension,
+    TokenRefreshSerializerExtension,
+)
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.permissions import VERSION_ROLES
+from core.versiones import version_actual
+from empleados.models import Empleado
+
+User = get_user_model()
+
+CAMPOS_USUARIO = ("username", "is_staff", "is_superuser")
+
+
+def agregar_claims(token, user):
+    """Claims del usuario (leídos de la BD) para el token emitido."""
+    for campo in CAMPOS_USUARIO:
+        token[campo] = getattr(user, campo)
+    token["groups"] = sorted(user.groups.values_list("name", flat=True))
+    token["empleado_id"] = Empleado.objects.filter(usuario=user).values_list("id", flat=True).first()
+    token["rv"] = version_actual(VERSION_ROLES)
+    return token
+
+
+def _llave_revocacion(user_id) -> str:
+    return f"gv:claims_revocados:{user_id}"
+
+
+def revocar_claims(user_id) -> None:
+    """Los tokens de user_id emitidos hasta ahora dejan de confiar en sus claims."""
+    vigencia = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    cache.set(_llave_revocacion(user_id), time.time(), timeout=vigencia)
+
+
+def claims_revocados(token) -> bool:
+    revocado = cache.get(_llave_revocacion(token[api_settings.USER_ID_CLAIM]))
+    return revocado is not None and token.get("iat", 0) <= revocado
+
+
+def _instancia_parcial(modelo, datos):
+    # from_db() espera los valores en el orden de los campos del modelo; lo demás queda diferido
+    campos = [f.attname for f in modelo._meta.concrete_fields if f.attname in datos]
+    return modelo.from_db(router.db_for_read(modelo), campos, [datos[c] for c in campos])
+
+
+def usuario_desde_claims(token):
+    """User con id y CAMPOS_USUARIO cargados (el resto diferido) y su empleado precargado."""
+    user = _instancia_parcial(User, {
+        User._meta.pk.attname: token[api_settings.USER_ID_CLAIM],
+        "is_active": True,  # no se emiten tokens a inactivos; desactivar revoca los claims
+        **{c: token[c] for c in CAMPOS_USUARIO},
+    })
+
+    # Reverso OneToOne (Empleado.usuario): sin empleado, hasattr(user, "empleado") es False sin consultar
+    empleado = None
+    if token.get("empleado_id") is not None:
+        empleado = _instancia_parcial(Empleado, {"id": token["empleado_id"], "usuario_id": user.pk})
+    User.empleado.related.set_cached_value(user, empleado)
+
+    if token.get("rv") == version_actual(VERSION_ROLES):
+        user._roles_cache = frozenset(g.upper() for g in token.get("groups", ()))
+    return user
+
+
+def usuario_completo(user):
+    """La fila completa del usuario si `user` viene de claims (columnas diferidas)."""
+    if user.is_authenticated and user.get_deferred_fields():
+        return User.objects.get(pk=user.pk)
+    return user
+
+
+class JWTClaimsAuthentication(JWTAuthentication):
+    """JWTAuthentication que arma el usuario desde los claims del token (ver arriba)."""
+
+    def get_user(self, validated_token):
+        if not all(c in validated_token for c in (api_settings.USER_ID_CLAIM, *CAMPOS_USUARIO)):
+            return super().get_user(validated_token)
+        if claims_revocados(validated_token):
+            return super().get_user(validated_token)  # valida is_active y existencia en la BD
+        return usuario_desde_claims(validated_token)
+
+
+class TokenConClaimsSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return agregar_claims(super().get_token(user), user)
+
+
+class TokenRefreshConClaimsSerializer(TokenRefreshSerializer):
+    """En cada refresh el access token sale con los claims vigentes en la BD."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data["access"])
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: access[api_settings.USER_ID_CLAIM]}).first()
+        if user is not None:
+            data["access"] = str(agregar_claims(access, user))
+        return data
+
+
+
+# OpenAPI: mismos esquemas que las clases de simplejwt (se registran al importar este módulo)
+class JWTClaimsScheme(SimpleJWTScheme):
+    target_class = JWTClaimsAuthentication
+
+
+class TokenConClaimsSerializerExtension(TokenObtainPairSerializerExtension):
+    target_class = TokenConClaimsSerializer
+
+    def get_name(self, auto_schema, direction):
+        return "TokenObtainPair"
+
+
+class TokenRefreshConClaimsSerializerExtension(TokenRefreshSerializerExtension):
+    target_class = TokenRefreshConClaimsSerializer
+
+    def get_name(self, auto_schema, direction):
+        return "TokenRefresh"
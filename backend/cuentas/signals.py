@@ -0,0 +1,34 @@
+# cuentas/signals.py
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, pre_save
+from django.dispatch import receiver
+
+from .autenticacion import revocar_claims
+
+User = get_user_model()
+
+# Campos que viajan en los claims y dan (o quitan) acceso por sí mismos
+CAMPOS_ACCESO = ("is_active", "is_staff", "is_superuser")
+
+
+def _revocar(user_id):
+    # Inmediato y de nuevo al confirmar: un token emitido entre ambos tampoco se confía
+    revocar_claims(user_id)
+    transaction.on_commit(lambda: revocar_claims(user_id))
+
+
+@receiver(pre_save, sender=User, dispatch_uid="cuentas_claims_usuario")
+def _usuario_cambio(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_ACCESO):
+        return  # p. ej. last_login en cada login
+    previo = sender.objects.filter(pk=instance.pk).values(*CAMPOS_ACCESO).first()
+    if previo and any(previo[c] != getattr(instance, c) for c in CAMPOS_ACCESO):
+        _revocar(instance.pk)
+
+
+@receiver(post_delete, sender=User, dispatch_uid="cuentas_claims_usuario_baja")
+def _usuario_borrado(sender, instance, **kwargs):
+    _revocar(instance.pk)
@@ -1,3 +1,96 @@
-from django.test import TestCase
+import time
 
-# Create your tests here.
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from asistencia.tests.factories import EmpleadoFactory, UserFactory
+from cuentas.autenticacion import _llave_revocacion
+
+TOKEN_URL = "/api/v1/cuentas/auth/token/"
+
+
+def _token(user):
+    r = APIClient().post(TOKEN_URL, {"username": user.username, "password": "pass123"}, format="json")
+    assert r.status_code == 200, r.content
+    return r.json()
+
+
+def _consultas_auth_user(c, url):
+    with CaptureQueriesContext(connection) as ctx:
+        r = c.get(url)
+    assert r.status_code == 200, r.content
+    return r, [q["sql"] for q in ctx.captured_queries if 'FROM "auth_user"' in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_token_lleva_claims_y_autentica_sin_leer_auth_user():
+    user = UserFactory(rrhh=True, email="ana@example.com")
+    emp = EmpleadoFactory(usuario=user)
+    tokens = _token(user)
+    claims = AccessToken(tokens["access"])
+    assert claims["username"] == user.username and claims["groups"] == ["RRHH"]
+    assert claims["empleado_id"] == emp.id and claims["is_staff"] is False
+
+    c = APIClient()
+    c.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+    # No staff: solo su expediente, resuelto con el empleado del token
+    r, consultas = _consultas_auth_user(c, "/api/v1/empleados/")
+    assert [e["id"] for e in r.data["results"]] == [emp.id]
+    assert consultas == []
+
+    # /me/ sí necesita la fila completa
+    r, consultas = _consultas_auth_user(c, "/api/v1/cuentas/auth/me/")
+    assert r.data["email"] == "ana@example.com" and r.data["groups"] == ["RRHH"]
+    assert len(consultas) == 1
+
+
+@pytest.mark.django_db
+def test_refresh_actualiza_claims_y_grupos_cambiados_no_se_confian():
+    from django.contrib.auth.models import Group
+
+    from core.permissions import user_has_role
+    from cuentas.autenticacion import usuario_desde_claims
+
+    user = UserFactory(rrhh=True)
+    tokens = _token(user)
+
+    # Cambió la pertenencia a grupos: el claim viejo ya no se usa
+    user.groups.remove(Group.objects.get(name="RRHH"))
+    assert not user_has_role(usuario_desde_claims(AccessToken(tokens["access"])), ["RRHH"])
+
+    user.is_staff = True
+    user.save()
+    r = APIClient().post(f"{TOKEN_URL}refresh/", {"refresh": tokens["refresh"]}, format="json")
+    assert r.status_code == 200, r.content
+    claims = AccessToken(r.json()["access"])
+    assert claims["is_staff"] is True and claims["groups"] == []
+
+
+@pytest.mark.django_db
+def test_desactivar_o_quitar_staff_revoca_claims_vigentes():
+    user = UserFactory(is_staff=True)
+    c = APIClient()
+    c.credentials(HTTP_AUTHORIZATION=f"Bearer {_token(user)['access']}")
+    assert c.get("/api/v1/empleados/").status_code == 200
+
+    user.is_staff = False
+    user.save()
+    # Ya no se confía en is_staff del token: se lee de la BD
+    r, consultas = _consultas_auth_user(c, "/api/v1/empleados/")
+    assert len(consultas) == 1 and r.data["results"] == []
+
+    user.is_active = False
+    user.save(update_fields=["is_active"])
+    assert c.get("/api/v1/empleados/").status_code == 401
+
+    # Un token emitido después de la revocación vuelve a confiar en sus claims
+    # (iat es en segundos: se fecha la marca antes para no depender del reloj)
+    user.is_active = True
+    user.save()
+    cache.set(_llave_revocacion(user.pk), time.time() - 5)
+    c.credentials(HTTP_AUTHORIZATION=f"Bearer {_token(user)['access']}")
+    assert _consultas_auth_user(c, "/api/v1/empleados/")[1] == []
@@ -6,6 +6,7 @@ from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiExample
 
 from core.views import HealthBaseView
+from .autenticacion import usuario_completo
 from .serializers import UserMeSerializer, PermissionSerializer
 
 User = get_user_model()
@@ -45,7 +46,8 @@ class MeView(GenericAPIView):
         ],
     )
     def get(self, request):
-        data = self.get_serializer(request.user).data
+        # Con JWTClaimsAuthentication el usuario trae columnas diferidas: una sola lectura completa
+        data = self.get_serializer(usuario_completo(request.user)).data
         return Response(data)
 
 
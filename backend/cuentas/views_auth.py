@@ -1,10 +1,13 @@
 ﻿from drf_spectacular.utils import extend_schema
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from .autenticacion import TokenConClaimsSerializer, TokenRefreshConClaimsSerializer
+
 @extend_schema(tags=["auth", "cuentas"])
 class JWTObtainPairView(TokenObtainPairView):
-    pass
+    # Claims de usuario para JWTClaimsAuthentication (ver cuentas.autenticacion)
+    serializer_class = TokenConClaimsSerializer
 
 @extend_schema(tags=["auth", "cuentas"])
 class JWTRefreshView(TokenRefreshView):
-    pass
+    serializer_class = TokenRefreshConClaimsSerializer
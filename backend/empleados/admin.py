@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from simple_history.admin import SimpleHistoryAdmin
 
-from .models import Empleado
+from .models import Empleado, EmpleadoCambio
 
 
 @admin.register(Empleado)
@@ -147,17 +147,40 @@ class EmpleadoAdmin(SimpleHistoryAdmin):
     nombre_corto.short_description = "Nombre"
 
     def mini_foto(self, obj):
-        if obj.foto:
-            return format_html('<img src="{}" style="height:40px;width:40px;object-fit:cover;border-radius:4px;" />', obj.foto.url)
+        foto = obj.foto_mini or obj.foto
+        if foto:
+            return format_html('<img src="{}" style="height:40px;width:40px;object-fit:cover;border-radius:4px;" />', foto.url)
         return "—"
     mini_foto.short_description = "Foto"
 
     def preview_foto(self, obj):
-        if obj.foto:
-            return format_html('<img src="{}" style="max-height:180px;max-width:180px;object-fit:cover;border-radius:8px;border:1px solid #ddd;" />', obj.foto.url)
+        foto = obj.foto_media or obj.foto
+        if foto:
+            return format_html('<img src="{}" style="max-height:180px;max-width:180px;object-fit:cover;border-radius:8px;border:1px solid #ddd;" />', foto.url)
         return "—"
     preview_foto.short_description = "Vista previa"
 
     def nombre_completo_admin(self, obj):
         return getattr(obj, "nombre_completo", "")
     nombre_completo_admin.short_description = "Nombre completo (auto)"
+
+
+@admin.register(EmpleadoCambio)
+class EmpleadoCambioAdmin(admin.ModelAdmin):
+    """Historial en modo delta (solo lectura)."""
+    list_display = ("fecha", "empleado", "usuario", "campos")
+    list_select_related = ("empleado", "usuario")
+    raw_id_fields = ("empleado",)
+    search_fields = ("empleado__numero_empleado",)
+    date_hierarchy = "fecha"
+    readonly_fields = ("empleado", "fecha", "usuario", "cambios")
+
+    def campos(self, obj):
+        return ", ".join(obj.cambios)
+    campos.short_description = "Campos"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
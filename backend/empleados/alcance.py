@@ -0,0 +1,82 @@
+# empleados/alcance.py
+"""
+Alcance de datos por usuario: qué empleados puede ver.
+
+- staff: todos (sin filtro);
+- rol Supervisor/Gerente (grupos, ver core.permissions) ligado a un empleado:
+  él y toda su línea de reporte (SupervisionCierre);
+- cualquier otro usuario ligado a un empleado: solo él mismo; sin empleado: nadie.
+
+El conjunto de IDs de un supervisor se guarda en el cache con la versión del
+árbol de supervisión en la llave (core.jerarquia.version_cierre): cualquier alta,
+baja o cambio de supervisor la incrementa y los conjuntos viejos dejan de
+leerse. El empleado ligado y el rol se memorizan en el objeto usuario (una petición).
+"""
+from typing import FrozenSet, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.jerarquia import ids_descendientes, version_cierre
+from core.permissions import user_has_role
+from core.versiones import version_actual
+from .models import SupervisionCierre
+
+ROLES_SUPERVISION = ("Supervisor", "Gerente")
+# Con más IDs que esto se filtra con la subconsulta a la tabla de cierre en lugar de un IN literal
+MAX_IDS_LITERALES = 1000
+
+
+def _empleado_id(user) -> Optional[int]:
+    return user.empleado.id if hasattr(user, "empleado") else None
+
+
+def _perfil(user) -> Tuple[Optional[int], bool]:
+    """(empleado ligado, tiene rol de supervisión), memorizado en el usuario."""
+    try:
+        return user._alcance_perfil
+    except AttributeError:
+        pass
+    emp_id = _empleado_id(user) if user.is_authenticated else None
+    user._alcance_perfil = (emp_id, emp_id is not None and user_has_role(user, ROLES_SUPERVISION))
+    return user._alcance_perfil
+
+
+def empleados_visibles(user) -> Optional[FrozenSet[int]]:
+    """IDs de empleado que `user` puede ver, o None si no hay restricción (staff)."""
+    if user.is_staff:
+        return None
+    emp_id, supervisa = _perfil(user)
+    if emp_id is None:
+        return frozenset()
+    if not supervisa:
+        return frozenset({emp_id})
+    llave = f"gv:alcance:{emp_id}:{version_actual(version_cierre(SupervisionCierre))}"
+    ids = cache.get(llave)
+    if ids is None:
+        ids = frozenset(ids_descendientes(SupervisionCierre, emp_id).values_list("descendiente_id", flat=True)) | {emp_id}
+        cache.set(llave, ids, timeout=getattr(settings, "EMPLEADOS_ALCANCE_TTL", 3600))
+    return ids
+
+
+def filtrar_por_alcance(qs, user, campo: str = "empleado"):
+    """Restringe `qs` a los empleados visibles; `campo` es la FK a Empleado ("id" si qs es de Empleado)."""
+    ids = empleados_visibles(user)
+    if ids is None:
+        return qs
+    filtro = "id__in" if campo == "id" else f"{campo}_id__in"
+    if len(ids) > MAX_IDS_LITERALES:
+        return qs.filter(**{filtro: ids_descendientes(SupervisionCierre, _perfil(user)[0])})
+    return qs.filter(**{filtro: ids})
+
+
+def etiqueta_alcance(user) -> str:
+    """Identifica el alcance para llaves de cache/ETag de respuestas filtradas por él."""
+    if user.is_staff:
+        return "staff"
+    emp_id, supervisa = _perfil(user)
+    if emp_id is None:
+        return "emp:-"
+    if supervisa:
+        return f"sup:{emp_id}:{version_actual(version_cierre(SupervisionCierre))}"
+    return f"emp:{emp_id}"
@@ -0,0 +1,113 @@
+# backend/empleados/busqueda.py
+"""
+Búsqueda de empleados.
+
+Empleado.busqueda guarda un texto normalizado (minúsculas, sin acentos) con
+apellidos, nombres, número, RFC, CURP, NSS y correos; lo mantiene save() y se
+puede regenerar con `manage.py reindexar_busqueda_empleados`. En PostgreSQL
+la columna tiene un índice GIN pg_trgm (LIKE '%token%' indexado) y índices
+varchar_pattern_ops para los prefijos de busqueda y numero_empleado (ver la
+migración 0004). En SQLite (tests) las mismas consultas corren sin índice.
+
+Criterio:
+- cada palabra de la consulta debe aparecer en busqueda (AND);
+- consultas cortas (< 3 caracteres) solo usan prefijos, que sí son indexables;
+- orden: número exacto, prefijo de número, prefijo de apellido y, en
+  PostgreSQL, similitud de trigramas; al final apellido/nombre.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+CAMPOS_BUSQUEDA = (
+    "apellido_paterno", "apellido_materno", "primer_nombre", "segundo_nombre",
+    "numero_empleado", "rfc", "curp", "nss", "email_personal", "email_corporativo",
+)
+MIN_TRIGRAMA = 3
+
+# Columnas del typeahead (lookup): solo lo que muestra un selector
+CAMPOS_LOOKUP = (
+    "id", "numero_empleado", "primer_nombre", "segundo_nombre", "apellido_paterno", "apellido_materno",
+    "sucursal__nombre", "puesto__nombre",
+)
+
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar(texto) -> str:
+    """Minúsculas, sin acentos ni diéresis (la ñ queda como n) y espacios simples."""
+    if not texto:
+        return ""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return _ESPACIOS.sub(" ", texto.lower()).strip()
+
+
+def texto_busqueda(empleado) -> str:
+    """Valor de Empleado.busqueda; empieza por los apellidos para que el prefijo sea útil."""
+    return normalizar(" ".join(str(getattr(empleado, c, "") or "") for c in CAMPOS_BUSQUEDA))
+
+
+def _es_postgres() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def buscar(qs, q: str, ordenar: bool = True):
+    """Filtra (y opcionalmente ordena por relevancia) un queryset de Empleado con el texto `q`."""
+    q_norm = normalizar(q)
+    if not q_norm:
+        return qs
+    q_crudo = str(q).strip()
+
+    if len(q_norm) < MIN_TRIGRAMA:
+        # Ruta rápida: solo prefijos (btree varchar_pattern_ops en PostgreSQL)
+        qs = qs.filter(Q(numero_empleado__startswith=q_crudo) | Q(busqueda__startswith=q_norm))
+    else:
+        for palabra in q_norm.split(" "):
+            qs = qs.filter(busqueda__contains=palabra)
+
+    if not ordenar:
+        return qs
+
+    qs = qs.annotate(
+        _rango=Case(
+            When(numero_empleado=q_crudo, then=Value(0)),
+            When(numero_empleado__startswith=q_crudo, then=Value(1)),
+            When(busqueda__startswith=q_norm, then=Value(2)),
+            default=Value(3),
+            output_field=IntegerField(),
+        )
+    )
+    orden = ["_rango"]
+    if _es_postgres() and len(q_norm) >= MIN_TRIGRAMA:
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        qs = qs.annotate(_similitud=TrigramSimilarity("busqueda", q_norm))
+        orden.append("-_similitud")
+    return qs.order_by(*orden, "apellido_paterno", "apellido_materno", "primer_nombre", "id")
+
+
+def sugerencias(qs, q: str, limite: int):
+    """
+    Opciones para selectores: a lo más `limite` dicts ligeros vía .values() (sin
+    instanciar modelos ni contar). Devuelve (filas, hay_mas); se lee una fila extra
+    para saber si hubo recorte.
+    """
+    qs = buscar(qs, q) if normalizar(q) else qs.order_by(
+        "apellido_paterno", "apellido_materno", "primer_nombre", "id"
+    )
+    filas = list(qs.values(*CAMPOS_LOOKUP)[:limite + 1])
+    return [
+        {
+            "id": f["id"],
+            "numero_empleado": f["numero_empleado"],
+            "nombre_completo": " ".join(filter(None, (
+                f["primer_nombre"], f["segundo_nombre"], f["apellido_paterno"], f["apellido_materno"],
+            ))),
+            "sucursal": f["sucursal__nombre"],
+            "puesto": f["puesto__nombre"],
+        }
+        for f in filas[:limite]
+    ], len(filas) > limite
@@ -0,0 +1,88 @@
+# empleados/historial.py
+"""
+Historial de Empleado con compactación y modo delta.
+
+HistoricalRecords copia la fila completa (~100 columnas) en cada save(), aunque
+no cambie nada: un PATCH vacío o que repite valores solo mueve actualizado_en.
+HistorialCompacto compara contra el estado cargado de la BD (from_db) y:
+- no escribe nada si ningún campo rastreado cambió (CAMPOS_TRAZA no cuentan);
+- con settings.EMPLEADOS_HISTORIAL_MODO = "delta", en lugar de la instantánea
+  completa guarda solo {campo: [antes, después]} en EmpleadoCambio.
+Altas y bajas siempre generan instantánea completa (la línea base de los deltas).
+Si la instancia no viene de la BD (sin estado conocido) se guarda la instantánea
+completa, como antes. Las altas/actualizaciones masivas (bulk_*_with_history) no
+pasan por aquí.
+
+La retención se maneja con `manage.py podar_historial_empleados`.
+"""
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from simple_history.models import HistoricalRecords
+
+MODO_COMPLETO = "completo"
+MODO_DELTA = "delta"
+
+# Cambian en cada save(): solos no constituyen un cambio
+CAMPOS_TRAZA = frozenset({"actualizado_en", "actualizado_por"})
+
+
+def modo_historial() -> str:
+    return getattr(settings, "EMPLEADOS_HISTORIAL_MODO", MODO_COMPLETO)
+
+
+def _valor(v):
+    # Recién cargado de la BD el archivo es str; tras accederlo, FieldFile
+    return v.name if isinstance(v, FieldFile) else v
+
+
+class HistorialCompacto(HistoricalRecords):
+    """HistoricalRecords que omite instantáneas sin cambios y soporta modo delta."""
+
+    def finalize(self, sender, **kwargs):
+        super().finalize(sender, **kwargs)
+        # finalize() recibe class_prepared de todos los modelos
+        if sender is self.cls or (self.inherit and issubclass(sender, self.cls)):
+            sender._historial = self
+
+    def campos_rastreados(self, model):
+        return [f.attname for f in self.fields_included(model) if f.name not in CAMPOS_TRAZA]
+
+    def capturar_estado(self, instance):
+        # Solo lo ya cargado: leer un campo diferido (.only()) dispararía una consulta
+        instance._estado_historial = {
+            a: _valor(instance.__dict__[a]) for a in self.campos_rastreados(instance) if a in instance.__dict__
+        }
+
+    def cambios(self, instance):
+        """{attname: [antes, después]} respecto al estado capturado, o None si no hay estado."""
+        estado = getattr(instance, "_estado_historial", None)
+        if estado is None:
+            return None
+        cambios = {}
+        for a in self.campos_rastreados(instance):
+            if a not in instance.__dict__:
+                continue  # diferido y no asignado: save() no lo escribe
+            actual = _valor(instance.__dict__[a])
+            if a not in estado or estado[a] != actual:
+                cambios[a] = [estado.get(a), actual]
+        return cambios
+
+    def post_save(self, instance, created, using=None, **kwargs):
+        if created or kwargs.get("raw", False) or hasattr(instance, "skip_history_when_saving"):
+            super().post_save(instance, created, using=using, **kwargs)
+        elif getattr(settings, "SIMPLE_HISTORY_ENABLED", True):
+            cambios = self.cambios(instance)
+            if cambios is None or (cambios and modo_historial() != MODO_DELTA):
+                self.create_historical_record(instance, "~", using=using)
+            elif cambios:
+                self.crear_delta(instance, cambios, using=using)
+        self.capturar_estado(instance)
+
+    def crear_delta(self, instance, cambios, using=None):
+        from .models import EmpleadoCambio
+
+        EmpleadoCambio.objects.using(using or instance._state.db).create(
+            empleado_id=instance.pk,
+            usuario=self.get_history_user(instance),
+            cambios=cambios,
+        )
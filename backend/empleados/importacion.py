@@ -0,0 +1,403 @@
+# backend/empleados/importacion.py
+"""
+Importación masiva de empleados desde XLSX o CSV.
+
+- Las filas se leen en streaming (openpyxl read_only / csv.reader); nunca se
+  carga el archivo completo.
+- Encabezados: nombres de campo del modelo (numero_empleado, curp, ...). Las
+  FKs de catálogo (banco, puesto, sucursal, ...) se indican por nombre o clave
+  y se resuelven con mapas precargados una sola vez; supervisor va por
+  numero_empleado.
+- Por lote: validación de campos y de CURP/RFC/NSS/CLABE/CP (core.utils), una
+  sola consulta de unicidad contra la BD y bulk_create / bulk_update con
+  historial (simple_history). Con actualizar=True los números de empleado
+  existentes se actualizan en lugar de marcarse como duplicados.
+- Un error de una fila no detiene la carga: queda en ResultadoImportacion.errores
+  como (fila, columna, mensaje) y se puede descargar como CSV.
+"""
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from catalogos.models import Banco, Departamento, Escolaridad, Estado, Horario, Puesto, Turno
+from core.utils import validar_clabe, validar_cp, validar_curp, validar_nss, validar_rfc
+from organigrama.models import Area, Sucursal, UnidadNegocio
+
+from .busqueda import normalizar, texto_busqueda
+from .models import Empleado, SupervisionCierre
+from .signals import empleados_importados
+
+LOTE = 1000
+OBLIGATORIOS = ("numero_empleado", "primer_nombre", "apellido_paterno", "curp", "rfc", "nss")
+UNICOS = ("numero_empleado", "curp", "rfc", "nss")
+
+# FK -> (modelo, columnas por las que se puede identificar)
+CATALOGOS = {
+    "banco": (Banco, ("nombre", "clave")),
+    "escolaridad": (Escolaridad, ("nombre", "clave")),
+    "unidad_negocio": (UnidadNegocio, ("nombre", "clave")),
+    "sucursal": (Sucursal, ("nombre", "clave")),
+    "area": (Area, ("nombre", "clave")),
+    "departamento": (Departamento, ("nombre", "clave")),
+    "puesto": (Puesto, ("nombre", "clave")),
+    "turno": (Turno, ("nombre", "clave")),
+    "horario": (Horario, ("nombre", "clave", "etiqueta")),
+    "nacimiento_estado": (Estado, ("nombre",)),
+    "domicilio_estado": (Estado, ("nombre",)),
+}
+
+VALIDADORES = {
+    "curp": (validar_curp, "CURP inválida."),
+    "rfc": (validar_rfc, "RFC inválido."),
+    "nss": (validar_nss, "NSS inválido (11 dígitos)."),
+    "clabe": (validar_clabe, "CLABE inválida (18 dígitos)."),
+    "codigo_postal": (validar_cp, "CP inválido (5 dígitos)."),
+}
+MAYUSCULAS = ("curp", "rfc")
+
+# Campos que no se importan (trazas, vínculo con usuario, archivos, derivados)
+EXCLUIDOS = {
+    "id", "usuario", "foto", "foto_mini", "foto_media", "busqueda",
+    "creado_en", "actualizado_en", "creado_por", "actualizado_por",
+}
+
+Error = Tuple[int, str, str]
+
+
+@dataclass
+class ResultadoImportacion:
+    total: int = 0
+    creados: int = 0
+    actualizados: int = 0
+    errores: List[Error] = field(default_factory=list)
+
+    @property
+    def filas_con_error(self) -> int:
+        return len({e[0] for e in self.errores})
+
+    def resumen(self) -> Dict:
+        return {
+            "total": self.total,
+            "creados": self.creados,
+            "actualizados": self.actualizados,
+            "filas_con_error": self.filas_con_error,
+        }
+
+
+# ----- lectura -----
+def leer_filas(archivo, nombre: str) -> Iterator[Tuple[int, Dict]]:
+    """(número de fila en el archivo, {encabezado: valor}) para XLSX o CSV."""
+    if nombre.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+        try:
+            filas = libro.worksheets[0].iter_rows(values_only=True)
+            yield from _con_encabezados(filas, inicio=1)
+        finally:
+            libro.close()
+    elif nombre.lower().endswith(".csv"):
+        texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+        try:
+            yield from _con_encabezados(csv.reader(texto), inicio=1)
+        finally:
+            texto.detach()
+    else:
+        raise ValueError("Formato no soportado: use .xlsx o .csv.")
+
+
+def _con_encabezados(filas, inicio: int):
+    encabezados = None
+    for n, fila in enumerate(filas, start=inicio):
+        if encabezados is None:
+            encabezados = [normalizar(h).replace(" ", "_") if h is not None else "" for h in fila]
+            continue
+        if not any(v not in (None, "") for v in fila):
+            continue
+        yield n, dict(zip(encabezados, fila))
+
+
+# ----- conversión -----
+def _campos_modelo() -> Dict[str, models.Field]:
+    return {
+        f.name: f for f in Empleado._meta.concrete_fields
+        if f.name not in EXCLUIDOS and not f.is_relation
+    }
+
+
+def _mapas_catalogo() -> Dict[str, Dict[str, int]]:
+    mapas, por_modelo = {}, {}
+    for fk, (modelo, columnas) in CATALOGOS.items():
+        if modelo not in por_modelo:
+            mapa = {}
+            for pk, *valores in modelo.objects.values_list("pk", *columnas):
+                for v in valores:
+                    if v:
+                        mapa.setdefault(normalizar(v), pk)
+            por_modelo[modelo] = mapa
+        mapas[fk] = por_modelo[modelo]
+    return mapas
+
+
+def _texto(valor) -> str:
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # Excel guarda números de empleado/NSS como float
+    return str(valor).strip()
+
+
+def _fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = _texto(valor)
+    for formato in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            pass
+    raise ValidationError("Fecha inválida (AAAA-MM-DD o DD/MM/AAAA).")
+
+
+class _Convertidor:
+    def __init__(self):
+        self.campos = _campos_modelo()
+        self.catalogos = _mapas_catalogo()
+
+    def convertir(self, n: int, fila: Dict) -> Tuple[Dict, Optional[str], List[Error]]:
+        """(valores por attname, numero_empleado del supervisor, errores)."""
+        valores, errores, supervisor = {}, [], None
+        for col, crudo in fila.items():
+            if not col or crudo is None or (isinstance(crudo, str) and not crudo.strip()):
+                continue
+            try:
+                if col == "supervisor":
+                    supervisor = _texto(crudo)
+                elif col in CATALOGOS:
+                    pk = self.catalogos[col].get(normalizar(_texto(crudo)))
+                    if pk is None:
+                        raise ValidationError(f"'{_texto(crudo)}' no existe en el catálogo.")
+                    valores[f"{col}_id"] = pk
+                elif col in self.campos:
+                    campo = self.campos[col]
+                    if isinstance(campo, models.DateField):
+                        valor = _fecha(crudo)
+                    elif isinstance(campo, (models.CharField, models.TextField)):
+                        valor = _texto(crudo)
+                        if col in MAYUSCULAS:
+                            valor = valor.upper()
+                    else:
+                        valor = crudo
+                    valor = campo.clean(valor, None)
+                    if col in VALIDADORES and not VALIDADORES[col][0](valor):
+                        raise ValidationError(VALIDADORES[col][1])
+                    valores[col] = valor
+            except ValidationError as e:
+                errores.append((n, col, "; ".join(e.messages)))
+        return valores, supervisor, errores
+
+
+# ----- importación -----
+def _lotes(filas: Iterable, tamano: int):
+    it = iter(filas)
+    while lote := list(islice(it, tamano)):
+        yield lote
+
+
+def importar_empleados(filas: Iterable[Tuple[int, Dict]], *, actualizar: bool = False,
+                       dry_run: bool = False, usuario=None, lote: int = LOTE) -> ResultadoImportacion:
+    """Valida e inserta/actualiza empleados por lotes; ver docstring del módulo."""
+    res = ResultadoImportacion()
+    conv = _Convertidor()
+    vistos = {c: set() for c in UNICOS}
+
+    for filas_lote in _lotes(filas, lote):
+        res.total += len(filas_lote)
+        validas = []
+        for n, fila in filas_lote:
+            valores, supervisor, errores = conv.convertir(n, fila)
+            if "numero_empleado" not in valores:
+                errores.append((n, "numero_empleado", "Campo obligatorio."))
+            # Duplicados dentro del propio archivo
+            for c in UNICOS:
+                if c in valores and valores[c] in vistos[c]:
+                    errores.append((n, c, f"'{valores[c]}' repetido en el archivo."))
+            if errores:
+                res.errores += errores
+                continue
+            for c in UNICOS:
+                if c in valores:
+                    vistos[c].add(valores[c])
+            validas.append((n, valores, supervisor))
+
+        _guardar_lote(validas, res, actualizar=actualizar, dry_run=dry_run, usuario=usuario)
+    res.errores.sort()
+    return res
+
+
+def _existentes(validas) -> Dict[str, Dict[str, int]]:
+    """{campo único: {valor: id}} para los valores del lote (una consulta)."""
+    filtro = Q()
+    for c in UNICOS:
+        filtro |= Q(**{f"{c}__in": [v[c] for _, v, _ in validas if c in v]})
+    mapa = {c: {} for c in UNICOS}
+    for pk, *valores in Empleado.objects.filter(filtro).values_list("pk", *UNICOS):
+        for c, v in zip(UNICOS, valores):
+            mapa[c][v] = pk
+    return mapa
+
+
+def _guardar_lote(validas, res: ResultadoImportacion, *, actualizar, dry_run, usuario):
+    if not validas:
+        return
+    existentes = _existentes(validas)
+    supervisores = dict(
+        Empleado.objects.filter(numero_empleado__in={s for _, _, s in validas if s})
+        .values_list("numero_empleado", "pk")
+    )
+
+    nuevos, cambios, pendientes = [], [], []  # pendientes: supervisor creado en este mismo lote
+    for n, valores, supervisor in validas:
+        pk = existentes["numero_empleado"].get(valores["numero_empleado"])
+        if pk and not actualizar:
+            res.errores.append((n, "numero_empleado", "Ya existe (use actualizar)."))
+            continue
+        if not pk:
+            faltan = [c for c in OBLIGATORIOS if c not in valores]
+            if faltan:
+                res.errores += [(n, c, "Campo obligatorio.") for c in faltan]
+                continue
+        choque = next((c for c in UNICOS[1:] if c in valores and existentes[c].get(valores[c], pk) != pk), None)
+        if choque:
+            res.errores.append((n, choque, f"'{valores[choque]}' pertenece a otro empleado."))
+            continue
+
+        emp = Empleado(pk=pk, **valores)
+        if supervisor:
+            if supervisor in supervisores:
+                emp.supervisor_id = supervisores[supervisor]
+            elif any(v["numero_empleado"] == supervisor for _, v, _ in validas):
+                pendientes.append((n, emp, supervisor))
+            else:
+                res.errores.append((n, "supervisor", f"No existe el empleado '{supervisor}'."))
+                continue
+        (cambios if pk else nuevos).append((n, emp, valores))
+
+    # bulk_update no pasa por pre_save: los ciclos contra el árbol vigente se revisan aquí
+    ciclos = _ciclos(cambios)
+    if ciclos:
+        res.errores += [(n, "supervisor", "El supervisor no puede ser el propio empleado ni un subordinado.")
+                        for n, emp, _ in cambios if emp.pk in ciclos]
+        cambios = [f for f in cambios if f[1].pk not in ciclos]
+
+    # Un supervisor del lote solo sirve si su propia fila se aceptó; descartar una fila
+    # puede dejar huérfanas a otras, por eso se repite hasta que no haya bajas.
+    while True:
+        colocados = {emp.numero_empleado for _, emp, _ in nuevos + cambios}
+        huerfanos = {id(emp) for n, emp, s in pendientes if s not in colocados}
+        if not huerfanos:
+            break
+        res.errores += [(n, "supervisor", f"No existe el empleado '{s}'.")
+                        for n, emp, s in pendientes if id(emp) in huerfanos]
+        nuevos = [f for f in nuevos if id(f[1]) not in huerfanos]
+        cambios = [f for f in cambios if id(f[1]) not in huerfanos]
+        pendientes = [f for f in pendientes if id(f[1]) not in huerfanos]
+    pendientes = [(emp, s) for _, emp, s in pendientes]
+
+    if dry_run:
+        res.creados += len(nuevos)
+        res.actualizados += len(cambios)
+        return
+
+    try:
+        with transaction.atomic():
+            _escribir(nuevos, cambios, pendientes, usuario)
+    except (IntegrityError, ValueError) as e:
+        # Carrera con otra alta o ciclo dentro del mismo lote (lo detecta el cierre):
+        # se reporta el lote completo, el resto de la carga sigue
+        res.errores += [(n, "", f"Lote no guardado: {e}") for n, _, _ in nuevos + cambios]
+        return
+    res.creados += len(nuevos)
+    res.actualizados += len(cambios)
+
+
+def _ciclos(cambios) -> set:
+    """IDs de empleados existentes cuyo nuevo supervisor es él mismo o uno de sus subordinados."""
+    pares = [(emp.pk, emp.supervisor_id) for _, emp, _ in cambios if emp.supervisor_id]
+    if not pares:
+        return set()
+    filtro = Q()
+    for pk, sup in pares:
+        filtro |= Q(ancestro_id=pk, descendiente_id=sup)
+    ciclos = {pk for pk, sup in pares if pk == sup}
+    ciclos |= set(SupervisionCierre.objects.filter(filtro).values_list("ancestro_id", flat=True))
+    return ciclos
+
+
+def _escribir(nuevos, cambios, pendientes, usuario):
+    previos = {}
+    if nuevos:
+        objs = []
+        for _, emp, _ in nuevos:
+            emp.creado_por = emp.actualizado_por = usuario
+            emp.busqueda = texto_busqueda(emp)
+            objs.append(emp)
+        bulk_create_with_history(objs, Empleado, batch_size=LOTE, default_user=usuario)
+        if not all(o.pk for o in objs):
+            # Backends sin RETURNING: recupera los IDs por número de empleado
+            ids = dict(Empleado.objects.filter(numero_empleado__in=[o.numero_empleado for o in objs])
+                       .values_list("numero_empleado", "pk"))
+            for o in objs:
+                o.pk = ids[o.numero_empleado]
+
+    if cambios:
+        # Solo se tocan las columnas presentes en el archivo
+        campos = sorted({c for _, _, v in cambios for c in v} | {"busqueda", "actualizado_por"})
+        if any(emp.supervisor_id for _, emp, _ in cambios) or pendientes:
+            campos.append("supervisor_id")
+        actuales = Empleado.objects.in_bulk([emp.pk for _, emp, _ in cambios])
+        objs = []
+        for _, emp, valores in cambios:
+            obj = actuales[emp.pk]
+            previos[obj.pk] = {c: getattr(obj, c) for c in campos}
+            for c, v in valores.items():
+                setattr(obj, c, v)
+            if emp.supervisor_id:
+                obj.supervisor_id = emp.supervisor_id
+            obj.actualizado_por = usuario
+            obj.busqueda = texto_busqueda(obj)
+            objs.append(obj)
+            # Los pendientes apuntan a la instancia que realmente se guarda
+            pendientes = [(obj if p is emp else p, s) for p, s in pendientes]
+        bulk_update_with_history(objs, Empleado, campos, batch_size=LOTE, default_user=usuario)
+        cambios = [(n, obj, v) for (n, _, v), obj in zip(cambios, objs)]
+
+    if pendientes:
+        ids = dict(Empleado.objects.filter(numero_empleado__in={s for _, s in pendientes})
+                   .values_list("numero_empleado", "pk"))
+        for emp, supervisor in pendientes:
+            emp.supervisor_id = ids[supervisor]
+        Empleado.objects.bulk_update([e for e, _ in pendientes], ["supervisor"], batch_size=LOTE)
+
+    empleados_importados.send(
+        sender=Empleado,
+        creados=[emp for _, emp, _ in nuevos],
+        actualizados=[emp for _, emp, _ in cambios],
+        previos=previos,
+    )
+
+
+def reporte_csv(errores: Iterable[Error]) -> Iterator[List]:
+    """Filas del reporte de errores descargable."""
+    yield ["fila", "columna", "error"]
+    yield from ([n, c, m] for n, c, m in errores)
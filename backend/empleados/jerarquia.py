@@ -0,0 +1,35 @@
+# empleados/jerarquia.py
+"""
+Filtros por subárbol organizacional, compartidos por EmpleadoViewSet y el calendario:
+- ?bajo_area=<id>: empleados del área y de todas sus subáreas;
+- ?bajo_supervisor=<id>[&profundidad=<n>]: toda la línea de reporte del supervisor
+  (él no se incluye); profundidad=1 son solo sus reportes directos.
+Cada filtro es un IN sobre la tabla de cierre correspondiente (ver core.jerarquia).
+"""
+from rest_framework.exceptions import ValidationError
+
+from core.jerarquia import ids_descendientes
+from organigrama.models import AreaCierre
+from .models import SupervisionCierre
+
+PARAMETROS = ("bajo_area", "bajo_supervisor", "profundidad")
+
+
+def _entero(params, nombre):
+    valor = params.get(nombre)
+    if not valor:
+        return None
+    if not str(valor).isdigit():
+        raise ValidationError({nombre: ["Debe ser un entero positivo."]})
+    return int(valor)
+
+
+def filtrar_por_jerarquia(qs, params):
+    area = _entero(params, "bajo_area")
+    supervisor = _entero(params, "bajo_supervisor")
+    if area is not None:
+        qs = qs.filter(area_id__in=ids_descendientes(AreaCierre, area))
+    if supervisor is not None:
+        profundidad = _entero(params, "profundidad")
+        qs = qs.filter(id__in=ids_descendientes(SupervisionCierre, supervisor, profundidad, incluir_propio=False))
+    return qs
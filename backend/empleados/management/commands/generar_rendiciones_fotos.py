@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from asistencia.models import Checada
+from core.imagenes import generar_rendiciones
+from empleados.models import Empleado
+
+
+class Command(BaseCommand):
+    help = "Genera las rendiciones (mini/media) de fotos de empleados y checadas que aún no las tienen."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--todas", action="store_true", help="Regenera también las que ya tienen rendiciones.")
+        parser.add_argument("--sin-checadas", action="store_true", help="Solo fotos de empleados.")
+
+    def handle(self, *args, **opts):
+        modelos = [Empleado] if opts["sin_checadas"] else [Empleado, Checada]
+        for modelo in modelos:
+            qs = modelo.objects.exclude(foto="").exclude(foto__isnull=True)
+            if not opts["todas"]:
+                qs = qs.filter(foto_mini__in=["", None])
+            hechas = fallidas = 0
+            for obj in qs.only("id", "foto", "foto_mini", "foto_media").iterator(chunk_size=200):
+                if generar_rendiciones(obj, "foto"):
+                    # update() directo: no dispara save()/historial ni reprocesa el original
+                    modelo.objects.filter(pk=obj.pk).update(foto_mini=obj.foto_mini.name, foto_media=obj.foto_media.name)
+                    hechas += 1
+                else:
+                    fallidas += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"{modelo._meta.verbose_name_plural}: {hechas} con rendiciones, {fallidas} sin imagen legible"
+            ))
@@ -0,0 +1,56 @@
+import csv
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from empleados.importacion import LOTE, importar_empleados, leer_filas, reporte_csv
+
+
+class Command(BaseCommand):
+    help = "Importa empleados desde un archivo .xlsx o .csv (alta masiva o actualización)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Ruta al .xlsx o .csv.")
+        parser.add_argument("--actualizar", action="store_true",
+                            help="Actualiza los números de empleado que ya existen.")
+        parser.add_argument("--dry-run", action="store_true", help="Solo valida; no guarda.")
+        parser.add_argument("--reporte", help="Ruta del CSV con los errores por fila.")
+        parser.add_argument("--usuario", help="username que queda como creado_por/actualizado_por.")
+        parser.add_argument("--lote", type=int, default=LOTE, help="Filas por lote.")
+
+    def handle(self, *args, **opts):
+        ruta = Path(opts["archivo"])
+        if not ruta.exists():
+            raise CommandError(f"No existe {ruta}.")
+        usuario = None
+        if opts.get("usuario"):
+            usuario = get_user_model().objects.filter(username=opts["usuario"]).first()
+            if usuario is None:
+                raise CommandError(f"No existe el usuario {opts['usuario']}.")
+
+        with ruta.open("rb") as f:
+            try:
+                res = importar_empleados(
+                    leer_filas(f, ruta.name),
+                    actualizar=opts["actualizar"],
+                    dry_run=opts["dry_run"],
+                    usuario=usuario,
+                    lote=opts["lote"],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        if opts.get("reporte"):
+            with open(opts["reporte"], "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerows(reporte_csv(res.errores))
+        else:
+            for n, col, msg in res.errores[:50]:
+                self.stdout.write(self.style.WARNING(f"Fila {n} [{col or '-'}]: {msg}"))
+
+        r = res.resumen()
+        texto = (f"Filas: {r['total']}, creados: {r['creados']}, actualizados: {r['actualizados']}, "
+                 f"con error: {r['filas_con_error']}")
+        if opts["dry_run"]:
+            texto += " (dry-run, no se guardó nada)"
+        self.stdout.write(self.style.SUCCESS(texto))
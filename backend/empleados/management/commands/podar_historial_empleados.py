@@ -0,0 +1,88 @@
+import gzip
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from empleados.historial import CAMPOS_TRAZA
+from empleados.models import Empleado, EmpleadoCambio
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina (opcionalmente archiva en JSONL) el historial de empleados anterior al horizonte de "
+        "retención, por lotes. Conserva la última instantánea de cada empleado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias", type=int, default=settings.EMPLEADOS_HISTORIAL_RETENCION_DIAS,
+            help="Antigüedad mínima (días) de lo que se poda.",
+        )
+        parser.add_argument("--archivo", help="Archiva las filas antes de borrarlas (JSONL; .gz comprime).")
+        parser.add_argument("--lote", type=int, default=2000, help="Filas por lote de borrado.")
+        parser.add_argument("--dry-run", action="store_true", help="Solo cuenta, no borra.")
+        parser.add_argument(
+            "--compactar", action="store_true",
+            help="Antes de podar, elimina instantáneas consecutivas idénticas (ignora "
+                 + ", ".join(sorted(CAMPOS_TRAZA)) + ").",
+        )
+
+    def handle(self, *args, **opts):
+        limite = timezone.now() - timedelta(days=opts["dias"])
+        if opts["compactar"]:
+            args = ["empleados.Empleado", "--excluded_fields", *sorted(CAMPOS_TRAZA)]
+            if opts["dry_run"]:
+                args.append("--dry")
+            call_command("clean_duplicate_history", *args, stdout=self.stdout)
+
+        historico = Empleado.history.model
+        # La última instantánea de cada empleado es la línea base de lo que sigue: no se borra
+        conservar = set(historico.objects.values("id").annotate(m=Max("history_id")).values_list("m", flat=True))
+
+        archivo = None
+        if opts["archivo"] and not opts["dry_run"]:
+            abrir = gzip.open if opts["archivo"].endswith(".gz") else open
+            archivo = abrir(opts["archivo"], "at", encoding="utf-8")
+        try:
+            instantaneas = self._podar(
+                historico.objects.filter(history_date__lt=limite), "history_id", conservar, archivo, opts,
+                "historicalempleado",
+            )
+            deltas = self._podar(
+                EmpleadoCambio.objects.filter(fecha__lt=limite), "id", set(), archivo, opts, "empleadocambio",
+            )
+        finally:
+            if archivo:
+                archivo.close()
+
+        accion = "por podar" if opts["dry_run"] else "podados"
+        self.stdout.write(self.style.SUCCESS(
+            f"Historial anterior a {limite:%Y-%m-%d}: {instantaneas} instantáneas y {deltas} cambios {accion}"
+        ))
+
+    def _podar(self, qs, pk, conservar, archivo, opts, tabla) -> int:
+        # Recorrido por rangos de PK: cada lote es un índice + LIMIT, sin OFFSET
+        total, ultimo = 0, 0
+        while True:
+            filas = list(qs.filter(**{f"{pk}__gt": ultimo}).order_by(pk).values()[: opts["lote"]])
+            if not filas:
+                return total
+            ultimo = filas[-1][pk]
+            filas = [f for f in filas if f[pk] not in conservar]
+            if not filas:
+                continue
+            total += len(filas)
+            if opts["dry_run"]:
+                continue
+            with transaction.atomic():
+                if archivo:
+                    for f in filas:
+                        archivo.write(json.dumps({"tabla": tabla, **f}, cls=DjangoJSONEncoder) + "\n")
+                qs.model.objects.filter(**{f"{pk}__in": [f[pk] for f in filas]}).delete()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.jerarquia import publicar_cambio, reconstruir
+from empleados.models import Empleado, SupervisionCierre
+from organigrama.models import Area, AreaCierre
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera las tablas de cierre de áreas (Area.parent) y supervisión (Empleado.supervisor) "
+        "tras cambios que no pasan por save() (.update(), SQL directo)."
+    )
+
+    def handle(self, *args, **opts):
+        with transaction.atomic():
+            areas = reconstruir(AreaCierre, dict(Area.objects.values_list("id", "parent_id")))
+            lineas = reconstruir(SupervisionCierre, dict(Empleado.objects.values_list("id", "supervisor_id")))
+            publicar_cambio(AreaCierre)
+            publicar_cambio(SupervisionCierre)
+        self.stdout.write(self.style.SUCCESS(f"Filas de cierre: áreas {areas}, supervisión {lineas}"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from empleados.busqueda import CAMPOS_BUSQUEDA, texto_busqueda
+from empleados.models import Empleado
+
+
+class Command(BaseCommand):
+    help = "Regenera Empleado.busqueda (tras cargas con .update()/bulk_update que no pasan por save())."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=2000, help="Registros por bulk_update.")
+
+    def handle(self, *args, **opts):
+        lote_max = opts["lote"]
+        qs = Empleado.objects.order_by("id").only("id", "busqueda", *CAMPOS_BUSQUEDA)
+        revisados = cambiados = 0
+        lote = []
+        for emp in qs.iterator(chunk_size=lote_max):
+            revisados += 1
+            nuevo = texto_busqueda(emp)
+            if nuevo != emp.busqueda:
+                emp.busqueda = nuevo
+                lote.append(emp)
+            if len(lote) >= lote_max:
+                cambiados += Empleado.objects.bulk_update(lote, ["busqueda"])
+                lote = []
+        if lote:
+            cambiados += Empleado.objects.bulk_update(lote, ["busqueda"])
+
+        self.stdout.write(self.style.SUCCESS(f"Empleados revisados: {revisados}, actualizados: {cambiados}"))
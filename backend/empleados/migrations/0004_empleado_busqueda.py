@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:45
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+LOTE = 2000
+
+# Copia congelada de empleados.busqueda a la fecha de esta migración: si el
+# módulo cambia después, esta migración debe seguir produciendo lo mismo.
+CAMPOS_BUSQUEDA = (
+    "apellido_paterno", "apellido_materno", "primer_nombre", "segundo_nombre",
+    "numero_empleado", "rfc", "curp", "nss", "email_personal", "email_corporativo",
+)
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar(texto) -> str:
+    if not texto:
+        return ""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return _ESPACIOS.sub(" ", texto.lower()).strip()
+
+
+def texto_busqueda(empleado) -> str:
+    return normalizar(" ".join(str(getattr(empleado, c, "") or "") for c in CAMPOS_BUSQUEDA))
+
+
+# Solo PostgreSQL: LIKE '%token%' indexado con pg_trgm y prefijos con varchar_pattern_ops
+SQL_INDICES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS empleados_empleado_busqueda_trgm "
+    "ON empleados_empleado USING gin (busqueda gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS empleados_empleado_busqueda_prefijo "
+    "ON empleados_empleado (busqueda text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS empleados_empleado_numero_prefijo "
+    "ON empleados_empleado (numero_empleado varchar_pattern_ops)",
+]
+SQL_BORRAR = [
+    "DROP INDEX IF EXISTS empleados_empleado_busqueda_trgm",
+    "DROP INDEX IF EXISTS empleados_empleado_busqueda_prefijo",
+    "DROP INDEX IF EXISTS empleados_empleado_numero_prefijo",
+]
+
+
+def llenar_busqueda(apps, schema_editor):
+    Empleado = apps.get_model("empleados", "Empleado")
+    qs = Empleado.objects.order_by("id").only("id", *CAMPOS_BUSQUEDA)
+    lote = []
+    for emp in qs.iterator(chunk_size=LOTE):
+        emp.busqueda = texto_busqueda(emp)
+        lote.append(emp)
+        if len(lote) >= LOTE:
+            Empleado.objects.bulk_update(lote, ["busqueda"])
+            lote = []
+    if lote:
+        Empleado.objects.bulk_update(lote, ["busqueda"])
+
+
+def _ejecutar(sentencias):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for sql in sentencias:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0003_empleado_empleados_e_estatus_4edbd0_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empleado',
+            name='busqueda',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(llenar_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(_ejecutar(SQL_INDICES), _ejecutar(SQL_BORRAR)),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:59
+
+import empleados.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0004_empleado_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empleado',
+            name='foto_media',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to=empleados.models.foto_upload_path),
+        ),
+        migrations.AddField(
+            model_name='empleado',
+            name='foto_mini',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to=empleados.models.foto_upload_path),
+        ),
+    ]
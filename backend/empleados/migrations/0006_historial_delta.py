@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:06
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0005_rendiciones_foto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmpleadoCambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('cambios', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cambios', to='empleados.empleado')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Cambio de empleado',
+                'verbose_name_plural': 'Cambios de empleados',
+                'ordering': ('-fecha', '-id'),
+                'indexes': [models.Index(fields=['empleado', '-fecha'], name='empleados_e_emplead_b6e2b3_idx'), models.Index(fields=['fecha'], name='empleados_e_fecha_3c1298_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from core.jerarquia import reconstruir
+
+
+def llenar_cierre(apps, schema_editor):
+    Empleado = apps.get_model("empleados", "Empleado")
+    SupervisionCierre = apps.get_model("empleados", "SupervisionCierre")
+    reconstruir(SupervisionCierre, dict(Empleado.objects.values_list("id", "supervisor_id")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0006_historial_delta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupervisionCierre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profundidad', models.PositiveSmallIntegerField()),
+                ('ancestro', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='empleados.empleado')),
+                ('descendiente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='empleados.empleado')),
+            ],
+            options={
+                'verbose_name': 'Línea de supervisión',
+                'verbose_name_plural': 'Líneas de supervisión',
+                'constraints': [models.UniqueConstraint(fields=('ancestro', 'descendiente'), name='uniq_supervision_cierre')],
+            },
+        ),
+        migrations.RunPython(llenar_cierre, migrations.RunPython.noop),
+    ]
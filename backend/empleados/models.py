@@ -2,8 +2,9 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.contrib.auth import get_user_model
-from simple_history.models import HistoricalRecords
+from django.core.serializers.json import DjangoJSONEncoder
 
+from core.imagenes import procesar_foto
 from core.utils import validar_curp, validar_rfc, validar_nss, validar_clabe, validar_cp
 from catalogos.models import (
     Banco, Escolaridad, Estado as CatEstado, Municipio as CatMunicipio,
@@ -11,6 +12,8 @@ from catalogos.models import (
 )
 from organigrama.models import UnidadNegocio, Sucursal, Area
 
+from .historial import HistorialCompacto
+
 User = get_user_model()
 
 
@@ -159,6 +162,9 @@ class Empleado(models.Model):
 
     # Foto
     foto = models.ImageField(upload_to=foto_upload_path, null=True, blank=True)
+    # Rendiciones generadas al subir la foto (core.imagenes)
+    foto_mini = models.ImageField(upload_to=foto_upload_path, null=True, blank=True, editable=False)
+    foto_media = models.ImageField(upload_to=foto_upload_path, null=True, blank=True, editable=False)
 
     # ==== Vínculo con usuario (1 a 1) ====
     usuario = models.OneToOneField(
@@ -175,7 +181,11 @@ class Empleado(models.Model):
         User, on_delete=models.SET_NULL, null=True, blank=True, related_name="empleados_actualizados"
     )
 
-    history = HistoricalRecords(inherit=True)
+    # Texto normalizado para búsqueda (ver empleados.busqueda); lo mantiene save()
+    busqueda = models.TextField(editable=False, default="")
+
+    # Sin instantánea si no hubo cambios; modo delta opcional (ver empleados.historial)
+    history = HistorialCompacto(inherit=True, excluded_fields=["busqueda", "foto_mini", "foto_media"])
 
     class Meta:
         ordering = ("apellido_paterno", "apellido_materno", "primer_nombre")
@@ -212,6 +222,27 @@ class Empleado(models.Model):
             from django.core.exceptions import ValidationError
             raise ValidationError(errors)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super().from_db(db, field_names, values)
+        cls._historial.capturar_estado(obj)
+        return obj
+
+    def save(self, *args, **kwargs):
+        from .busqueda import CAMPOS_BUSQUEDA, texto_busqueda
+
+        self.busqueda = texto_busqueda(self)
+        procesar_foto(self, "foto")
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if update_fields & set(CAMPOS_BUSQUEDA):
+                update_fields.add("busqueda")
+            if "foto" in update_fields:
+                update_fields |= {"foto_mini", "foto_media"}
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
     # ===== Presentación =====
     @property
     def nombre_completo(self):
@@ -254,3 +285,50 @@ class Empleado(models.Model):
     @activo.setter
     def activo(self, value: bool):
         self.estatus = "A" if value else "B"
+
+
+class EmpleadoCambio(models.Model):
+    """Historial en modo delta: solo los campos que cambiaron en una edición (ver empleados.historial)."""
+
+    empleado = models.ForeignKey(Empleado, on_delete=models.CASCADE, related_name="cambios")
+    fecha = models.DateTimeField(auto_now_add=True)
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    # {campo (attname): [antes, después]}
+    cambios = models.JSONField(encoder=DjangoJSONEncoder)
+
+    class Meta:
+        ordering = ("-fecha", "-id")
+        verbose_name = "Cambio de empleado"
+        verbose_name_plural = "Cambios de empleados"
+        indexes = [
+            models.Index(fields=["empleado", "-fecha"]),
+            models.Index(fields=["fecha"]),
+        ]
+
+    def __str__(self):
+        return f"{self.empleado_id} @ {self.fecha:%Y-%m-%d %H:%M}: {', '.join(self.cambios)}"
+
+
+class SupervisionCierre(models.Model):
+    """Tabla de cierre de Empleado.supervisor: una fila por par (ancestro, descendiente), ver core.jerarquia."""
+
+    ancestro = models.ForeignKey(Empleado, on_delete=models.CASCADE, related_name="+")
+    descendiente = models.ForeignKey(Empleado, on_delete=models.CASCADE, related_name="+")
+    profundidad = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = "Línea de supervisión"
+        verbose_name_plural = "Líneas de supervisión"
+        constraints = [
+            models.UniqueConstraint(fields=["ancestro", "descendiente"], name="uniq_supervision_cierre"),
+        ]
+
+
+def subordinados(empleado, profundidad=None):
+    """Empleados bajo `empleado` (directos = profundidad 1; None = toda la línea)."""
+    from core.jerarquia import ids_descendientes
+
+    empleado_id = getattr(empleado, "pk", empleado)
+    return Empleado.objects.filter(
+        id__in=ids_descendientes(SupervisionCierre, empleado_id, profundidad, incluir_propio=False)
+    )
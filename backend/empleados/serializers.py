@@ -1,8 +1,46 @@
 from rest_framework import serializers
-from .models import Empleado
 
+from core.campos import CamposDinamicosMixin
+from core.jerarquia import es_descendiente
+from .models import Empleado, SupervisionCierre
+
+
+class CatalogoBreveSerializer(serializers.Serializer):
+    """Forma expandida (?expand=) de catálogos y unidades organizacionales."""
+    id = serializers.IntegerField(read_only=True)
+    clave = serializers.CharField(read_only=True)
+    nombre = serializers.CharField(read_only=True)
+
+
+class HorarioBreveSerializer(CatalogoBreveSerializer):
+    etiqueta = serializers.CharField(read_only=True)
+
+
+class EmpleadoBreveSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    numero_empleado = serializers.CharField(read_only=True)
+    nombre_completo = serializers.CharField(read_only=True)
+
+
+class UsuarioBreveSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(read_only=True)
+    email = serializers.EmailField(read_only=True)
+
+
+class EmpleadoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """Admite ?fields=a,b,c y ?expand=sucursal,puesto,... (ver core.campos)."""
+
+    expandibles = {
+        **{c: CatalogoBreveSerializer for c in (
+            "banco", "escolaridad", "unidad_negocio", "sucursal", "area",
+            "departamento", "puesto", "turno",
+        )},
+        "horario": HorarioBreveSerializer,
+        "supervisor": EmpleadoBreveSerializer,
+        "usuario": UsuarioBreveSerializer,
+    }
 
-class EmpleadoSerializer(serializers.ModelSerializer):
     # Lecturas amigables de FKs
     banco_nombre = serializers.CharField(source="banco.nombre", read_only=True)
     escolaridad_nombre = serializers.CharField(source="escolaridad.nombre", read_only=True)
@@ -27,7 +65,7 @@ class EmpleadoSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Empleado
-        fields = "__all__"
+        exclude = ("busqueda",)
         read_only_fields = (
             "creado_en",
             "actualizado_en",
@@ -36,8 +74,27 @@ class EmpleadoSerializer(serializers.ModelSerializer):
             "usuario",  # <- importantísimo: no editable desde API
         )
 
+    def validate_supervisor(self, value):
+        if value and self.instance and es_descendiente(SupervisionCierre, value.pk, self.instance.pk):
+            raise serializers.ValidationError("El supervisor no puede ser el propio empleado ni un subordinado.")
+        return value
+
 
 class EmpleadoFotoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Empleado
-        fields = ("id", "numero_empleado", "foto")
+        fields = ("id", "numero_empleado", "foto", "foto_mini", "foto_media")
+        read_only_fields = ("foto_mini", "foto_media")
+
+
+class EmpleadoLookupSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    numero_empleado = serializers.CharField()
+    nombre_completo = serializers.CharField()
+    sucursal = serializers.CharField(allow_null=True)
+    puesto = serializers.CharField(allow_null=True)
+
+
+class EmpleadoLookupResponseSerializer(serializers.Serializer):
+    results = EmpleadoLookupSerializer(many=True)
+    truncado = serializers.BooleanField(help_text="Hay más coincidencias que el límite; refinar la búsqueda.")
@@ -0,0 +1,49 @@
+# backend/empleados/signals.py
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from core.jerarquia import enlazar, enlazar_varios, es_descendiente, mover
+from .models import Empleado, SupervisionCierre
+
+# Cargas masivas (empleados.importacion) que no pasan por save()/post_save.
+# kwargs: creados=[Empleado], actualizados=[Empleado], previos={id: {attname: valor anterior}}
+empleados_importados = Signal()
+
+
+# ===== Tabla de cierre de supervisión (SupervisionCierre) =====
+@receiver(pre_save, sender=Empleado, dispatch_uid="empleados_supervisor_previo")
+def _supervisor_previo(sender, instance, update_fields=None, **kwargs):
+    if not instance.pk or (update_fields is not None and not {"supervisor", "supervisor_id"} & set(update_fields)):
+        instance._supervisor_previo = instance.supervisor_id
+        return
+    instance._supervisor_previo = sender.objects.filter(pk=instance.pk).values_list("supervisor_id", flat=True).first()
+    if instance.supervisor_id and instance.supervisor_id != instance._supervisor_previo:
+        if es_descendiente(SupervisionCierre, instance.supervisor_id, instance.pk):
+            raise ValidationError({"supervisor": "El supervisor no puede ser el propio empleado ni un subordinado."})
+
+
+@receiver(post_save, sender=Empleado, dispatch_uid="empleados_supervision_cierre")
+def _supervision_cierre(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        enlazar(SupervisionCierre, instance.pk, instance.supervisor_id)
+    elif instance.supervisor_id != getattr(instance, "_supervisor_previo", instance.supervisor_id):
+        mover(SupervisionCierre, instance.pk, instance.supervisor_id)
+
+
+@receiver(pre_delete, sender=Empleado, dispatch_uid="empleados_supervision_baja")
+def _supervision_baja(sender, instance, **kwargs):
+    # supervisor es SET_NULL: los reportes directos quedan como raíz con su subárbol
+    for hijo_id in sender.objects.filter(supervisor_id=instance.pk).values_list("id", flat=True):
+        mover(SupervisionCierre, hijo_id, None)
+
+
+@receiver(empleados_importados, dispatch_uid="empleados_supervision_importacion")
+def _supervision_importacion(sender, creados, actualizados, previos, **kwargs):
+    enlazar_varios(SupervisionCierre, [(e.pk, e.supervisor_id) for e in creados])
+    for emp in actualizados:
+        previo = previos.get(emp.pk, {}).get("supervisor_id", emp.supervisor_id)
+        if previo != emp.supervisor_id:
+            mover(SupervisionCierre, emp.pk, emp.supervisor_id)
@@ -1,3 +1,488 @@
-from django.test import TestCase
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from asistencia.tests.factories import EmpleadoFactory, UserFactory
+from empleados.busqueda import buscar, normalizar
+from empleados.models import Empleado
+
+URL = "/api/v1/empleados/"
+
+
+def test_normalizar_quita_acentos_y_espacios():
+    assert normalizar("  José   NÚÑEZ  Güemes ") == "jose nunez guemes"
+    assert normalizar(None) == ""
+
+
+@pytest.mark.django_db
+def test_busqueda_se_mantiene_en_save():
+    emp = EmpleadoFactory(primer_nombre="María", apellido_paterno="Núñez", numero_empleado="A100")
+    assert emp.busqueda.startswith("nunez ")
+    assert "maria" in emp.busqueda and "a100" in emp.busqueda
+
+    emp.apellido_paterno = "Ortíz"
+    emp.save(update_fields=["apellido_paterno"])
+    emp.refresh_from_db()
+    assert emp.busqueda.startswith("ortiz ")
+
+
+@pytest.mark.django_db
+def test_buscar_todas_las_palabras_sin_acentos_y_rango():
+    a = EmpleadoFactory(primer_nombre="José", apellido_paterno="Núñez", numero_empleado="1200")
+    b = EmpleadoFactory(primer_nombre="Ana", apellido_paterno="Gómez", numero_empleado="12")
+    c = EmpleadoFactory(primer_nombre="José", apellido_paterno="Ramírez", numero_empleado="3000", estatus="B")
+
+    assert list(buscar(Empleado.objects.all(), "jose NUNEZ")) == [a]
+    assert set(buscar(Empleado.objects.all(), "josé")) == {a, c}  # incluye bajas
+    # Prefijo corto: número exacto primero, luego prefijo de número
+    assert list(buscar(Empleado.objects.all(), "12")) == [b, a]
+    assert list(buscar(Empleado.objects.all(), "go")) == [b]
+
+
+@pytest.mark.django_db
+def test_api_search_usa_indice_y_respeta_ordering():
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    a = EmpleadoFactory(primer_nombre="Lucía", apellido_paterno="Zamora", numero_empleado="500")
+    b = EmpleadoFactory(primer_nombre="Lucia", apellido_paterno="Álvarez", numero_empleado="900")
+    EmpleadoFactory(primer_nombre="Pedro", apellido_paterno="Álvarez")
+
+    r = c.get(URL, {"search": "lucia"})
+    assert r.status_code == 200
+    ids = [e["id"] for e in r.data["results"]]
+    assert set(ids) == {a.id, b.id}
+    assert "busqueda" not in r.data["results"][0]
+
+    r = c.get(URL, {"search": "lucia", "ordering": "-numero_empleado"})
+    assert [e["id"] for e in r.data["results"]] == [b.id, a.id]
+
+
+@pytest.mark.django_db
+def test_reindexar_busqueda():
+    emp = EmpleadoFactory(apellido_paterno="Peña")
+    Empleado.objects.filter(pk=emp.pk).update(apellido_paterno="Luna")
+    call_command("reindexar_busqueda_empleados")
+    emp.refresh_from_db()
+    assert emp.busqueda.startswith("luna ")
+
+
+@pytest.mark.django_db
+def test_lookup_ligero_con_limite(django_assert_max_num_queries):
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    for i in range(5):
+        EmpleadoFactory(primer_nombre="Raúl", apellido_paterno=f"Soto{i}", numero_empleado=f"77{i}")
+    EmpleadoFactory(primer_nombre="Raúl", apellido_paterno="Baja", estatus="B")
+
+    with django_assert_max_num_queries(1):
+        r = c.get(f"{URL}lookup/", {"q": "raul", "limite": 3, "estatus": "A"})
+    assert r.status_code == 200
+    assert r.data["truncado"] is True
+    assert len(r.data["results"]) == 3
+    assert set(r.data["results"][0]) == {"id", "numero_empleado", "nombre_completo", "sucursal", "puesto"}
+    assert r.data["results"][0]["nombre_completo"].startswith("Raúl Soto")
+
+    r = c.get(f"{URL}lookup/", {"q": "770"})
+    assert [e["numero_empleado"] for e in r.data["results"]] == ["770"]
+    assert r.data["truncado"] is False
+
+
+@pytest.mark.django_db
+def test_lookup_no_staff_solo_su_registro():
+    user = UserFactory()
+    propio = EmpleadoFactory(usuario=user, primer_nombre="Eva")
+    EmpleadoFactory(primer_nombre="Eva")
+    c = APIClient()
+    c.force_authenticate(user=user)
+    r = c.get(f"{URL}lookup/", {"q": "eva"})
+    assert [e["id"] for e in r.data["results"]] == [propio.id]
+
+
+@pytest.mark.django_db
+def test_fields_y_expand_recortan_salida_y_consulta(django_assert_num_queries):
+    from organigrama.models import Sucursal
+
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    suc = Sucursal.objects.create(clave="S1", nombre="Centro")
+    jefe = EmpleadoFactory(primer_nombre="Ana", apellido_paterno="Ruiz")
+    EmpleadoFactory(sucursal=suc, supervisor=jefe)
+
+    with django_assert_num_queries(2) as ctx:  # COUNT + página
+        r = c.get(URL, {"fields": "id,numero_empleado,sucursal_nombre", "ordering": "id"})
+    assert r.status_code == 200
+    assert set(r.data["results"][1]) == {"id", "numero_empleado", "sucursal_nombre"}
+    assert r.data["results"][1]["sucursal_nombre"] == "Centro"
+    sql = ctx.captured_queries[-1]["sql"]
+    assert "curp" not in sql and "empleados_empleado_supervisor" not in sql
+    assert "catalogos_banco" not in sql
+
+    with django_assert_num_queries(2):
+        r = c.get(URL, {"fields": "id", "expand": "sucursal,supervisor", "ordering": "id"})
+    fila = r.data["results"][1]
+    assert fila["sucursal"] == {"id": suc.id, "clave": "S1", "nombre": "Centro"}
+    assert fila["supervisor"]["nombre_completo"] == "Ana Ruiz"
+    assert r.data["results"][0]["sucursal"] is None
+
+    # Sin parámetros la respuesta completa no cambia (FK como PK)
+    r = c.get(f"{URL}{fila['id']}/")
+    assert r.data["sucursal"] == suc.id and "curp" in r.data and "domicilio_estado" in r.data
+
+
+def _xlsx(filas):
+    import io
+
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    for fila in filas:
+        hoja.append(fila)
+    buf = io.BytesIO()
+    libro.save(buf)
+    buf.seek(0)
+    buf.name = "alta.xlsx"
+    return buf
+
+
+@pytest.mark.django_db
+def test_importar_xlsx_crea_valida_y_reporta():
+    from datetime import date
+
+    from organigrama.models import Sucursal
+
+    suc = Sucursal.objects.create(clave="MTY", nombre="Monterrey Centro")
+    EmpleadoFactory(numero_empleado="E-1", curp="CUPR900101HDFSRN1", rfc="XAXX010101001")
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+
+    archivo = _xlsx([
+        ["Numero Empleado", "Primer Nombre", "Apellido Paterno", "CURP", "RFC", "NSS", "Sucursal",
+         "Fecha Alta", "Supervisor"],
+        ["N-1", "Ana", "López", "LOPA900101MDFPNA01", "LOPA900101AB1", 12345678901, "monterrey centro",
+         date(2024, 1, 15), "N-2"],
+        ["N-2", "Beto", "Ruiz", "RUIB900101HDFZTB02", "RUIB900101AB2", "12345678902", "MTY", "01/02/2024", ""],
+        ["N-3", "Caro", "Díaz", "mal", "DIAC900101AB3", "12345678903", "Inexistente", None, None],
+        ["E-1", "Dup", "Dup", "DUPD900101HDFPPD04", "DUPD900101AB4", "12345678904", None, None, None],
+        ["N-1", "Repe", "Tido", "REPT900101HDFPPD05", "REPT900101AB5", "12345678905", None, None, None],
+        [None] * 9,
+    ])
+    r = c.post(f"{URL}importar/", {"archivo": archivo}, format="multipart")
+    assert r.status_code == 200, r.data
+    assert (r.data["total"], r.data["creados"], r.data["filas_con_error"]) == (5, 2, 3)
+    errores = {(e["fila"], e["columna"]) for e in r.data["errores"]}
+    assert {(4, "curp"), (4, "sucursal"), (5, "numero_empleado"), (6, "numero_empleado")} <= errores
+
+    ana = Empleado.objects.get(numero_empleado="N-1")
+    assert ana.sucursal_id == suc.id and ana.nss == "12345678901"
+    assert ana.fecha_alta == date(2024, 1, 15)
+    assert ana.supervisor.numero_empleado == "N-2"  # supervisor dado de alta en el mismo lote
+    assert ana.busqueda.startswith("lopez ")
+    assert ana.history.count() == 1
+
+
+@pytest.mark.django_db
+def test_importar_csv_actualiza_y_descarga_reporte():
+    import io
+
+    emp = EmpleadoFactory(numero_empleado="77", primer_nombre="Viejo")
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+
+    def csv_archivo():
+        buf = io.BytesIO(
+            "numero_empleado,primer_nombre,nss\n77,Nuevo,\n88,Sin,123\n".encode("utf-8")
+        )
+        buf.name = "cambios.csv"
+        return buf
+
+    r = c.post(f"{URL}importar/?format=csv", {"archivo": csv_archivo(), "actualizar": "true"}, format="multipart")
+    assert r.status_code == 200
+    assert r["X-Importacion-Actualizados"] == "1"
+    reporte = b"".join(r.streaming_content).decode()
+    assert reporte.splitlines()[0] == "fila,columna,error"
+    assert "3,nss" in reporte
+
+    emp.refresh_from_db()
+    assert emp.primer_nombre == "Nuevo" and "nuevo" in emp.busqueda.split()
+    assert emp.curp.startswith("CUPR")  # columnas ausentes no se tocan
+
+
+@pytest.mark.django_db
+def test_importar_supervisor_rechazado_y_ciclos():
+    from empleados.importacion import importar_empleados
+
+    # La fila del supervisor se rechaza (faltan obligatorios): su subordinado no queda colgando
+    res = importar_empleados([
+        (2, {"numero_empleado": "100", "primer_nombre": "A", "apellido_paterno": "B"}),
+        (3, {"numero_empleado": "101", "primer_nombre": "C", "apellido_paterno": "D", "curp": "LOPA900101MDFPNA01",
+             "rfc": "LOPA900101AB1", "nss": "12345678901", "supervisor": "100"}),
+    ])
+    assert res.creados == 0
+    assert (3, "supervisor", "No existe el empleado '100'.") in res.errores
+    assert not Empleado.objects.filter(numero_empleado__in=["100", "101"]).exists()
+
+    # Con actualizar, un jefe no puede pasar a reportarle a su subordinado ni a sí mismo
+    jefe = EmpleadoFactory(numero_empleado="J")
+    sub = EmpleadoFactory(numero_empleado="S", supervisor=jefe)
+    res = importar_empleados([
+        (2, {"numero_empleado": "J", "supervisor": "S"}),
+        (3, {"numero_empleado": "S", "supervisor": "S"}),
+    ], actualizar=True)
+    assert {(n, c) for n, c, _ in res.errores} == {(2, "supervisor"), (3, "supervisor")}
+    jefe.refresh_from_db()
+    sub.refresh_from_db()
+    assert jefe.supervisor_id is None and sub.supervisor_id == jefe.pk
+
+    # Ciclo formado solo dentro del lote: lo detecta el cierre y se reporta el lote completo
+    otro = EmpleadoFactory(numero_empleado="O")
+    res = importar_empleados([
+        (2, {"numero_empleado": "O", "supervisor": "J"}),
+        (3, {"numero_empleado": "J", "supervisor": "O"}),
+    ], actualizar=True)
+    assert res.actualizados == 0 and {n for n, _, _ in res.errores} == {2, 3}
+    otro.refresh_from_db()
+    assert otro.supervisor_id is None
+
+
+@pytest.mark.django_db
+def test_export_xlsx_y_csv_respetan_filtros():
+    import io
+
+    from openpyxl import load_workbook
+
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    EmpleadoFactory(numero_empleado="X1", apellido_paterno="Álvarez")
+    EmpleadoFactory(numero_empleado="X2", estatus="B")
+
+    r = c.get(URL, {"export": "xlsx", "estatus": "A"})
+    assert r.status_code == 200
+    assert "empleados_" in r["Content-Disposition"]
+    hoja = load_workbook(io.BytesIO(b"".join(r.streaming_content)), read_only=True).active
+    filas = list(hoja.iter_rows(values_only=True))
+    assert filas[0][:2] == ("No. empleado", "Apellido paterno")
+    assert [f[0] for f in filas[1:]] == ["X1"]
+
+    r = c.get(URL, {"export": "csv", "ordering": "-numero_empleado"})
+    lineas = b"".join(r.streaming_content).decode().splitlines()
+    assert [l.split(",")[0] for l in lineas[1:]] == ["X2", "X1"]
+
+    assert c.get(URL, {"export": "pdf"}).status_code == 400
+
+
+def _foto_jpeg(tamano=(3000, 2000), orientacion=None):
+    import io
+
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    img = Image.new("RGB", tamano, "red")
+    exif = Image.Exif()
+    exif[0x010F] = "Fabricante"  # Make
+    if orientacion:
+        exif[0x0112] = orientacion
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", exif=exif)
+    return SimpleUploadedFile("selfie.jpeg", buf.getvalue(), content_type="image/jpeg")
+
+
+@pytest.mark.django_db
+def test_subir_foto_genera_rendiciones_sin_exif(tmp_path, settings):
+    from PIL import Image
+
+    settings.MEDIA_ROOT = tmp_path
+    emp = EmpleadoFactory()
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+
+    r = c.post(f"{URL}{emp.id}/foto/", {"foto": _foto_jpeg(orientacion=6)}, format="multipart")
+    assert r.status_code == 200, r.data
+    assert r.data["foto_mini"].endswith("_mini.webp") and r.data["foto_media"].endswith("_media.webp")
+
+    emp.refresh_from_db()
+    with Image.open(emp.foto.path) as original:
+        # Orientación 6 (rotada 90°) aplicada y tamaño limitado
+        assert original.size == (1365, 2048)
+        assert not original.getexif()
+    with Image.open(emp.foto_mini.path) as mini:
+        assert mini.size == (96, 96)
+    with Image.open(emp.foto_media.path) as media:
+        assert max(media.size) == 480
+
+    # La lista expone las URLs de las rendiciones
+    r = c.get(URL, {"fields": "id,foto_mini"})
+    assert r.data["results"][0]["foto_mini"].startswith("http")
+
+
+@pytest.mark.django_db
+def test_generar_rendiciones_fotos_existentes(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    emp = EmpleadoFactory(foto=_foto_jpeg((200, 100)))
+    Empleado.objects.filter(pk=emp.pk).update(foto_mini="", foto_media="")
+
+    call_command("generar_rendiciones_fotos", "--sin-checadas")
+    emp.refresh_from_db()
+    assert "_mini" in emp.foto_mini.name and emp.foto_mini.name.endswith(".webp")
+    assert emp.foto_media
+
+
+@pytest.mark.django_db
+def test_historial_omite_ediciones_sin_cambios():
+    emp = EmpleadoFactory()
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    assert emp.history.count() == 1
+
+    r = c.patch(f"{URL}{emp.id}/", {"primer_nombre": emp.primer_nombre}, format="json")
+    assert r.status_code == 200
+    assert emp.history.count() == 1  # solo cambió actualizado_en
+
+    c.patch(f"{URL}{emp.id}/", {"primer_nombre": "Otro"}, format="json")
+    assert emp.history.count() == 2
+    assert emp.history.first().primer_nombre == "Otro"
+
+
+@pytest.mark.django_db
+def test_historial_modo_delta(settings):
+    settings.EMPLEADOS_HISTORIAL_MODO = "delta"
+    emp = EmpleadoFactory(primer_nombre="Ana")
+    usuario = UserFactory(is_staff=True)
+    c = APIClient()
+    c.force_authenticate(user=usuario)
+
+    c.patch(f"{URL}{emp.id}/", {"primer_nombre": "Beatriz"}, format="json")
+    assert emp.history.count() == 1  # solo la instantánea del alta
+    cambio = emp.cambios.get()
+    assert cambio.cambios == {"primer_nombre": ["Ana", "Beatriz"]}
+    assert cambio.usuario == usuario
+
+
+@pytest.mark.django_db
+def test_podar_historial_archiva_y_conserva_ultima(tmp_path):
+    import gzip
+    import json
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    emp = EmpleadoFactory()
+    for nombre in ("B", "C"):
+        emp = Empleado.objects.get(pk=emp.pk)
+        emp.primer_nombre = nombre
+        emp.save()
+    historico = Empleado.history.model
+    historico.objects.update(history_date=timezone.now() - timedelta(days=800))
+    archivo = tmp_path / "historial.jsonl.gz"
+
+    call_command("podar_historial_empleados", "--dias", "365", "--archivo", str(archivo), "--lote", "1")
+
+    assert list(emp.history.values_list("primer_nombre", flat=True)) == ["C"]
+    with gzip.open(archivo, "rt", encoding="utf-8") as f:
+        archivadas = [json.loads(linea) for linea in f]
+    assert len(archivadas) == 2 and {"historicalempleado"} == {a["tabla"] for a in archivadas}
+    assert "B" in {a["primer_nombre"] for a in archivadas}
+
+
+@pytest.mark.django_db
+def test_jerarquias_cierre_y_filtros_bajo():
+    from organigrama.models import Area, descendientes
+    from empleados.models import subordinados
+
+    raiz = Area.objects.create(clave="DIR", nombre="Dirección")
+    ops = Area.objects.create(clave="OPS", nombre="Operaciones", parent=raiz)
+    alm = Area.objects.create(clave="ALM", nombre="Almacén", parent=ops)
+    ventas = Area.objects.create(clave="VEN", nombre="Ventas")
+    assert set(descendientes(raiz)) == {raiz, ops, alm}
+
+    jefe = EmpleadoFactory(area=raiz)
+    gerente = EmpleadoFactory(area=ops, supervisor=jefe)
+    operario = EmpleadoFactory(area=alm, supervisor=gerente)
+    vendedor = EmpleadoFactory(area=ventas)
+    assert set(subordinados(jefe)) == {gerente, operario}
+    assert set(subordinados(jefe, profundidad=1)) == {gerente}
+
+    # Mover un subárbol: Operaciones pasa a Ventas; el gerente pasa a reportar al vendedor
+    ops.parent = ventas
+    ops.save()
+    gerente = Empleado.objects.get(pk=gerente.pk)
+    gerente.supervisor = vendedor
+    gerente.save()
+    assert set(descendientes(raiz)) == {raiz}
+    assert set(descendientes(ventas)) == {ventas, ops, alm}
+    assert set(subordinados(vendedor)) == {gerente, operario}
+    assert not subordinados(jefe).exists()
+
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    r = c.get(URL, {"bajo_area": ventas.id})
+    assert {e["id"] for e in r.data["results"]} == {vendedor.id, gerente.id, operario.id}
+    r = c.get(URL, {"bajo_supervisor": vendedor.id, "profundidad": 1})
+    assert [e["id"] for e in r.data["results"]] == [gerente.id]
+    assert c.get(URL, {"bajo_area": "x"}).status_code == 400
+
+    # Ciclos rechazados; la baja de un supervisor deja a sus reportes como raíz
+    r = c.patch(f"{URL}{vendedor.id}/", {"supervisor": operario.id}, format="json")
+    assert r.status_code == 400 and "supervisor" in r.data
+    gerente.delete()
+    assert not subordinados(vendedor).exists()
+    call_command("reconstruir_jerarquias")
+    assert set(descendientes(ventas)) == {ventas, ops, alm}
+
+
+@pytest.mark.django_db
+def test_enlazar_varios_espera_al_padre_y_rechaza_ciclos():
+    from django.db import transaction
+
+    from core.jerarquia import enlazar_varios, mover
+    from empleados.models import SupervisionCierre
+
+    a, b, c, d = (EmpleadoFactory() for _ in range(4))
+    SupervisionCierre.objects.all().delete()
+    # c cuelga de b, que cuelga de a: se enlazan en ese orden aunque lleguen al revés
+    enlazar_varios(SupervisionCierre, [(c.pk, b.pk), (b.pk, a.pk), (a.pk, None)])
+    assert set(SupervisionCierre.objects.filter(descendiente=c).values_list("ancestro_id", "profundidad")) == {
+        (c.pk, 0), (b.pk, 1), (a.pk, 2),
+    }
+    # El error revierte la transacción que los contiene (aquí, un savepoint)
+    with pytest.raises(ValueError), transaction.atomic():
+        enlazar_varios(SupervisionCierre, [(d.pk, d.pk)])
+    # Un movimiento que cerraría un ciclo se rechaza ya con el árbol bloqueado
+    with pytest.raises(ValueError), transaction.atomic():
+        mover(SupervisionCierre, a.pk, c.pk)
+    assert SupervisionCierre.objects.filter(descendiente=a).count() == 1
+
+
+@pytest.mark.django_db
+def test_alcance_supervisor_cacheado_e_invalidado(django_assert_num_queries):
+    from django.contrib.auth import get_user_model
+
+    from empleados.alcance import empleados_visibles
+
+    jefe_user = UserFactory(supervisor=True)
+    jefe = EmpleadoFactory(usuario=jefe_user)
+    directo = EmpleadoFactory(supervisor=jefe)
+    indirecto = EmpleadoFactory(supervisor=directo)
+    otro = EmpleadoFactory()
+    c = APIClient()
+    c.force_authenticate(user=jefe_user)
+
+    r = c.get(URL)
+    assert {e["id"] for e in r.data["results"]} == {jefe.id, directo.id, indirecto.id}
+
+    # Ya cacheado: sin consultar la tabla de cierre ni los grupos (solo el empleado ligado)
+    nuevo = get_user_model().objects.get(pk=jefe_user.pk)
+    with django_assert_num_queries(1):
+        assert empleados_visibles(nuevo) == {jefe.id, directo.id, indirecto.id}
+
+    # Un cambio de supervisor invalida el conjunto
+    directo.supervisor = otro
+    directo.save()
+    r = c.get(URL)
+    assert {e["id"] for e in r.data["results"]} == {jefe.id}
+
+    # Sin rol de supervisión: solo su propio expediente
+    emp_user = UserFactory()
+    EmpleadoFactory(usuario=emp_user, supervisor=None)
+    c.force_authenticate(user=emp_user)
+    assert c.get(URL).data["count"] == 1
@@ -1,13 +1,26 @@
 ﻿from rest_framework import viewsets, permissions, filters, status, parsers
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.settings import api_settings
+from django.http import StreamingHttpResponse
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
+from core.campos import CamposDinamicosViewMixin
+from core.exportacion import ExportacionMixin, PARAMETRO_EXPORT
+from core.renderers import CSVRenderer, lineas_csv
 from core.views import HealthBaseView
+from .alcance import filtrar_por_alcance
+from .busqueda import buscar, sugerencias
+from .jerarquia import filtrar_por_jerarquia
+from .importacion import importar_empleados, leer_filas, reporte_csv
 from .models import Empleado
-from .serializers import EmpleadoSerializer, EmpleadoFotoSerializer
+from .serializers import EmpleadoSerializer, EmpleadoFotoSerializer, EmpleadoLookupResponseSerializer
+
+# Typeahead: resultados por defecto y máximo (?limite=)
+LOOKUP_LIMITE = 20
+LOOKUP_LIMITE_MAX = 50
 
 
 # /empleados/health/
@@ -16,6 +29,38 @@ class HealthView(HealthBaseView):
     app_name = "empleados"
 
 
+class EmpleadoBusquedaFilter(BaseFilterBackend):
+    """
+    ?search= sobre Empleado.busqueda (sin acentos, todas las palabras, índice trigram
+    en PostgreSQL). Va después de OrderingFilter: sin ?ordering ordena por relevancia.
+    """
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        q = request.query_params.get(self.search_param, "")
+        if not q.strip():
+            return queryset
+        ordenar = not request.query_params.get(OrderingFilter.ordering_param)
+        return buscar(queryset, q, ordenar=ordenar)
+
+
+class EmpleadoJerarquiaFilter(BaseFilterBackend):
+    """?bajo_area= / ?bajo_supervisor= (&profundidad=) sobre las tablas de cierre."""
+
+    def filter_queryset(self, request, queryset, view):
+        return filtrar_por_jerarquia(queryset, request.query_params)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {"name": "bajo_area", "required": False, "in": "query", "schema": {"type": "integer"},
+             "description": "Empleados del área y de todas sus subáreas."},
+            {"name": "bajo_supervisor", "required": False, "in": "query", "schema": {"type": "integer"},
+             "description": "Toda la línea de reporte del supervisor (sin incluirlo)."},
+            {"name": "profundidad", "required": False, "in": "query", "schema": {"type": "integer"},
+             "description": "Con bajo_supervisor: niveles a incluir (1 = reportes directos)."},
+        ]
+
+
 class IsStaffOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in ("GET", "HEAD", "OPTIONS"):
@@ -25,12 +70,13 @@ class IsStaffOrReadOnly(permissions.BasePermission):
 
 @extend_schema(tags=["empleados"])
 @extend_schema(tags=["empleados"])
-class EmpleadoViewSet(viewsets.ModelViewSet):
+class EmpleadoViewSet(ExportacionMixin, CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     CRUD de Empleado con:
     - bÃºsqueda: ?search= (nombre, nÃºmero, RFC, CURP, NSS, email)
     - filtros: estatus, sucursal, area, departamento, puesto, unidad_negocio
-    - restricciÃ³n: usuario NO staff solo ve su propio expediente (si estÃ¡ ligado)
+    - restricciÃ³n: usuario NO staff solo ve su propio expediente (si estÃ¡ ligado); Supervisor/Gerente
+      ve además a toda su línea de reporte (empleados.alcance)
     """
     permission_classes = [IsStaffOrReadOnly]
     queryset = (
@@ -44,12 +90,7 @@ class EmpleadoViewSet(viewsets.ModelViewSet):
     )
     serializer_class = EmpleadoSerializer
 
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    search_fields = [
-        "numero_empleado", "primer_nombre", "segundo_nombre",
-        "apellido_paterno", "apellido_materno",
-        "rfc", "curp", "nss", "email_personal", "email_corporativo",
-    ]
+    filter_backends = [DjangoFilterBackend, EmpleadoJerarquiaFilter, OrderingFilter, EmpleadoBusquedaFilter]
     filterset_fields = {
         "estatus": ["exact"],
         "unidad_negocio": ["exact"],
@@ -68,14 +109,40 @@ class EmpleadoViewSet(viewsets.ModelViewSet):
         "id", "numero_empleado", "primer_nombre", "apellido_paterno",
     ]
     ordering = ["numero_empleado"]
+    export_nombre = "empleados"
+    export_columnas = (
+        ("No. empleado", "numero_empleado"),
+        ("Apellido paterno", "apellido_paterno"),
+        ("Apellido materno", "apellido_materno"),
+        ("Primer nombre", "primer_nombre"),
+        ("Segundo nombre", "segundo_nombre"),
+        ("CURP", "curp"),
+        ("RFC", "rfc"),
+        ("NSS", "nss"),
+        ("Sexo", "sexo"),
+        ("Fecha nacimiento", "fecha_nacimiento"),
+        ("Email corporativo", "email_corporativo"),
+        ("Teléfono móvil", "telefono_movil"),
+        ("Unidad de negocio", "unidad_negocio__nombre"),
+        ("Sucursal", "sucursal__nombre"),
+        ("Área", "area__nombre"),
+        ("Departamento", "departamento__nombre"),
+        ("Puesto", "puesto__nombre"),
+        ("Turno", "turno__nombre"),
+        ("Horario", "horario__etiqueta"),
+        ("Supervisor", "supervisor__numero_empleado"),
+        ("Fecha alta", "fecha_alta"),
+        ("Fecha baja", "fecha_baja"),
+        ("Estatus", "estatus"),
+        ("Tipo contrato", "tipo_contrato"),
+        ("Periodicidad pago", "periodicidad_pago"),
+        ("Salario diario", "salario_diario"),
+    )
 
     def get_queryset(self):
         qs = super().get_queryset()
-        u = self.request.user
-        # Usuario autenticado no staff: solo su propio registro (si estÃ¡ ligado a usuario)
-        if u.is_authenticated and not u.is_staff:
-            return qs.filter(usuario=u)
-        return qs
+        # No staff: su propio expediente o, con rol Supervisor/Gerente, su línea de reporte
+        return filtrar_por_alcance(qs, self.request.user, campo="id")
 
     def perform_create(self, serializer):
         serializer.save(creado_por=self.request.user, actualizado_por=self.request.user)
@@ -87,6 +154,10 @@ class EmpleadoViewSet(viewsets.ModelViewSet):
         methods=["GET"],
         parameters=[
             OpenApiParameter(name="search", description="Nombre/RFC/CURP/NSS/No. empleado", required=False, type=str),
+            PARAMETRO_EXPORT,
+            OpenApiParameter(name="fields", description="Campos a devolver, separados por coma", required=False, type=str),
+            OpenApiParameter(name="expand", description="FKs a devolver como objeto (sucursal,puesto,supervisor,...)",
+                             required=False, type=str),
             OpenApiParameter(name="estatus", description="A/B/S/L", required=False, type=str),
             OpenApiParameter(name="sucursal", description="ID sucursal", required=False, type=int),
             OpenApiParameter(name="departamento", description="ID departamento", required=False, type=int),
@@ -97,6 +168,86 @@ class EmpleadoViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    # /empleados/lookup/?q= (selectores: sin paginación ni COUNT, solo columnas mínimas)
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="q", description="Nombre/RFC/CURP/NSS/No. empleado", required=False, type=str),
+            OpenApiParameter(name="limite", description=f"Máx. resultados (def. {LOOKUP_LIMITE}, máx. {LOOKUP_LIMITE_MAX})",
+                             required=False, type=int),
+            OpenApiParameter(name="estatus", description="A/B/S/L", required=False, type=str),
+            OpenApiParameter(name="sucursal", description="ID sucursal", required=False, type=int),
+        ],
+        responses=EmpleadoLookupResponseSerializer,
+        tags=["empleados"],
+    )
+    @action(detail=False, methods=["get"], url_path="lookup", pagination_class=None)
+    def lookup(self, request):
+        try:
+            limite = int(request.query_params.get("limite", LOOKUP_LIMITE))
+        except ValueError:
+            return Response({"detail": "limite debe ser entero."}, status=status.HTTP_400_BAD_REQUEST)
+        limite = max(1, min(limite, LOOKUP_LIMITE_MAX))
+
+        # Filtros de django-filter (estatus, sucursal, ...) y alcance del usuario; el texto va en ?q=
+        qs = DjangoFilterBackend().filter_queryset(request, self.get_queryset(), self)
+        filas, truncado = sugerencias(qs.select_related(None), request.query_params.get("q", ""), limite)
+        return Response({"results": filas, "truncado": truncado})
+
+    # /empleados/importar/ (POST multipart: archivo=.xlsx|.csv)
+    @extend_schema(
+        request={"multipart/form-data": {
+            "type": "object",
+            "properties": {
+                "archivo": {"type": "string", "format": "binary"},
+                "actualizar": {"type": "boolean"},
+                "dry_run": {"type": "boolean"},
+            },
+            "required": ["archivo"],
+        }},
+        responses={200: {"type": "object"}},
+        description=(
+            "Alta/actualización masiva desde XLSX o CSV (encabezados = campos del modelo; catálogos "
+            "por nombre o clave; supervisor por número de empleado). Con ?format=csv devuelve el "
+            "reporte de errores por fila como descarga; el resumen va en encabezados X-Importacion-*."
+        ),
+        tags=["empleados"],
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="importar",
+        parser_classes=[parsers.MultiPartParser],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer],
+    )
+    def importar(self, request):
+        archivo = request.FILES.get("archivo")
+        if archivo is None:
+            return Response({"archivo": ["Requerido (.xlsx o .csv)."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        def _bandera(nombre):
+            return str(request.data.get(nombre, request.query_params.get(nombre, ""))).lower() in ("1", "true")
+
+        try:
+            res = importar_empleados(
+                leer_filas(archivo.file, archivo.name),
+                actualizar=_bandera("actualizar"),
+                dry_run=_bandera("dry_run"),
+                usuario=request.user,
+            )
+        except ValueError as e:
+            return Response({"archivo": [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.accepted_renderer.format == "csv":
+            resp = StreamingHttpResponse(lineas_csv(reporte_csv(res.errores)), content_type="text/csv; charset=utf-8")
+            resp["Content-Disposition"] = 'attachment; filename="importacion_errores.csv"'
+            for clave, valor in res.resumen().items():
+                resp[f"X-Importacion-{clave.replace('_', '-').title()}"] = str(valor)
+            return resp
+        return Response({
+            **res.resumen(),
+            "errores": [{"fila": n, "columna": c, "error": m} for n, c, m in res.errores],
+        })
+
     # /empleados/{id}/foto/ (POST: multipart)
     @extend_schema(request=EmpleadoFotoSerializer, responses=EmpleadoFotoSerializer, tags=["empleados"])
     @action(
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class OrganigramaConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "organigrama"
+
+    def ready(self):
+        from . import signals  # noqa: F401  (mantiene AreaCierre)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from core.jerarquia import reconstruir
+
+
+def llenar_cierre(apps, schema_editor):
+    Area = apps.get_model("organigrama", "Area")
+    AreaCierre = apps.get_model("organigrama", "AreaCierre")
+    reconstruir(AreaCierre, dict(Area.objects.values_list("id", "parent_id")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organigrama', '0002_ubicacion_organigrama_nombre_ef2923_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AreaCierre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profundidad', models.PositiveSmallIntegerField()),
+                ('ancestro', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='organigrama.area')),
+                ('descendiente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='organigrama.area')),
+            ],
+            options={
+                'verbose_name': 'Jerarquía de áreas',
+                'verbose_name_plural': 'Jerarquía de áreas',
+                'constraints': [models.UniqueConstraint(fields=('ancestro', 'descendiente'), name='uniq_area_cierre')],
+            },
+        ),
+        migrations.RunPython(llenar_cierre, migrations.RunPython.noop),
+    ]
@@ -140,3 +140,25 @@ class Ubicacion(models.Model):
         # evita None si ambos están vacíos (solo por seguridad)
         owner_txt = str(owner) if owner else "sin-owner"
         return f"{self.nombre} [{owner_txt}]"
+
+
+class AreaCierre(models.Model):
+    """Tabla de cierre de Area.parent: una fila por par (ancestro, descendiente), ver core.jerarquia."""
+    ancestro = models.ForeignKey(Area, on_delete=models.CASCADE, related_name="+")
+    descendiente = models.ForeignKey(Area, on_delete=models.CASCADE, related_name="+")
+    profundidad = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = "Jerarquía de áreas"
+        verbose_name_plural = "Jerarquía de áreas"
+        constraints = [
+            models.UniqueConstraint(fields=["ancestro", "descendiente"], name="uniq_area_cierre"),
+        ]
+
+
+def descendientes(area, profundidad=None, incluir_propia=True):
+    """Áreas del subárbol de `area` (ella misma incluida por defecto)."""
+    from core.jerarquia import ids_descendientes
+
+    area_id = getattr(area, "pk", area)
+    return Area.objects.filter(id__in=ids_descendientes(AreaCierre, area_id, profundidad, incluir_propia))
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import UnidadNegocio, Sucursal, Area, Ubicacion
+
+from core.jerarquia import es_descendiente
+from .models import UnidadNegocio, Sucursal, Area, AreaCierre, Ubicacion
 
 
 class UnidadNegocioSerializer(serializers.ModelSerializer):
@@ -24,6 +26,11 @@ class AreaSerializer(serializers.ModelSerializer):
         model = Area
         fields = "__all__"
 
+    def validate_parent(self, value):
+        if value and self.instance and es_descendiente(AreaCierre, value.pk, self.instance.pk):
+            raise serializers.ValidationError("El área no puede colgar de sí misma ni de una subárea.")
+        return value
+
 
 class UbicacionSerializer(serializers.ModelSerializer):
     sucursal_nombre = serializers.CharField(source="sucursal.nombre", read_only=True)
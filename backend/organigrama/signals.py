@@ -0,0 +1,27 @@
+# organigrama/signals.py
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from core.jerarquia import enlazar, es_descendiente, mover
+from .models import Area, AreaCierre
+
+
+@receiver(pre_save, sender=Area, dispatch_uid="organigrama_area_parent_previo")
+def _area_previa(sender, instance, **kwargs):
+    instance._parent_previo = (
+        sender.objects.filter(pk=instance.pk).values_list("parent_id", flat=True).first() if instance.pk else None
+    )
+    if instance.pk and instance.parent_id and instance.parent_id != instance._parent_previo:
+        if es_descendiente(AreaCierre, instance.parent_id, instance.pk):
+            raise ValidationError({"parent": "El área no puede colgar de sí misma ni de una subárea."})
+
+
+@receiver(post_save, sender=Area, dispatch_uid="organigrama_area_cierre")
+def _area_cierre(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        enlazar(AreaCierre, instance.pk, instance.parent_id)
+    elif instance.parent_id != getattr(instance, "_parent_previo", instance.parent_id):
+        mover(AreaCierre, instance.pk, instance.parent_id)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0004_empleado_busqueda'),
+        ('permisos', '0003_alter_permiso_options_alter_tipopermiso_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='permiso',
+            index=models.Index(fields=['fecha_inicio', 'id'], name='permisos_pe_fecha_i_f794ae_idx'),
+        ),
+    ]
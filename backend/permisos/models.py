@@ -86,6 +86,8 @@ class Permiso(models.Model):
             models.Index(fields=["fecha_inicio"]),
             models.Index(fields=["fecha_fin"]),
             models.Index(fields=["empleado", "estado", "fecha_inicio", "fecha_fin"]),
+            # paginación por llave (-fecha_inicio, -id)
+            models.Index(fields=["fecha_inicio", "id"]),
         ]
         constraints = [
             # horas >= 0 o null
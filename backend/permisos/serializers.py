@@ -1,4 +1,7 @@
 from rest_framework import serializers
+
+from core.campos import CamposDinamicosMixin
+from empleados.serializers import EmpleadoBreveSerializer
 from .models import TipoPermiso, Permiso
 
 
@@ -8,7 +11,9 @@ class TipoPermisoSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class PermisoSerializer(serializers.ModelSerializer):
+class PermisoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {"empleado": EmpleadoBreveSerializer}
+
     # Campos derivados de solo lectura
     empleado_nombre = serializers.CharField(source="empleado.nombre_completo", read_only=True)
     tipo_nombre = serializers.CharField(source="tipo.nombre", read_only=True)
@@ -1,3 +1,25 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+import pytest
+from rest_framework.test import APIClient
+
+from asistencia.tests.factories import EmpleadoFactory, UserFactory
+from permisos.models import Permiso, TipoPermiso
+
+
+@pytest.mark.django_db
+def test_export_permisos_solo_del_propio_empleado():
+    user = UserFactory()
+    propio = EmpleadoFactory(usuario=user)
+    tipo = TipoPermiso.objects.create(nombre="Médico")
+    Permiso.objects.create(empleado=propio, tipo=tipo, fecha_inicio=date(2025, 5, 2), fecha_fin=date(2025, 5, 2))
+    Permiso.objects.create(empleado=EmpleadoFactory(), tipo=tipo,
+                           fecha_inicio=date(2025, 5, 3), fecha_fin=date(2025, 5, 3))
+
+    c = APIClient()
+    c.force_authenticate(user=user)
+    r = c.get("/api/v1/permisos/", {"export": "csv"})
+    assert r.status_code == 200
+    lineas = b"".join(r.streaming_content).decode().splitlines()
+    assert len(lineas) == 2
+    assert lineas[1].split(",")[1:5] == [propio.numero_empleado, "Pérez", "Juan", "Médico"]
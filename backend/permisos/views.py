@@ -5,8 +5,12 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.filters import OrderingFilter, SearchFilter
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 
+from core.campos import CamposDinamicosViewMixin
+from core.exportacion import ExportacionMixin, PARAMETRO_EXPORT
+from core.pagination import KeysetPagination
+from empleados.alcance import filtrar_por_alcance
 from .models import TipoPermiso, Permiso
 from .serializers import TipoPermisoSerializer, PermisoSerializer
 
@@ -37,7 +41,8 @@ class TipoPermisoViewSet(viewsets.ModelViewSet):
 
 @extend_schema(tags=["permisos"])
 @extend_schema(tags=["permisos"])
-class PermisoViewSet(viewsets.ModelViewSet):
+@extend_schema_view(list=extend_schema(parameters=[PARAMETRO_EXPORT]))
+class PermisoViewSet(ExportacionMixin, CamposDinamicosViewMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     queryset = Permiso.objects.select_related("empleado", "tipo", "aprobado_por").all()
     serializer_class = PermisoSerializer
@@ -57,15 +62,29 @@ class PermisoViewSet(viewsets.ModelViewSet):
     }
     ordering_fields = ["fecha_inicio", "fecha_fin", "id", "creado_en"]
     ordering = ["-fecha_inicio"]
+    # ?cursor= activa la paginación por llave (sin COUNT/OFFSET); ?page= sigue disponible
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-fecha_inicio", "-id")
+    export_nombre = "permisos"
+    export_columnas = (
+        ("ID", "id"),
+        ("No. empleado", "empleado__numero_empleado"),
+        ("Apellido paterno", "empleado__apellido_paterno"),
+        ("Nombre", "empleado__primer_nombre"),
+        ("Tipo", "tipo__nombre"),
+        ("Desde", "fecha_inicio"),
+        ("Hasta", "fecha_fin"),
+        ("Horas", "horas"),
+        ("Estado", "estado"),
+        ("Motivo", "motivo"),
+        ("Aprobado en", "aprobado_en"),
+        ("Comentario aprobador", "comentario_aprobador"),
+    )
 
     def get_queryset(self):
         qs = super().get_queryset()
-        u = self.request.user
-        if u.is_staff:
-            return qs
-        if hasattr(u, "empleado"):
-            return qs.filter(empleado=u.empleado)
-        return qs.none()
+        # No staff: su propio expediente o, con rol Supervisor/Gerente, su línea de reporte
+        return filtrar_por_alcance(qs, self.request.user)
 
     def perform_create(self, serializer):
         u = self.request.user
@@ -85,7 +104,7 @@ class PermisoViewSet(viewsets.ModelViewSet):
         p.aprobado_por = request.user
         p.aprobado_en = timezone.now()
         p.comentario_aprobador = request.data.get("comentario", "")
-        p.save(update_fields=["estado", "aprobado_por", "aprobado_en", "comentario_aprobador"])
+        p.save(update_fields=["estado", "aprobado_por", "aprobado_en", "comentario_aprobador", "actualizado_en"])
         return Response(self.get_serializer(p).data)
 
     @action(detail=True, methods=["post"], url_path="rechazar", permission_classes=[permissions.IsAdminUser])
@@ -97,7 +116,7 @@ class PermisoViewSet(viewsets.ModelViewSet):
         p.aprobado_por = request.user
         p.aprobado_en = timezone.now()
         p.comentario_aprobador = request.data.get("comentario", "")
-        p.save(update_fields=["estado", "aprobado_por", "aprobado_en", "comentario_aprobador"])
+        p.save(update_fields=["estado", "aprobado_por", "aprobado_en", "comentario_aprobador", "actualizado_en"])
         return Response(self.get_serializer(p).data)
 
     @action(detail=True, methods=["post"], url_path="cancelar")
@@ -109,6 +128,6 @@ class PermisoViewSet(viewsets.ModelViewSet):
         if not u.is_staff and (not hasattr(u, "empleado") or p.empleado_id != u.empleado_id):
             return Response({"detail": "No puedes cancelar permisos de otro empleado."}, status=status.HTTP_403_FORBIDDEN)
         p.estado = "CANC"
-        p.save(update_fields=["estado"])
+        p.save(update_fields=["estado", "actualizado_en"])
         return Response(self.get_serializer(p).data)
 
@@ -0,0 +1,211 @@
+# backend/vacaciones/balances.py
+"""
+Reconstrucción de BalanceVacaciones basada en conjuntos.
+
+En lugar de ~5 queries por empleado (política, balance previo, solicitudes,
+get_or_create y save), el cálculo del año se hace con un número fijo de
+queries sin importar cuántos empleados haya:
+
+1. empleados (id + fechas de antigüedad) en una sola lectura
+2. políticas activas (tabla pequeña, se resuelve en memoria por antigüedad)
+3. balances del año anterior (para el arrastre), agrupados por empleado
+4. días tomados del año: SUM agregado por empleado sobre solicitudes APROB
+5. escritura con bulk_create(update_conflicts=True) sobre (empleado, anio)
+
+Entre reconstrucciones, las transiciones de SolicitudVacaciones hacia/desde
+APROB ajustan los renglones afectados con expresiones F (ajustar_balances).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import F, Q, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from core.enums import EstadoSolicitud
+from empleados.models import Empleado
+
+from .models import BalanceVacaciones, PoliticaVacaciones, SolicitudVacaciones
+
+CERO = Decimal("0.00")
+TAM_LOTE = 1000
+
+CAMPOS_BALANCE = (
+    "dias_asignados", "dias_arrastrados", "dias_tomados",
+    "dias_disponibles", "caduca_el", "actualizado_en",
+)
+
+
+@dataclass
+class ResultadoRebuild:
+    anio: int
+    procesados: int
+    actualizados: int
+    balances: List[BalanceVacaciones]
+
+
+def antiguedad_anios(base: Optional[date], anio: int) -> int:
+    """Antigüedad en años cumplidos al 1 de enero de `anio`."""
+    if not base:
+        return 0
+    corte = date(anio, 1, 1)
+    if base > corte:
+        return 0
+    return corte.year - base.year - ((corte.month, corte.day) < (base.month, base.day))
+
+
+def _selector_politicas():
+    """Devuelve f(anios) -> política activa de menor anios_desde que cubre el rango."""
+    politicas = list(PoliticaVacaciones.objects.filter(activo=True).order_by("anios_desde"))
+    memo: Dict[int, Optional[PoliticaVacaciones]] = {}
+
+    def politica_para(anios: int) -> Optional[PoliticaVacaciones]:
+        if anios not in memo:
+            memo[anios] = next(
+                (p for p in politicas if p.anios_desde <= anios <= p.anios_hasta), None
+            )
+        return memo[anios]
+
+    return politica_para
+
+
+def _dias_tomados_por_empleado(empleados, anio: int) -> Dict[int, Decimal]:
+    """
+    Días aprobados dentro del año, por empleado.
+    Las solicitudes contenidas en el año se suman en SQL; las que cruzan de año
+    (pocas) usan el reparto fijado al aprobar (SolicitudVacaciones.reparto_aprobado()).
+    """
+    inicio, fin = date(anio, 1, 1), date(anio, 12, 31)
+    aprobadas = SolicitudVacaciones.objects.filter(
+        empleado_id__in=empleados.values("id"),
+        estado=EstadoSolicitud.APROB,
+        fecha_inicio__lte=fin,
+        fecha_fin__gte=inicio,
+    )
+    filas = (
+        aprobadas
+        .filter(fecha_inicio__gte=inicio, fecha_fin__lte=fin)
+        .order_by()
+        .values("empleado_id")
+        .annotate(total=Sum("dias_habiles"))  # dias_habiles manda; 'dias' es solo legacy
+    )
+    tomados = {f["empleado_id"]: Decimal(f["total"] or 0) for f in filas}
+
+    for sol in aprobadas.filter(Q(fecha_inicio__lt=inicio) | Q(fecha_fin__gt=fin)).select_related("empleado"):
+        tomados[sol.empleado_id] = tomados.get(sol.empleado_id, CERO) + sol.reparto_aprobado().get(anio, CERO)
+    return tomados
+
+
+def reconstruir_balances(
+    anio: int,
+    *,
+    solo_activos: bool = False,
+    empleado_id: Optional[int] = None,
+    dry_run: bool = False,
+) -> ResultadoRebuild:
+    """
+    Recalcula los balances de `anio` para los empleados que cumplan el filtro.
+    Con dry_run=True devuelve los balances calculados sin escribirlos.
+    """
+    empleados = Empleado.objects.all()
+    if solo_activos:
+        empleados = empleados.filter(estatus="A")
+    if empleado_id:
+        empleados = empleados.filter(id=empleado_id)
+
+    filas = list(empleados.order_by("id").values_list("id", "fecha_antiguedad", "fecha_alta"))
+    if not filas:
+        return ResultadoRebuild(anio=anio, procesados=0, actualizados=0, balances=[])
+
+    politica_para = _selector_politicas()
+    previos = dict(
+        BalanceVacaciones.objects
+        .filter(anio=anio - 1, empleado_id__in=empleados.values("id"))
+        .values_list("empleado_id", "dias_disponibles")
+    )
+    tomados = _dias_tomados_por_empleado(empleados, anio)
+    caduca_el = date(anio, 12, 31)  # por simplicidad, el 31/dic del año
+
+    balances = []
+    for emp_id, f_antig, f_alta in filas:
+        pol = politica_para(antiguedad_anios(f_antig or f_alta, anio))
+        asignados = Decimal(pol.dias) if pol else CERO
+
+        arrastre = CERO
+        if pol and emp_id in previos:
+            arrastre = min(Decimal(pol.arrastre_maximo), max(CERO, previos[emp_id]))
+
+        dias_tomados = tomados.get(emp_id, CERO)
+        disponibles = max(CERO, asignados + arrastre - dias_tomados)
+
+        balances.append(BalanceVacaciones(
+            empleado_id=emp_id,
+            anio=anio,
+            dias_asignados=asignados,
+            dias_arrastrados=arrastre,
+            dias_tomados=dias_tomados,
+            dias_disponibles=disponibles,
+            caduca_el=caduca_el,
+        ))
+
+    if not dry_run:
+        with transaction.atomic():
+            BalanceVacaciones.objects.bulk_create(
+                balances,
+                batch_size=TAM_LOTE,
+                update_conflicts=True,
+                unique_fields=["empleado", "anio"],
+                update_fields=list(CAMPOS_BALANCE),
+            )
+
+    return ResultadoRebuild(
+        anio=anio,
+        procesados=len(filas),
+        actualizados=0 if dry_run else len(balances),
+        balances=balances,
+    )
+
+
+def ajustar_balances(
+    solicitud: SolicitudVacaciones,
+    estado_anterior: str,
+    estado_nuevo: str,
+    reparto: Optional[Dict[int, Decimal]] = None,
+) -> None:
+    """
+    Ajusta los balances del empleado cuando la solicitud entra o sale de APROB.
+    Cada año que toca la solicitud recibe su tramo de días (`reparto`, por defecto el
+    fijado al aprobar): al cancelar se resta exactamente lo que se sumó. La actualización
+    es un UPDATE con F() (sin leer/escribir en Python), así que es segura ante concurrencia.
+    Si aún no existe el balance de ese año, se construye completo para el empleado.
+    """
+    aprobada = EstadoSolicitud.APROB
+    if (estado_anterior == aprobada) == (estado_nuevo == aprobada):
+        return
+    signo = 1 if estado_nuevo == aprobada else -1
+    if reparto is None:
+        reparto = solicitud.reparto_aprobado()
+
+    for anio, dias in reparto.items():
+        delta = signo * dias
+        actualizados = (
+            BalanceVacaciones.objects
+            .filter(empleado_id=solicitud.empleado_id, anio=anio)
+            .update(
+                dias_tomados=F("dias_tomados") + delta,
+                # En un UPDATE, F("dias_tomados") es el valor previo: disp = asig + arr - (tomados + delta)
+                dias_disponibles=Greatest(
+                    F("dias_asignados") + F("dias_arrastrados") - F("dias_tomados") - delta,
+                    Value(CERO),
+                ),
+                actualizado_en=timezone.now(),
+            )
+        )
+        if not actualizados:
+            # El estado nuevo ya está guardado, así que el cálculo completo lo incluye
+            reconstruir_balances(anio, empleado_id=solicitud.empleado_id)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0004_empleado_busqueda'),
+        ('vacaciones', '0003_alter_solicitudvacaciones_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='solicitudvacaciones',
+            index=models.Index(fields=['fecha_inicio', 'id'], name='vacaciones__fecha_i_dee609_idx'),
+        ),
+    ]
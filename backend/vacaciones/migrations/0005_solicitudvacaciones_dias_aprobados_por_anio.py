@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vacaciones', '0004_solicitudvacaciones_vacaciones__fecha_i_dee609_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solicitudvacaciones',
+            name='dias_aprobados_por_anio',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,8 +1,8 @@
 # backend/vacaciones/models.py
-from datetime import date, timedelta
+from datetime import date
 from decimal import Decimal
 
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q, F
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -126,6 +126,9 @@ class SolicitudVacaciones(models.Model):
     aprobado_en = models.DateTimeField(null=True, blank=True)
     comentario_aprobador = models.CharField(max_length=255, blank=True, default="")
 
+    # Reparto {año: días} descontado del balance al aprobar; al salir de APROB se revierte tal cual
+    dias_aprobados_por_anio = models.JSONField(null=True, blank=True, editable=False)
+
     class Meta:
         ordering = ("-fecha_inicio", "-creado_en")
         indexes = [
@@ -133,6 +136,8 @@ class SolicitudVacaciones(models.Model):
             models.Index(fields=["fecha_inicio"]),
             models.Index(fields=["fecha_fin"]),
             models.Index(fields=["empleado", "estado", "fecha_inicio", "fecha_fin"]),
+            # paginación por llave (-fecha_inicio, -id)
+            models.Index(fields=["fecha_inicio", "id"]),
         ]
         constraints = [
             models.CheckConstraint(
@@ -165,36 +170,36 @@ class SolicitudVacaciones(models.Model):
             raise ValidationError(errors)
 
     # ===== Cálculo de días =====
-    def _feriados_en(self, desde: date, hasta: date):
-        """Intenta usar fuente centralizada; si no existe, usa Feriado local."""
-        try:
-            from core.workdays_sources import feriados_en  # opcional
-            return list(feriados_en(desde, hasta))
-        except Exception:
-            return list(
-                Feriado.objects.filter(fecha__gte=desde, fecha__lte=hasta)
-                .values_list("fecha", flat=True)
-            )
-
     def calcular_dias(self) -> int:
+        """Días hábiles del rango completo de la solicitud."""
+        return self.contar_dias(self.fecha_inicio, self.fecha_fin)
+
+    def contar_dias(self, desde: date, hasta: date) -> int:
+        """Hábiles en [desde, hasta] según el horario del empleado, excluyendo feriados."""
+        from core.workdays import dias_habiles_empleado
+        return int(dias_habiles_empleado(self.empleado, desde, hasta))
+
+    def dias_por_anio(self) -> dict[int, Decimal]:
+        """
+        Reparte los días de la solicitud por año calendario.
+        Si cruza de año, cada tramo se cuenta por separado con el mismo criterio de hábiles.
         """
-        Calcula hábiles respetando horario (si está soportado).
-        Fallback: lun-vie, excluyendo Feriado.
+        fi, ff = self.fecha_inicio, self.fecha_fin
+        if fi.year == ff.year:
+            return {fi.year: Decimal(self.dias_habiles or 0)}
+        return {
+            anio: Decimal(self.contar_dias(max(fi, date(anio, 1, 1)), min(ff, date(anio, 12, 31))))
+            for anio in range(fi.year, ff.year + 1)
+        }
+
+    def reparto_aprobado(self) -> dict[int, Decimal]:
         """
-        desde, hasta = self.fecha_inicio, self.fecha_fin
-        try:
-            from core.workdays import dias_habiles_empleado  # soporta horarios
-            fer = self._feriados_en(desde, hasta)
-            return int(dias_habiles_empleado(self.empleado, desde, hasta, fer))
-        except Exception:
-            feriados = set(self._feriados_en(desde, hasta))
-            total = 0
-            cur = desde
-            while cur <= hasta:
-                if cur not in feriados and cur.weekday() < 5:  # 0..4 = lun-vie
-                    total += 1
-                cur += timedelta(days=1)
-            return total
+        Reparto por año fijado al aprobar. Si el calendario (feriados, horario) cambió
+        después, dias_por_anio() daría otro; las aprobaciones previas a guardarlo lo recalculan.
+        """
+        if self.dias_aprobados_por_anio:
+            return {int(a): Decimal(d) for a, d in self.dias_aprobados_por_anio.items()}
+        return self.dias_por_anio()
 
     def _sincronizar_dias(self):
         """Sincroniza dias_habiles (int) y dias (decimal legacy)."""
@@ -212,8 +217,35 @@ class SolicitudVacaciones(models.Model):
         self.save()
 
     # ===== Transiciones de estado (actualiza v2 y legacy) =====
+    def cambiar_estado(self, nuevo_estado: str, update_fields=None):
+        """
+        Guarda la transición y, si la solicitud entra o sale de APROB, ajusta
+        BalanceVacaciones en la misma transacción.
+        """
+        from .balances import ajustar_balances  # import local: balances importa este módulo
+
+        aprobada = EstadoSolicitud.APROB
+        with transaction.atomic():
+            anterior, self.dias_aprobados_por_anio = (
+                SolicitudVacaciones.objects.select_for_update()
+                .values_list("estado", "dias_aprobados_por_anio")
+                .get(pk=self.pk)
+            )
+            reparto = None
+            if (anterior == aprobada) != (nuevo_estado == aprobada):
+                if nuevo_estado == aprobada:
+                    reparto = self.dias_por_anio()
+                    self.dias_aprobados_por_anio = {str(a): str(d) for a, d in reparto.items()}
+                else:
+                    reparto = self.reparto_aprobado()
+                    self.dias_aprobados_por_anio = None
+                if update_fields is not None:
+                    update_fields = [*update_fields, "dias_aprobados_por_anio"]
+            self.estado = nuevo_estado
+            self.save(update_fields=update_fields)
+            ajustar_balances(self, anterior, nuevo_estado, reparto)
+
     def _resolver(self, nuevo_estado: str, usuario: User | None):
-        self.estado = nuevo_estado
         now = timezone.now()
         # v2
         self.resuelto_por = usuario
@@ -221,7 +253,7 @@ class SolicitudVacaciones(models.Model):
         # legacy
         self.aprobado_por = usuario
         self.aprobado_en = now
-        self.save(update_fields=[
+        self.cambiar_estado(nuevo_estado, update_fields=[
             "estado", "resuelto_por", "resuelto_en",
             "aprobado_por", "aprobado_en", "actualizado_en"
         ])
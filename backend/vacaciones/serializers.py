@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from core.workdays import dias_habiles_empleado
 from .models import PoliticaVacaciones, Feriado, BalanceVacaciones, SolicitudVacaciones
 from .utils import dias_habiles
 
@@ -80,8 +82,9 @@ class SolicitudVacacionesSerializer(serializers.ModelSerializer):
         if ff < fi:
             raise serializers.ValidationError("fecha_fin debe ser mayor o igual a fecha_inicio.")
 
-        # Calcula días hábiles (utilidad actual: excluye fines y feriados globales)
-        dh = dias_habiles(fi, ff)
+        # Días hábiles según el horario del empleado (calendario precalculado: O(1) por solicitud)
+        empleado = attrs.get("empleado") or getattr(self.instance, "empleado", None)
+        dh = dias_habiles_empleado(empleado, fi, ff) if empleado else dias_habiles(fi, ff)
 
         # Colocar el resultado en el campo existente
         if "dias_habiles" in self.fields:
@@ -1,3 +1,181 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from asistencia.tests.factories import UserFactory, EmpleadoFactory
+from vacaciones.balances import reconstruir_balances
+from vacaciones.models import PoliticaVacaciones, BalanceVacaciones, SolicitudVacaciones
+
+
+@pytest.fixture
+def politicas():
+    PoliticaVacaciones.objects.create(anios_desde=0, anios_hasta=0, dias=0, arrastre_maximo=0)
+    PoliticaVacaciones.objects.create(anios_desde=1, anios_hasta=4, dias=12, arrastre_maximo=3)
+    PoliticaVacaciones.objects.create(anios_desde=5, anios_hasta=50, dias=20, arrastre_maximo=5)
+
+
+def _aprobada(emp, fi, ff, dias):
+    return SolicitudVacaciones.objects.create(
+        empleado=emp, fecha_inicio=fi, fecha_fin=ff, dias_habiles=dias, dias=Decimal(dias), estado="APROB"
+    )
+
+
+@pytest.mark.django_db
+def test_rebuild_calcula_politica_arrastre_y_tomados(politicas):
+    veterano = EmpleadoFactory(fecha_alta=date(2015, 6, 1))
+    junior = EmpleadoFactory(fecha_alta=date(2023, 3, 1))
+    nuevo = EmpleadoFactory(fecha_alta=date(2025, 2, 1))
+    BalanceVacaciones.objects.create(empleado=veterano, anio=2024, dias_disponibles=Decimal("8"))
+    _aprobada(veterano, date(2025, 4, 7), date(2025, 4, 11), 5)
+    _aprobada(junior, date(2025, 7, 1), date(2025, 7, 2), 2)
+    _aprobada(junior, date(2025, 8, 1), date(2025, 8, 1), 1)
+
+    res = reconstruir_balances(2025)
+
+    assert (res.procesados, res.actualizados) == (3, 3)
+    b = {x.empleado_id: x for x in BalanceVacaciones.objects.filter(anio=2025)}
+    assert b[veterano.id].dias_asignados == 20
+    assert b[veterano.id].dias_arrastrados == 5  # tope arrastre_maximo
+    assert b[veterano.id].dias_disponibles == 20
+    assert b[junior.id].dias_asignados == 12 and b[junior.id].dias_tomados == 3
+    assert b[junior.id].dias_disponibles == 9
+    assert b[nuevo.id].dias_asignados == 0
+
+
+@pytest.mark.django_db
+def test_rebuild_es_idempotente_y_dry_run_no_escribe(politicas):
+    emp = EmpleadoFactory(fecha_alta=date(2020, 1, 1))
+
+    assert reconstruir_balances(2025, dry_run=True).actualizados == 0
+    assert not BalanceVacaciones.objects.exists()
+
+    reconstruir_balances(2025)
+    _aprobada(emp, date(2025, 5, 5), date(2025, 5, 6), 2)
+    reconstruir_balances(2025)
+
+    bal = BalanceVacaciones.objects.get(empleado=emp, anio=2025)
+    assert BalanceVacaciones.objects.count() == 1
+    assert bal.dias_tomados == 2 and bal.dias_disponibles == 18
+
+
+@pytest.mark.django_db
+def test_rebuild_cuenta_dias_habiles_antes_que_dias_legacy(politicas):
+    emp = EmpleadoFactory(fecha_alta=date(2020, 1, 1))
+    SolicitudVacaciones.objects.create(
+        empleado=emp, fecha_inicio=date(2025, 5, 5), fecha_fin=date(2025, 5, 9), dias_habiles=5,
+        dias=Decimal(3), estado="APROB",
+    )
+    reconstruir_balances(2025)
+    assert BalanceVacaciones.objects.get(empleado=emp, anio=2025).dias_tomados == 5
+
+
+@pytest.mark.django_db
+def test_endpoint_y_comando_usan_el_mismo_motor(politicas):
+    emp = EmpleadoFactory(fecha_alta=date(2022, 1, 1))
+    EmpleadoFactory(fecha_alta=date(2022, 1, 1), estatus="B")
+
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    resp = c.post("/api/v1/vacaciones/balances/rebuild/", {"year": 2025, "solo_activos": True}, format="json")
+    assert resp.status_code == 200, resp.content
+    assert resp.json() == {"year": 2025, "procesados": 1, "actualizados": 1}
+
+    call_command("recalcular_balances", year=2026, empleado=emp.id)
+    assert BalanceVacaciones.objects.get(empleado=emp, anio=2026).dias_arrastrados == 3
+
+
+@pytest.mark.django_db
+def test_transiciones_ajustan_balance_incrementalmente(politicas):
+    emp = EmpleadoFactory(fecha_alta=date(2022, 1, 1))
+    reconstruir_balances(2025)
+    sol = SolicitudVacaciones.objects.create(
+        empleado=emp, fecha_inicio=date(2025, 3, 3), fecha_fin=date(2025, 3, 5), dias_habiles=3, dias=Decimal(3)
+    )
+
+    sol.aprobar(None)
+    bal = BalanceVacaciones.objects.get(empleado=emp, anio=2025)
+    assert (bal.dias_tomados, bal.dias_disponibles) == (3, 9)
+
+    sol.aprobar(None)  # APROB -> APROB no vuelve a descontar
+    bal.refresh_from_db()
+    assert bal.dias_tomados == 3
+
+    sol.cancelar(None)
+    bal.refresh_from_db()
+    assert (bal.dias_tomados, bal.dias_disponibles) == (0, 12)
+
+
+@pytest.mark.django_db
+def test_solicitud_que_cruza_de_anio_se_reparte(politicas):
+    emp = EmpleadoFactory(fecha_alta=date(2020, 1, 1))
+    # lun 29/dic/2025 .. vie 2/ene/2026: 3 hábiles en 2025, 2 en 2026
+    sol = SolicitudVacaciones.objects.create(
+        empleado=emp, fecha_inicio=date(2025, 12, 29), fecha_fin=date(2026, 1, 2), dias_habiles=5, dias=Decimal(5)
+    )
+    reconstruir_balances(2025)
+
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(is_staff=True))
+    resp = c.post(f"/api/v1/vacaciones/solicitudes/{sol.id}/aprobar/", {}, format="json")
+    assert resp.status_code == 200, resp.content
+
+    b25 = BalanceVacaciones.objects.get(empleado=emp, anio=2025)
+    b26 = BalanceVacaciones.objects.get(empleado=emp, anio=2026)  # no existía: se construye
+    assert b25.dias_tomados == 3 and b26.dias_tomados == 2
+
+    # El rebuild completo coincide con el incremental
+    reconstruir_balances(2025)
+    reconstruir_balances(2026)
+    assert BalanceVacaciones.objects.get(empleado=emp, anio=2025).dias_tomados == 3
+    assert BalanceVacaciones.objects.get(empleado=emp, anio=2026).dias_tomados == 2
+
+
+@pytest.mark.django_db
+def test_cancelar_revierte_el_reparto_fijado_al_aprobar(politicas):
+    from vacaciones.models import Feriado
+
+    emp = EmpleadoFactory(fecha_alta=date(2020, 1, 1))
+    sol = SolicitudVacaciones.objects.create(
+        empleado=emp, fecha_inicio=date(2025, 12, 29), fecha_fin=date(2026, 1, 2), dias_habiles=5, dias=Decimal(5)
+    )
+    sol.aprobar(None)
+    assert sol.dias_aprobados_por_anio == {"2025": "3", "2026": "2"}
+
+    # Un feriado nuevo cambiaría el reparto calculado hoy, no el ya descontado
+    Feriado.objects.create(fecha=date(2026, 1, 2), nombre="Puente")
+    assert sol.dias_por_anio()[2026] == 1
+    reconstruir_balances(2026)
+    assert BalanceVacaciones.objects.get(empleado=emp, anio=2026).dias_tomados == 2
+
+    sol.cancelar(None)
+    assert sol.dias_aprobados_por_anio is None
+    tomados = dict(BalanceVacaciones.objects.filter(empleado=emp).values_list("anio", "dias_tomados"))
+    assert tomados == {2025: 0, 2026: 0}
+
+
+@pytest.mark.django_db
+def test_solicitud_aprobada_no_se_edita_ni_borra(politicas):
+    emp = EmpleadoFactory(fecha_alta=date(2022, 1, 1))
+    reconstruir_balances(2025)
+    sol = SolicitudVacaciones.objects.create(
+        empleado=emp, fecha_inicio=date(2025, 3, 3), fecha_fin=date(2025, 3, 5), dias_habiles=3, dias=Decimal(3)
+    )
+    sol.aprobar(None)
+
+    c = APIClient()
+    c.force_authenticate(user=UserFactory(rrhh=True, is_staff=True))
+    for url in (f"/api/v1/vacaciones/solicitudes/{sol.id}/", f"/api/v1/vacaciones/vacaciones/{sol.id}/"):
+        assert c.patch(url, {"fecha_fin": "2025-03-07"}, format="json").status_code == 400
+        assert c.delete(url).status_code == 400
+    assert SolicitudVacaciones.objects.get(pk=sol.pk).fecha_fin == date(2025, 3, 5)
+    assert BalanceVacaciones.objects.get(empleado=emp, anio=2025).dias_tomados == 3
+
+    # Cancelada devuelve los días; una PEND sí se puede borrar
+    sol.cancelar(None)
+    pend = SolicitudVacaciones.objects.create(
+        empleado=emp, fecha_inicio=date(2025, 4, 7), fecha_fin=date(2025, 4, 7), dias_habiles=1, dias=Decimal(1)
+    )
+    assert c.delete(f"/api/v1/vacaciones/solicitudes/{pend.id}/").status_code == 204
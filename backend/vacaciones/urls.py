@@ -26,6 +26,7 @@ urlpatterns = [
 
 # Endpoint admin-only para reconstruir balances (si existe)
 if hasattr(views, "RebuildBalancesView"):
-    urlpatterns.append(
+    # Antes del router: si no, "balances/<pk>/" captura "rebuild"
+    urlpatterns.insert(0,
         path("balances/rebuild/", views.RebuildBalancesView.as_view(), name="vac-balances-rebuild")
     )
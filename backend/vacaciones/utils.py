@@ -1,14 +1,10 @@
-from datetime import date, timedelta
-from .models import Feriado
+from datetime import date
+
+from core.workdays import dias_habiles as _dias_habiles_calendario
+
 
 def dias_habiles(inicio: date, fin: date) -> int:
+    """Días lun-vie sin feriados en [inicio, fin], vía el calendario laboral precalculado."""
     if not inicio or not fin or fin < inicio:
         return 0
-    total = 0
-    feriados = set(Feriado.objects.filter(fecha__gte=inicio, fecha__lte=fin).values_list("fecha", flat=True))
-    d = inicio
-    while d <= fin:
-        if d.weekday() < 5 and d not in feriados:  # 0-4 = lun-vie
-            total += 1
-        d += timedelta(days=1)
-    return total
+    return _dias_habiles_calendario(inicio, fin)
@@ -1,5 +1,4 @@
 ﻿from datetime import date
-from decimal import Decimal
 
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
@@ -9,8 +8,12 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAdminUser
 from rest_framework.exceptions import PermissionDenied
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 
+from core.exportacion import ExportacionMixin, PARAMETRO_EXPORT
+from core.pagination import KeysetPagination
+from core.workdays import dias_habiles_empleado
+from empleados.alcance import filtrar_por_alcance
 from empleados.models import Empleado
 from .models import (
     PoliticaVacaciones,
@@ -26,12 +29,29 @@ from .serializers import (
     # Nuevo serializer de creaciÃ³n si lo tienes definido:
     # SolicitudVacacionesCreateSerializer,
 )
+from .balances import reconstruir_balances
 from .utils import dias_habiles
 
 # Si tienes serializer de creaciÃ³n separado, descomenta la import y esta bandera
 HAS_CREATE_SERIALIZER = False  # pon True si existe SolicitudVacacionesCreateSerializer
 
 
+# Columnas de ?export= para solicitudes de vacaciones (vista legacy y v2)
+EXPORT_SOLICITUDES = (
+    ("ID", "id"),
+    ("No. empleado", "empleado__numero_empleado"),
+    ("Apellido paterno", "empleado__apellido_paterno"),
+    ("Nombre", "empleado__primer_nombre"),
+    ("Desde", "fecha_inicio"),
+    ("Hasta", "fecha_fin"),
+    ("Días hábiles", "dias_habiles"),
+    ("Estado", "estado"),
+    ("Comentario", "comentario"),
+    ("Creada", "creado_en"),
+    ("Aprobada en", "aprobado_en"),
+)
+
+
 class IsStaffOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in ("GET", "HEAD", "OPTIONS"):
@@ -70,27 +90,57 @@ class FeriadoViewSet(viewsets.ModelViewSet):
 # ======== BALANCES (solo lectura) ========
 @extend_schema(tags=["vacaciones"])
 @extend_schema(tags=["vacaciones"])
-class BalanceViewSet(viewsets.ReadOnlyModelViewSet):
+@extend_schema_view(list=extend_schema(parameters=[PARAMETRO_EXPORT]))
+class BalanceViewSet(ExportacionMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     queryset = BalanceVacaciones.objects.select_related("empleado").all()
     serializer_class = BalanceVacacionesSerializer
+    export_nombre = "balances_vacaciones"
+    export_columnas = (
+        ("No. empleado", "empleado__numero_empleado"),
+        ("Apellido paterno", "empleado__apellido_paterno"),
+        ("Nombre", "empleado__primer_nombre"),
+        ("Año", "anio"),
+        ("Asignados", "dias_asignados"),
+        ("Arrastrados", "dias_arrastrados"),
+        ("Tomados", "dias_tomados"),
+        ("Disponibles", "dias_disponibles"),
+        ("Caduca el", "caduca_el"),
+    )
     filter_backends = [DjangoFilterBackend]
     filterset_fields = {"empleado": ["exact"], "anio": ["exact"]}
 
     def get_queryset(self):
         qs = super().get_queryset()
-        u = self.request.user
-        if u.is_staff:
-            return qs
-        if hasattr(u, "empleado"):
-            return qs.filter(empleado=u.empleado)
-        return qs.none()
+        # No staff: su propio expediente o, con rol Supervisor/Gerente, su línea de reporte
+        return filtrar_por_alcance(qs, self.request.user)
+
+
+class SoloPendientesEditablesMixin:
+    """Edición y borrado solo para solicitudes PEND.
+
+    Una solicitud aprobada ya descontó su reparto del balance; cambiarle fechas o
+    borrarla dejaría el balance desfasado. Para devolver los días se usa cancelar.
+    """
+
+    def _rechazar_si_resuelta(self):
+        if self.get_object().estado != "PEND":
+            return Response({"detail": "Solo solicitudes PEND pueden modificarse o eliminarse; use cancelar."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return None
+
+    def update(self, request, *args, **kwargs):
+        return self._rechazar_si_resuelta() or super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        return self._rechazar_si_resuelta() or super().destroy(request, *args, **kwargs)
 
 
 # ======== SOLICITUDES (legacy) ========
 @extend_schema(tags=["vacaciones"])
 @extend_schema(tags=["vacaciones"])
-class SolicitudViewSet(viewsets.ModelViewSet):
+@extend_schema_view(list=extend_schema(parameters=[PARAMETRO_EXPORT]))
+class SolicitudViewSet(SoloPendientesEditablesMixin, ExportacionMixin, viewsets.ModelViewSet):
     """
     Vista histÃ³rica que opera sobre SolicitudVacaciones con campos
     como 'aprobado_por', 'aprobado_en', etc. Conservada por compatibilidad.
@@ -98,6 +148,8 @@ class SolicitudViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     queryset = SolicitudVacaciones.objects.select_related("empleado", "aprobado_por").all()
     serializer_class = SolicitudVacacionesSerializer
+    export_nombre = "solicitudes_vacaciones"
+    export_columnas = EXPORT_SOLICITUDES
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = [
         "empleado__primer_nombre",
@@ -116,12 +168,8 @@ class SolicitudViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = super().get_queryset()
-        u = self.request.user
-        if u.is_staff:
-            return qs
-        if hasattr(u, "empleado"):
-            return qs.filter(empleado=u.empleado)
-        return qs.none()
+        # No staff: su propio expediente o, con rol Supervisor/Gerente, su línea de reporte
+        return filtrar_por_alcance(qs, self.request.user)
 
     def perform_create(self, serializer):
         u = self.request.user
@@ -137,6 +185,7 @@ class SolicitudViewSet(viewsets.ModelViewSet):
         parameters=[
             OpenApiParameter("fecha_inicio", str, description="YYYY-MM-DD", required=True),
             OpenApiParameter("fecha_fin", str, description="YYYY-MM-DD", required=True),
+            OpenApiParameter("empleado", int, description="ID empleado (opcional): usa su horario"),
         ],
         description="Simula el cÃ¡lculo de dÃ­as hÃ¡biles (excluye fines de semana y feriados globales).",
     )
@@ -151,6 +200,12 @@ class SolicitudViewSet(viewsets.ModelViewSet):
             ff_d = date.fromisoformat(ff)
         except Exception:
             return Response({"detail": "Formato de fecha invÃ¡lido"}, status=status.HTTP_400_BAD_REQUEST)
+        emp_id = request.query_params.get("empleado")
+        if emp_id:
+            empleado = Empleado.objects.filter(pk=emp_id).only("id", "horario_id").first()
+            if empleado is None:
+                return Response({"detail": "Empleado no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"dias_habiles": dias_habiles_empleado(empleado, fi_d, ff_d)})
         return Response({"dias_habiles": dias_habiles(fi_d, ff_d)})
 
     @action(detail=True, methods=["post"], url_path="aprobar", permission_classes=[IsAdminUser])
@@ -158,7 +213,6 @@ class SolicitudViewSet(viewsets.ModelViewSet):
         s = self.get_object()
         if s.estado != "PEND":
             return Response({"detail": "Solo solicitudes PEND pueden aprobarse."}, status=status.HTTP_400_BAD_REQUEST)
-        s.estado = "APROB"
         # Campos legacy:
         if hasattr(s, "aprobado_por"):
             s.aprobado_por = request.user
@@ -166,7 +220,7 @@ class SolicitudViewSet(viewsets.ModelViewSet):
             s.aprobado_en = timezone.now()
         if hasattr(s, "comentario_aprobador"):
             s.comentario_aprobador = request.data.get("comentario", "")
-        s.save()
+        s.cambiar_estado("APROB")  # ajusta BalanceVacaciones en la misma transacciÃ³n
         return Response(self.get_serializer(s).data)
 
     @action(detail=True, methods=["post"], url_path="rechazar", permission_classes=[IsAdminUser])
@@ -174,14 +228,13 @@ class SolicitudViewSet(viewsets.ModelViewSet):
         s = self.get_object()
         if s.estado != "PEND":
             return Response({"detail": "Solo solicitudes PEND pueden rechazarse."}, status=status.HTTP_400_BAD_REQUEST)
-        s.estado = "RECH"
         if hasattr(s, "aprobado_por"):
             s.aprobado_por = request.user
         if hasattr(s, "aprobado_en"):
             s.aprobado_en = timezone.now()
         if hasattr(s, "comentario_aprobador"):
             s.comentario_aprobador = request.data.get("comentario", "")
-        s.save()
+        s.cambiar_estado("RECH")
         return Response(self.get_serializer(s).data)
 
     @action(detail=True, methods=["post"], url_path="cancelar")
@@ -192,50 +245,11 @@ class SolicitudViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Solo PEND/APROB pueden cancelarse."}, status=status.HTTP_400_BAD_REQUEST)
         if not u.is_staff and (not hasattr(u, "empleado") or s.empleado_id != u.empleado_id):
             return Response({"detail": "No puedes cancelar solicitudes de otro empleado."}, status=status.HTTP_403_FORBIDDEN)
-        s.estado = "CANC"
-        s.save(update_fields=["estado"])
+        s.cambiar_estado("CANC", update_fields=["estado", "actualizado_en"])  # si estaba APROB, devuelve los dÃ­as
         return Response(self.get_serializer(s).data)
 
 
 # ======== REBUILD BALANCES (admin-only) ========
-def _antiguedad_anios(empleado, anio: int) -> int:
-    base = empleado.fecha_antiguedad or empleado.fecha_alta
-    if not base:
-        return 0
-    corte = date(anio, 1, 1)
-    if base > corte:
-        return 0
-    return corte.year - base.year - ((corte.month, corte.day) < (base.month, base.day))
-
-
-def _politica_para_anios(anios: int):
-    return (
-        PoliticaVacaciones.objects
-        .filter(activo=True, anios_desde__lte=anios, anios_hasta__gte=anios)
-        .order_by("anios_desde")
-        .first()
-    )
-
-
-def _dias_tomados_en_anio(empleado_id: int, anio: int) -> Decimal:
-    desde = date(anio, 1, 1)
-    hasta = date(anio, 12, 31)
-    qs = SolicitudVacaciones.objects.filter(
-        empleado_id=empleado_id,
-        estado="APROB",
-        fecha_inicio__lte=hasta,
-        fecha_fin__gte=desde,
-    )
-    total = Decimal("0.00")
-    for s in qs:
-        # Soporta modelado con 'dias' o 'dias_habiles'
-        dias_val = getattr(s, "dias_habiles", None)
-        if dias_val is None:
-            dias_val = getattr(s, "dias", 0)
-        total += Decimal(dias_val or 0)
-    return total
-
-
 @extend_schema(tags=["vacaciones"])
 
 
@@ -274,54 +288,21 @@ class RebuildBalancesView(APIView):
         solo_activos = bool(request.data.get("solo_activos") or False)
         empleado_id = request.data.get("empleado")
 
-        qs = Empleado.objects.all()
-        if solo_activos:
-            qs = qs.filter(estatus="A")
-        if empleado_id:
-            qs = qs.filter(id=empleado_id)
-
-        total = qs.count()
-        actualizados = 0
-        for emp in qs.iterator():
-            anios = _antiguedad_anios(emp, anio)
-            pol = _politica_para_anios(anios)
-            dias_asignados = Decimal(getattr(pol, "dias", 0) if pol else 0)
-
-            # Arrastre desde el aÃ±o previo, respetando arrastre_maximo si existe
-            arrastre = Decimal("0.00")
-            if pol:
-                prev = BalanceVacaciones.objects.filter(empleado=emp, anio=anio - 1).first()
-                if prev:
-                    arr_max = Decimal(getattr(pol, "arrastre_maximo", 0) or 0)
-                    arrastre = min(arr_max, max(Decimal("0.00"), prev.dias_disponibles))
-
-            dias_tomados = _dias_tomados_en_anio(emp.id, anio)
-            disp = dias_asignados + arrastre - dias_tomados
-            if disp < 0:
-                disp = Decimal("0.00")
-
-            bal, _ = BalanceVacaciones.objects.get_or_create(empleado=emp, anio=anio)
-            bal.dias_asignados = dias_asignados
-            bal.dias_arrastrados = arrastre
-            bal.dias_tomados = dias_tomados
-            bal.dias_disponibles = disp
-            bal.caduca_el = date(anio, 12, 31)
-            bal.save()
-            actualizados += 1
-
-        return Response({"year": anio, "procesados": total, "actualizados": actualizados})
+        res = reconstruir_balances(anio, solo_activos=solo_activos, empleado_id=empleado_id)
+        return Response({"year": res.anio, "procesados": res.procesados, "actualizados": res.actualizados})
 
 
 # ======== NUEVO: SolicitudVacacionesViewSet (v2) ========
 # Usa mÃ©todos aprobar/rechazar/cancelar del modelo (si existen)
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from cuentas.autenticacion import JWTClaimsAuthentication
 from core.permissions import IsAuthenticatedReadOnlyOrRRHH, IsRRHHEditOnly
 
 @extend_schema(tags=["vacaciones"])
 @extend_schema(tags=["vacaciones"])
-class SolicitudVacacionesViewSet(viewsets.ModelViewSet):
+@extend_schema_view(list=extend_schema(parameters=[PARAMETRO_EXPORT]))
+class SolicitudVacacionesViewSet(SoloPendientesEditablesMixin, ExportacionMixin, viewsets.ModelViewSet):
     queryset = SolicitudVacaciones.objects.select_related("empleado").all()
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (JWTClaimsAuthentication,)
     permission_classes = (IsAuthenticatedReadOnlyOrRRHH,)
     filter_backends = (DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter)
     filterset_fields = {
@@ -337,6 +318,16 @@ class SolicitudVacacionesViewSet(viewsets.ModelViewSet):
     )
     ordering_fields = ("fecha_inicio", "fecha_fin", "creado_en")
     ordering = ("-fecha_inicio",)
+    # ?cursor= activa la paginación por llave (sin COUNT/OFFSET); ?page= sigue disponible
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-fecha_inicio", "-id")
+    export_nombre = "solicitudes_vacaciones"
+    export_columnas = EXPORT_SOLICITUDES
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        # No staff: su propio expediente o, con rol Supervisor/Gerente, su línea de reporte
+        return filtrar_por_alcance(qs, self.request.user)
 
     def get_serializer_class(self):
         if HAS_CREATE_SERIALIZER: